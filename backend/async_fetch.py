@@ -0,0 +1,115 @@
+"""Async JSON fetch engine - one pooled httpx client shared by many small requests"""
+import asyncio
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from host_guard import get_host_guard
+from llm_limiter import parse_retry_after
+
+# HTTP/2 needs the optional `h2` package (pip install "httpx[http2]").
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class AsyncJSONFetcher:
+    """Fetch many JSON documents concurrently over a single pooled client.
+
+    `concurrency` caps requests in flight overall and `per_host` caps them per
+    hostname (it also sizes the connection pool), so a large batch reuses a
+    handful of keep-alive (or multiplexed HTTP/2) connections instead of paying
+    a TCP+TLS handshake per request. The client and the event loop it lives on
+    (in a daemon thread) are created on first use and kept until close(), so
+    connections also carry over from one batch to the next.
+    """
+
+    def __init__(self, concurrency: int = 32, per_host: int = 16, timeout: float = 10,
+                 http2: Optional[bool] = None, headers: Optional[Dict[str, str]] = None):
+        self.concurrency = max(1, int(concurrency))
+        self.per_host = max(1, int(per_host))
+        self.timeout = timeout
+        self.http2 = HTTP2_AVAILABLE if http2 is None else (http2 and HTTP2_AVAILABLE)
+        self.headers = headers or {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="async-json-fetcher", daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    async def _fetch(self, urls: List[str], on_error: Optional[Callable[[str, Exception], None]]) -> Dict[str, Any]:
+        """Runs on the fetcher's own loop, where the pooled client lives"""
+        if self._client is None:
+            limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.per_host)
+            self._client = httpx.AsyncClient(http2=self.http2, limits=limits, timeout=self.timeout,
+                                             headers=self.headers)
+        client = self._client
+        results: Dict[str, Any] = {}
+        guard = get_host_guard()
+        global_sem = asyncio.Semaphore(self.concurrency)
+        host_sems: Dict[str, asyncio.Semaphore] = {}
+
+        async def fetch_one(url: str):
+            host = urlparse(url).netloc.lower()
+            host_sem = host_sems.setdefault(host, asyncio.Semaphore(self.per_host))
+            async with global_sem, host_sem:
+                try:
+                    await guard.acquire_async(url)
+                    try:
+                        resp = await client.get(url)
+                    except Exception as e:
+                        guard.record(url, error=e)
+                        raise
+                    guard.record(url, resp.status_code,
+                                 retry_after=parse_retry_after(resp.headers.get("Retry-After")))
+                    resp.raise_for_status()
+                    results[url] = resp.json()
+                except Exception as e:
+                    results[url] = None
+                    if on_error:
+                        on_error(url, e)
+
+        await asyncio.gather(*(fetch_one(u) for u in urls))
+        return results
+
+    async def fetch_json_async(self, urls: Iterable[str],
+                               on_error: Optional[Callable[[str, Exception], None]] = None) -> Dict[str, Any]:
+        """Return {url: parsed JSON or None} for every url (awaitable from any event loop)."""
+        unique_urls = list(dict.fromkeys(urls))
+        if not unique_urls:
+            return {}
+        future = asyncio.run_coroutine_threadsafe(self._fetch(unique_urls, on_error), self._ensure_loop())
+        return await asyncio.wrap_future(future)
+
+    def fetch_json(self, urls: Iterable[str],
+                   on_error: Optional[Callable[[str, Exception], None]] = None) -> Dict[str, Any]:
+        """Blocking wrapper around fetch_json_async."""
+        unique_urls = list(dict.fromkeys(urls))
+        if not unique_urls:
+            return {}
+        return asyncio.run_coroutine_threadsafe(self._fetch(unique_urls, on_error), self._ensure_loop()).result()
+
+    def close(self):
+        """Close the pooled client and stop the loop; a later fetch starts fresh ones"""
+        with self._lock:
+            loop, thread, self._loop, self._thread = self._loop, self._thread, None, None
+        if loop is None:
+            return
+        if self._client is not None:
+            client, self._client = self._client, None
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
@@ -5,6 +5,7 @@ from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List
 
+from dedup import dedupe_stories
 from exporter import NewsExporter
 from main import (
     _attach_hn_comment_signals,
@@ -54,7 +55,7 @@ def _normalize_raw(raw: Dict) -> List[Dict]:
             item["source"] = feed_name
             item["url"] = item.get("link", item.get("url", ""))
             stories.append(item)
-    return stories
+    return dedupe_stories(stories)
 
 
 def _write_redirect(path: Path):
@@ -75,6 +76,15 @@ def backfill(start: datetime, end: datetime, overwrite: bool = False):
 
     existing = _existing_days(archive_root)
 
+    # Pull HN history for every past day we will build in one batched range query.
+    today = datetime.now().date()
+    pending_days = [
+        day for day in _iter_dates(start, end)
+        if (overwrite or day.strftime("%Y-%m-%d") not in existing) and day.date() < today
+    ]
+    if len(pending_days) > 1:
+        aggregator.prefetch_historical(pending_days[0], pending_days[-1])
+
     for day in _iter_dates(start, end):
         day_key = day.strftime("%Y-%m-%d")
         out_dir = archive_root / day.strftime("%Y") / day.strftime("%m") / day.strftime("%d")
@@ -206,6 +216,8 @@ def backfill(start: datetime, end: datetime, overwrite: bool = False):
             print(f"  - wrote {out_dir}")
         except Exception as exc:
             print(f"  - failed {day_key}: {exc}")
+    aggregator.close()
+    processor.close()
 
     index_exporter = NewsExporter({}, archive_root=archive_root)
     index_exporter.export_archive_index(str(archive_root), str(archive_root / "index.html"))
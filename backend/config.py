@@ -67,6 +67,78 @@ AI_KEYWORDS = [
 # ============================================================================
 HACKERNEWS_STORY_LIMIT = 100
 
+# HN item details are fetched by one pooled async client (HTTP/2 if `h2` is installed)
+HN_FETCH_CONCURRENCY = 32  # max item requests in flight
+HN_PER_HOST_LIMIT = 16  # max in-flight requests / keep-alive connections per host
+HN_NEW_STORIES_BATCH = 50  # newstories are walked newest-first in batches of this size
+HN_ITEM_CACHE_TTL = 3600  # seconds HN items persist in output/cache/hn_items.json (0 = in-memory only)
+# Comment trees (insights, release signals) are walked breadth-first under these budgets
+HN_COMMENT_DEPTH = 2  # levels below the story
+HN_COMMENT_MAX_ITEMS = 40
+HN_COMMENT_MAX_BYTES = 16 * 1024  # total comment text
+IMAGE_REVALIDATE_DAYS = 30  # stored story images (output/images/index.json) are re-checked with a conditional GET after this
+IMAGE_DOWNLOAD_WORKERS = 8  # story images downloaded concurrently in step [4/5]
+IMAGE_STAGE_DEADLINE = 60  # seconds for the whole download stage
+IMAGE_MAX_BYTES = 8 * 1024 * 1024  # larger images are abandoned mid-download
+# Cover images are ranked locally (source tag, URL size hints, probed pixel size) rather than by the LLM
+IMAGE_PROBE_TOP = 4  # best candidates probed with a ranged GET for their real size
+IMAGE_MIN_WIDTH = 200  # smaller candidates are discarded
+IMAGE_FEATURE_MIN_WIDTH = 600  # best candidate must be this wide to be shown
+IMAGE_DISCOVERY_WORKERS = 8  # article pages fetched for cover images while the LLM categorizes
+IMAGE_DISCOVERY_TIMEOUT = 20  # seconds a surviving story waits for its cover image
+# Downloaded images are resized into WebP (and AVIF, if Pillow supports it) variants when Pillow is installed
+IMAGE_LAYOUT_MAX_SIZE = {"WIDE": (1200, 675), "TALL": (600, 900), "SQUARE": (800, 800)}
+IMAGE_RESPONSIVE_WIDTHS = (400, 800)  # srcset widths, plus the layout's own cap
+ALGOLIA_RANGE_CHUNK_DAYS = 7  # backfills query Algolia in windows of this many days
+
+# Run-to-run state and caches (relative to repo root; not committed, restored in CI)
+CACHE_DIRECTORY = "output/cache"
+
+# Shared on-disk HTTP cache for feeds, blog listings and article pages
+HTTP_CACHE_TTL = 1800  # seconds a feed/listing is served without revalidation
+HTTP_CACHE_ARTICLE_TTL = 7 * 86400  # article pages (metadata, images, dates)
+HTTP_CACHE_MAX_MB = 200  # LRU-evict bodies beyond this size
+HTTP_CACHE_FLUSH_EVERY = 25  # index changes between index.json rewrites (the rest is flushed at exit)
+HTML_MAX_BYTES = 512 * 1024  # article pages are truncated here before parsing
+HOST_RATE_PER_SEC = 5  # default per-host request rate (token bucket) for all outbound fetchers
+HOST_RATE_BURST = 10
+HOST_RATE_LIMITS = {  # per-host overrides, requests/second
+    "hacker-news.firebaseio.com": 100,
+    "hn.algolia.com": 10,
+}
+HOST_FAILURE_THRESHOLD = 3  # consecutive failures before a host is skipped for the rest of the run
+HOST_THROTTLE_COOLDOWN = 30  # seconds a host is skipped after a 429 without a Retry-After header
+
+# LLM calls are paced per provider/model by an AIMD limiter (grow on success, halve on 429, honour Retry-After)
+PROCESSING_MAX_WORKERS = 8  # stories processed concurrently; effective LLM concurrency adapts below this
+LLM_CONCURRENCY_START = 2  # in-flight calls per provider/model at the start of a run
+LLM_CONCURRENCY_MAX = 8
+LLM_BACKOFF_FACTOR = 0.5  # multiplicative decrease on 429 / 5xx / transport errors
+LLM_DEFAULT_RETRY_AFTER = 5  # seconds a lane pauses after a 429 without a Retry-After header
+LLM_MAX_QUEUE_WAIT = 2  # seconds a call waits for a slot before falling through to the next model
+# Responses are cached in output/cache/llm_responses.sqlite3 keyed by prompt, prompt version and model tier
+LLM_CACHE_TTL = 7 * 86400  # covers stories that resurface on later days and backfill reruns
+LLM_CACHE_MAX_ENTRIES = 5000  # least recently used entries are evicted beyond this
+LLM_PROMPT_VERSION = "1"  # bump to invalidate cached answers when parsing or categories change
+# Hedged requests: if a provider is slower than its p50 latency, the next one is asked in parallel
+LLM_HEDGE_MAX_INFLIGHT = 2  # duplicate attempts per call (1 = serial failover, no hedging)
+LLM_HEDGE_MULTIPLIER = 1.0  # hedge after this multiple of the provider's p50 latency
+LLM_HEDGE_DEFAULT_DELAY = 8  # seconds, until a provider has latency history
+LLM_HEDGE_MIN_DELAY = 1
+# Models are ordered by Thompson sampling over their history (output/cache/model_stats.json)
+MODEL_STATS_HALF_LIFE_HOURS = 72  # older successes/failures count half as much after this
+MODEL_LATENCY_EWMA_ALPHA = 0.2
+MODEL_LATENCY_SCALE = 10  # seconds of EWMA latency that halve a model's score
+MODEL_COST_WEIGHT = 1.0  # cost penalty per $ per 1M tokens when preferring cheap models
+CATEGORIZATION_BATCH_MAX = 12  # stories categorized per LLM call (0 or 1 = one call per story)
+CATEGORIZATION_BATCH_CONTEXT_SHARE = 0.1  # share of the smallest model context window a batch prompt may use
+# Naive Bayes pre-classifier trained on docs/archive answers confident stories without the LLM.
+# It self-disables unless some confidence threshold reaches this cross-validated precision.
+PRECLASSIFIER_MIN_PRECISION = 0.9
+PRECLASSIFIER_MIN_EXAMPLES = 100  # distinct archived stories needed before it is trained at all
+PRECLASSIFIER_MIN_CLASS_EXAMPLES = 8  # categories with fewer labelled stories always go to the LLM
+PRECLASSIFIER_SKIP_CATEGORIES = {7}  # model releases need the LLM's detected_model
+
 RSS_FEEDS = {
     # AI Hubs
     "openai": "https://openai.com/news/rss.xml",
@@ -91,8 +163,13 @@ RSS_FEEDS = {
     "bair": "https://bair.berkeley.edu/blog/feed.xml",
 }
 RSS_STORIES_PER_FEED = 8
+RSS_FETCH_WORKERS = 8  # feeds downloaded concurrently
+RSS_FEED_DEADLINE = 15  # seconds; a feed still running after this is abandoned
+RSS_INCREMENTAL = True  # only emit entries newer than the previous run's (output/cache/feed_state.sqlite3)
 
 # Labs/pages without stable RSS where we use lightweight scraping fallback
+BLOG_DATE_PROBE_WORKERS = 4  # article pages probed concurrently per site for publish dates
+BLOG_DATE_PROBE_DEADLINE = 12  # seconds per site; unresolved probes fall back to the link text
 LABS_TO_SCRAPE = {
     "anthropic": "https://www.anthropic.com/news",
     "mistral": "https://mistral.ai/news",
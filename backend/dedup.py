@@ -0,0 +1,190 @@
+"""Cross-source story identity: canonical URLs plus a MinHash index over title shingles"""
+import hashlib
+import random
+import re
+from typing import Dict, List, Optional, Set
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+# Only keys that exist purely for attribution. Generic names (ref, source, src, output, ...)
+# often select content, e.g. ?ref=<branch> on GitHub, so they are kept.
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "igshid", "mc_cid", "mc_eid", "ref_src",
+    "ref_url", "cmpid", "smid", "_hsenc", "_hsmi", "mkt_tok", "yclid", "spm", "amp",
+}
+TRACKING_PREFIXES = ("utm_", "hsa_", "pk_", "mtm_")
+HOST_PREFIXES = ("www.", "m.", "amp.", "mobile.")
+
+SHINGLE_SIZE = 5
+NUM_PERMUTATIONS = 64
+BANDS = 16  # 16 bands x 4 rows: pairs above ~0.6 Jaccard almost always collide
+SIMILARITY_THRESHOLD = 0.7
+
+
+def canonicalize_url(url: str) -> str:
+    """Collapse tracking params, www/m/amp hosts, AMP paths and trailing slashes"""
+    if not url:
+        return ""
+    try:
+        parsed = urlparse(url.strip())
+    except ValueError:
+        return url.strip().lower()
+    if not parsed.netloc:
+        return url.strip().lower()
+
+    host = parsed.netloc.lower()
+    if host.endswith(":80") or host.endswith(":443"):
+        host = host.rsplit(":", 1)[0]
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+
+    path = re.sub(r"/{2,}", "/", parsed.path or "/")
+    path = re.sub(r"(/amp)+/?$", "", path)  # /post/amp
+    path = re.sub(r"^/amp(/|$)", "/", path)  # /amp/post
+    path = re.sub(r"\.amp(\.html?)?$", r"\1", path)  # /post.amp.html
+    path = re.sub(r"/index\.html?$", "/", path)
+    path = path.rstrip("/") or "/"
+
+    query = [
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)
+    ]
+    # Scheme is dropped on purpose: http and https copies are the same story.
+    return urlunparse(("", host, path, "", urlencode(sorted(query)), ""))[2:]
+
+
+def normalize_title(title: str) -> str:
+    text = (title or "").lower()
+    # Drop trailing site names: "Introducing X | OpenAI", "Introducing X - The Verge"
+    text = re.sub(r"\s+[|–—-]\s+[^|–—-]{1,30}$", "", text)
+    text = re.sub(r"^(show|ask|launch) hn:\s*", "", text)
+    text = re.sub(r"[^\w\s]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def title_shingles(title: str, k: int = SHINGLE_SIZE) -> Set[str]:
+    text = normalize_title(title)
+    if len(text) <= k:
+        return {text} if text else set()
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+
+_MERSENNE_PRIME = (1 << 61) - 1
+# Fixed seed so signatures are stable across processes.
+_rng = random.Random(0x70C3E)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERMUTATIONS)]
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def minhash_signature(shingles: Set[str], num_perm: int = NUM_PERMUTATIONS) -> List[int]:
+    """Hash each shingle once, then derive num_perm permutations as (a*x + b) mod p"""
+    hashes = [_hash(sh) for sh in shingles]
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS[:num_perm]]
+
+
+def version_tokens(title: str) -> Set[str]:
+    """Tokens carrying digits ("gpt 5", "2026", "v3") - titles differing here are different stories"""
+    return {tok for tok in normalize_title(title).split() if any(ch.isdigit() for ch in tok)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class StoryIndex:
+    """Merges stories that share a canonical URL or a near-identical title.
+
+    Title candidates come from MinHash LSH buckets and are confirmed with the
+    exact shingle Jaccard, so lookups stay cheap as the index grows.
+    """
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD, num_perm: int = NUM_PERMUTATIONS, bands: int = BANDS):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.stories: List[Dict] = []
+        self._by_url: Dict[str, int] = {}
+        self._shingles: List[Set[str]] = []
+        self._versions: List[Set[str]] = []
+        self._buckets: Dict[tuple, List[int]] = {}
+
+    def _band_keys(self, signature: List[int]):
+        for band in range(self.bands):
+            yield band, tuple(signature[band * self.rows:(band + 1) * self.rows])
+
+    def find(self, story: Dict, shingles: Set[str] = None, signature: List[int] = None) -> Optional[int]:
+        """Index of an already-indexed duplicate of `story`, if any"""
+        url = canonicalize_url(story.get("url") or story.get("link") or "")
+        if url and url in self._by_url:
+            return self._by_url[url]
+        shingles = shingles if shingles is not None else title_shingles(story.get("title", ""))
+        if len(shingles) < 3:
+            return None
+        signature = signature or minhash_signature(shingles, self.num_perm)
+        candidates = {idx for key in self._band_keys(signature) for idx in self._buckets.get(key, [])}
+        versions = version_tokens(story.get("title", ""))
+        best, best_score = None, self.threshold
+        for idx in candidates:
+            if self._versions[idx] != versions:
+                continue
+            score = jaccard(shingles, self._shingles[idx])
+            if score >= best_score:
+                best, best_score = idx, score
+        return best
+
+    def add(self, story: Dict) -> Dict:
+        """Insert `story`, merging it into an existing duplicate. Returns the kept story."""
+        shingles = title_shingles(story.get("title", ""))
+        signature = minhash_signature(shingles, self.num_perm) if len(shingles) >= 3 else None
+        url = canonicalize_url(story.get("url") or story.get("link") or "")
+        match = self.find(story, shingles, signature)
+
+        if match is not None:
+            kept = self.stories[match]
+            self._merge(kept, story)
+            if url:
+                self._by_url.setdefault(url, match)
+            return kept
+
+        kept = dict(story)
+        kept["sources"] = [self._source_ref(story)]
+        idx = len(self.stories)
+        self.stories.append(kept)
+        self._shingles.append(shingles)
+        self._versions.append(version_tokens(story.get("title", "")))
+        if url:
+            self._by_url[url] = idx
+        if signature:
+            for key in self._band_keys(signature):
+                self._buckets.setdefault(key, []).append(idx)
+        return kept
+
+    @staticmethod
+    def _source_ref(story: Dict) -> Dict:
+        source = story.get("source") or ("HackerNews" if story.get("id") else "Unknown")
+        return {"source": source, "url": story.get("url") or story.get("link") or ""}
+
+    @staticmethod
+    def _merge(kept: Dict, dup: Dict):
+        ref = StoryIndex._source_ref(dup)
+        if ref not in kept["sources"]:
+            kept["sources"].append(ref)
+        # Fill gaps (e.g. an HN item gains the lab feed's summary and publish date).
+        for key, value in dup.items():
+            if value and not kept.get(key) and key not in ("sources", "source"):
+                kept[key] = value
+
+
+def dedupe_stories(stories: List[Dict]) -> List[Dict]:
+    """Collapse cross-source duplicates, keeping first-seen order and merging sources"""
+    index = StoryIndex()
+    for story in stories:
+        index.add(story)
+    return index.stories
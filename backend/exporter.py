@@ -8,6 +8,9 @@ from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional
 
+# Articles sit in one of three columns (max-width 1280px), or full width below 1000px.
+IMAGE_SIZES = "(max-width: 1000px) 100vw, 400px"
+
 try:
     from meta_ai_api_tool_call import MetaAI
     HAS_META_AI = True
@@ -187,6 +190,30 @@ class NewsExporter:
             return f'{source_html} | <a href="{hn_url}" target="_blank" rel="noopener" class="hn-link">HN DISCUSSION</a>'
         return source_html
 
+    @staticmethod
+    def _render_image(story: Dict, img_src: str, image_prefix: str) -> str:
+        """<img> for a story; transcoded variants become srcset/<source> with explicit dimensions"""
+        variants = story.get("image_variants") or []
+        if not variants:
+            return f'<img src="{img_src}" class="news-img" alt="">'
+
+        def srcset(fmt: str) -> str:
+            return ", ".join(f"{image_prefix}{v['file']} {v['width']}w" for v in variants if v.get("format") == fmt)
+
+        webp = [v for v in variants if v.get("format") == "webp"]
+        src = f"{image_prefix}{webp[-1]['file']}" if webp else img_src
+        avif_srcset = srcset("avif")
+        source_html = f'<source type="image/avif" srcset="{avif_srcset}" sizes="{IMAGE_SIZES}">' if avif_srcset else ""
+        lqip = story.get("image_lqip", "")
+        style = f' style="background:url({lqip}) center/cover"' if lqip.startswith("data:image/") else ""
+        return (
+            f"<picture>{source_html}"
+            f'<img src="{src}" srcset="{srcset("webp")}" sizes="{IMAGE_SIZES}" '
+            f'width="{int(story.get("image_width", 0))}" height="{int(story.get("image_height", 0))}" '
+            f'loading="lazy" decoding="async" class="news-img" alt=""{style}>'
+            "</picture>"
+        )
+
     def _render_article(self, story: Dict, layout_class: str, headline_class: str, image_prefix: str) -> str:
         headline = html.escape(story.get("generated_headline", story.get("original_title", "Untitled")))
         summary = html.escape(story.get("summary", ""))
@@ -195,7 +222,7 @@ class NewsExporter:
 
         url = _safe_url(story.get("url"), _safe_url(story.get("hn_url"), "#"))
         image_html = (
-            f'<a href="{url}" target="_blank" rel="noopener"><img src="{final_img_src}" class="news-img" alt=""></a>'
+            f'<a href="{url}" target="_blank" rel="noopener">{self._render_image(story, final_img_src, image_prefix)}</a>'
             if final_img_src
             else ""
         )
@@ -619,7 +646,7 @@ class NewsExporter:
         .metadata {{ font-family:'Oswald',sans-serif; font-size:.72rem; color:var(--muted); margin-bottom:10px; letter-spacing:.04em; text-transform:uppercase; }}
         .metadata .source-link, .hn-link {{ color:var(--highlight); font-weight:700; }}
         .summary-sm {{ margin:0; font-size:.98rem; }}
-        .news-img {{ width:100%; display:block; margin-bottom:14px; filter:grayscale(100%); border:1px solid #d7c9b2; transition:.25s; box-shadow:4px 4px 0 rgba(0,0,0,.05); }}
+        .news-img {{ width:100%; height:auto; display:block; margin-bottom:14px; filter:grayscale(100%); border:1px solid #d7c9b2; transition:.25s; box-shadow:4px 4px 0 rgba(0,0,0,.05); }}
         .news-img:hover {{ filter:none; transform:translateY(-1px); }}
         .page-footer-nav {{ display:flex; justify-content:space-between; align-items:center; margin-top:36px; padding-top:14px; border-top:1px solid var(--ink); }}
         .nav-btn {{ font-family:'Oswald',sans-serif; color:var(--ink); text-decoration:none; border:1px solid var(--ink); padding:8px 14px; font-size:.82rem; }}
@@ -0,0 +1,196 @@
+"""Per-host token-bucket rate limiting and circuit breaking shared by every outbound fetcher"""
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from llm_limiter import parse_retry_after
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+try:
+    import config as _cfg
+except Exception:
+    _cfg = None
+
+HOST_RATE_PER_SEC = float(getattr(_cfg, "HOST_RATE_PER_SEC", 5))
+HOST_RATE_BURST = int(getattr(_cfg, "HOST_RATE_BURST", 10))
+HOST_RATE_LIMITS = getattr(_cfg, "HOST_RATE_LIMITS", {})
+HOST_FAILURE_THRESHOLD = int(getattr(_cfg, "HOST_FAILURE_THRESHOLD", 3))
+HOST_THROTTLE_COOLDOWN = float(getattr(_cfg, "HOST_THROTTLE_COOLDOWN", 30))
+HOST_MAX_COOLDOWN = 300
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised instead of contacting a host whose circuit has tripped"""
+
+
+def host_of(url: str) -> str:
+    host = urlparse(url).netloc.lower() if "//" in url else url.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def is_failure_status(status_code: int) -> bool:
+    """Statuses that say the host is struggling, not that the URL is bad (429 only cools the host off)"""
+    return status_code >= 500
+
+
+class _HostState:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.consecutive_failures = 0
+        self.open = False
+        self.cooldown_until = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.skipped = 0
+        self.throttled = 0
+        self.waited = 0.0
+
+
+class HostGuard:
+    """Token bucket per host plus a run-long circuit breaker.
+
+    Every request takes a token from its host's bucket (refilled at `rate`
+    per second up to `burst`), waiting when the bucket is empty. After
+    `failure_threshold` consecutive failures - transport errors and 5xx -
+    the host's circuit opens and later requests fail immediately with
+    CircuitOpenError for the rest of the run instead of timing out again.
+    A 429 is not a failure: it only pauses the host (CircuitOpenError as
+    well) until its Retry-After, or HOST_THROTTLE_COOLDOWN, has passed.
+    """
+
+    def __init__(self, rate: float = None, burst: int = None, failure_threshold: int = None,
+                 host_limits: Dict[str, float] = None):
+        self.rate = HOST_RATE_PER_SEC if rate is None else rate
+        self.burst = HOST_RATE_BURST if burst is None else burst
+        self.failure_threshold = HOST_FAILURE_THRESHOLD if failure_threshold is None else failure_threshold
+        self.host_limits = HOST_RATE_LIMITS if host_limits is None else host_limits
+        self._hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            rate = self.host_limits.get(host, self.rate)
+            state = self._hosts[host] = _HostState(rate, max(self.burst, int(rate)))
+        return state
+
+    def _reserve(self, url: str) -> float:
+        """Take a token for `url`'s host; returns how long the caller must wait before sending"""
+        host = host_of(url)
+        with self._lock:
+            state = self._state(host)
+            if state.open:
+                state.skipped += 1
+                raise CircuitOpenError(f"circuit open for {host} after {state.consecutive_failures} failures")
+            now = time.monotonic()
+            if now < state.cooldown_until:
+                state.skipped += 1
+                raise CircuitOpenError(f"{host} is cooling off after a 429 for {state.cooldown_until - now:.0f}s")
+            state.tokens = min(state.burst, state.tokens + (now - state.updated) * state.rate)
+            state.updated = now
+            state.tokens -= 1
+            state.requests += 1
+            delay = -state.tokens / state.rate if state.tokens < 0 and state.rate > 0 else 0.0
+            state.waited += delay
+            return delay
+
+    def acquire(self, url: str):
+        """Block until `url`'s host may be contacted. Raises CircuitOpenError if it is tripped."""
+        delay = self._reserve(url)
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self, url: str):
+        delay = self._reserve(url)
+        if delay:
+            await asyncio.sleep(delay)
+
+    def record(self, url: str, status_code: Optional[int] = None, error: Exception = None,
+               retry_after: float = None):
+        """Report a request's outcome: an exception or a failure status counts against the host"""
+        if isinstance(error, CircuitOpenError):
+            return
+        failed = error is not None or (status_code is not None and is_failure_status(status_code))
+        host = host_of(url)
+        with self._lock:
+            state = self._state(host)
+            if status_code == 429:
+                # Throttling says nothing about the host's health; back off briefly, keep the failure streak as is.
+                state.throttled += 1
+                wait = HOST_THROTTLE_COOLDOWN if retry_after is None else retry_after
+                state.cooldown_until = max(state.cooldown_until, time.monotonic() + min(wait, HOST_MAX_COOLDOWN))
+                return
+            if not failed:
+                state.consecutive_failures = 0
+                return
+            state.failures += 1
+            state.consecutive_failures += 1
+            if not state.open and state.consecutive_failures >= self.failure_threshold:
+                state.open = True
+                print(f"      - Circuit opened for {host}: skipping it for the rest of the run")
+
+    def is_open(self, url: str) -> bool:
+        """Whether acquire() would refuse `url`'s host right now (tripped or cooling off)"""
+        with self._lock:
+            state = self._hosts.get(host_of(url))
+            return bool(state and (state.open or time.monotonic() < state.cooldown_until))
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Per-host counters, for the run summary and metadata.json"""
+        with self._lock:
+            return {
+                host: {
+                    "requests": s.requests,
+                    "failures": s.failures,
+                    "skipped": s.skipped,
+                    "throttled": s.throttled,
+                    "throttled_seconds": round(s.waited, 2),
+                    "circuit": "open" if s.open else "closed",
+                }
+                for host, s in sorted(self._hosts.items())
+            }
+
+    def summary(self) -> str:
+        hosts = self.snapshot()
+        tripped = [h for h, s in hosts.items() if s["circuit"] == "open"]
+        skipped = sum(s["skipped"] for s in hosts.values())
+        waited = sum(s["throttled_seconds"] for s in hosts.values())
+        text = f"{len(hosts)} hosts, {waited:.1f}s throttled, {skipped} requests skipped"
+        if tripped:
+            text += f", open circuits: {', '.join(tripped)}"
+        return text
+
+
+def guarded_get(url: str, **kwargs) -> requests.Response:
+    """requests.get behind the shared guard"""
+    guard = get_host_guard()
+    guard.acquire(url)
+    try:
+        resp = requests.get(url, **kwargs)
+    except Exception as e:
+        guard.record(url, error=e)
+        raise
+    guard.record(url, resp.status_code, retry_after=parse_retry_after(resp.headers.get("Retry-After")))
+    return resp
+
+
+_shared_guard: Optional[HostGuard] = None
+_shared_lock = threading.Lock()
+
+
+def get_host_guard() -> HostGuard:
+    """Process-wide guard shared by the scrapers, image downloads and LLM clients"""
+    global _shared_guard
+    with _shared_lock:
+        if _shared_guard is None:
+            _shared_guard = HostGuard()
+        return _shared_guard
@@ -0,0 +1,132 @@
+"""Streaming extraction of <meta>/<link>/<time>/<img> tags without building a DOM"""
+import html as _html
+import re
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional
+
+CHUNK_CHARS = 16 * 1024
+MAX_TEXT_CHARS = 100_000
+SKIP_TEXT_TAGS = {"script", "style", "noscript", "template", "svg"}
+# Anything else marks the start of the body, even when </head> and <body> are omitted.
+HEAD_TAGS = {"html", "head", "meta", "link", "title", "base", "script", "style", "noscript", "template"}
+
+
+_BREAK_TAGS = re.compile(r"<\s*/?\s*(?:p|br|li|pre|div)\b[^>]*>", re.I)
+_ANY_TAG = re.compile(r"<[^>]*>")
+
+
+def html_to_text(markup: str) -> str:
+    """Tag-stripped, entity-decoded text of a small HTML fragment (e.g. an HN comment)"""
+    if not markup:
+        return ""
+    text = _ANY_TAG.sub("", _BREAK_TAGS.sub("\n", markup))
+    text = _html.unescape(text)
+    text = re.sub(r"[ \t]+", " ", text)
+    return re.sub(r"\s*\n\s*", "\n", text).strip()
+
+
+class PageMeta:
+    """Tags collected from a page; attribute names are lowercased"""
+
+    def __init__(self):
+        self.metas: List[Dict[str, str]] = []
+        self.links: List[Dict[str, str]] = []
+        self.images: List[Dict[str, str]] = []
+        self.times: List[Dict[str, str]] = []  # {'datetime': ..., 'text': ...}
+        self.text_parts: List[str] = []
+        self.head_complete = False
+        self.stopped_early = False
+
+    @property
+    def text(self) -> str:
+        return " ".join(self.text_parts)
+
+    def meta_values(self, *keys: str) -> List[str]:
+        """content= of metas whose property/name/itemprop contains any of `keys`"""
+        values = []
+        for meta in self.metas:
+            content = meta.get("content")
+            if not content:
+                continue
+            label = " ".join(meta.get(k, "") for k in ("property", "name", "itemprop")).lower()
+            if any(key in label for key in keys):
+                values.append(content)
+        return values
+
+
+class _StopParsing(Exception):
+    pass
+
+
+class _MetaParser(HTMLParser):
+    def __init__(self, stop_after_head: Optional[Callable[[PageMeta], bool]], collect_text: bool):
+        super().__init__(convert_charrefs=True)
+        self.page = PageMeta()
+        self.stop_after_head = stop_after_head
+        self.collect_text = collect_text
+        self._text_chars = 0
+        self._skip_depth = 0
+        self._open_time: Optional[Dict[str, str]] = None
+
+    def _finish_head(self):
+        if self.page.head_complete:
+            return
+        self.page.head_complete = True
+        if self.stop_after_head and self.stop_after_head(self.page):
+            self.page.stopped_early = True
+            raise _StopParsing()
+
+    def handle_starttag(self, tag, attrs):
+        attributes = {k.lower(): (v or "") for k, v in attrs}
+        if not self.page.head_complete and tag not in HEAD_TAGS:
+            self._finish_head()
+        if tag == "meta":
+            self.page.metas.append(attributes)
+        elif tag == "link":
+            self.page.links.append(attributes)
+        elif tag == "img":
+            self.page.images.append(attributes)
+        elif tag == "time":
+            self._open_time = {"datetime": attributes.get("datetime", ""), "text": ""}
+            self.page.times.append(self._open_time)
+        elif tag in SKIP_TEXT_TAGS:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            self._finish_head()
+        elif tag == "time":
+            self._open_time = None
+        elif tag in SKIP_TEXT_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._open_time is not None:
+            self._open_time["text"] += data.strip()
+        if self.collect_text and self.page.head_complete and self._text_chars < MAX_TEXT_CHARS:
+            chunk = data.strip()
+            if chunk:
+                self.page.text_parts.append(chunk)
+                self._text_chars += len(chunk)
+
+
+def extract_page_meta(html: str, stop_after_head: Optional[Callable[[PageMeta], bool]] = None,
+                      collect_text: bool = False) -> PageMeta:
+    """Parse `html` incrementally, collecting only the tags we read.
+
+    If `stop_after_head` returns True once </head> (or <body>) is reached,
+    parsing stops there and the body is never tokenized.
+    """
+    parser = _MetaParser(stop_after_head, collect_text)
+    try:
+        for start in range(0, len(html or ""), CHUNK_CHARS):
+            parser.feed(html[start:start + CHUNK_CHARS])
+        parser.close()
+    except _StopParsing:
+        pass
+    except Exception:
+        # Malformed markup: keep whatever was collected before the error.
+        pass
+    return parser.page
@@ -0,0 +1,285 @@
+"""Persistent on-disk HTTP response cache with ETag/Last-Modified revalidation"""
+import atexit
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import requests
+
+from host_guard import get_host_guard
+from llm_limiter import parse_retry_after
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+try:
+    import config as _cfg
+except Exception:
+    _cfg = None
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+CACHE_DIR = REPO_ROOT / getattr(_cfg, "CACHE_DIRECTORY", "output/cache")
+HTTP_CACHE_TTL = int(getattr(_cfg, "HTTP_CACHE_TTL", 1800))
+HTTP_CACHE_MAX_MB = int(getattr(_cfg, "HTTP_CACHE_MAX_MB", 200))
+# The index is rewritten after this many changes; flush() (also run at exit) writes the rest.
+HTTP_CACHE_FLUSH_EVERY = int(getattr(_cfg, "HTTP_CACHE_FLUSH_EVERY", 25))
+
+
+class CachedResponse:
+    """Minimal requests.Response look-alike returned by HTTPCache.get"""
+
+    def __init__(self, url: str, status_code: int, headers: Dict[str, str], content: bytes,
+                 from_cache: bool = False, revalidated: bool = False):
+        self.url = url
+        self.status_code = status_code
+        self.headers = requests.structures.CaseInsensitiveDict(headers or {})
+        self.content = content or b""
+        self.from_cache = from_cache
+        self.revalidated = revalidated
+
+    @property
+    def encoding(self) -> str:
+        match = re.search(r"charset=([\w-]+)", self.headers.get("Content-Type", ""), re.I)
+        return match.group(1) if match else "utf-8"
+
+    @property
+    def text(self) -> str:
+        try:
+            return self.content.decode(self.encoding, errors="replace")
+        except LookupError:
+            return self.content.decode("utf-8", errors="replace")
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}")
+
+
+class HTTPCache:
+    """URL-keyed body store with TTLs, conditional GETs and size-bounded LRU eviction.
+
+    Fresh entries (younger than their TTL) are served without touching the
+    network. Stale entries are revalidated with If-None-Match /
+    If-Modified-Since, so an unchanged page costs a 304. If the network fails
+    we fall back to the stale copy rather than losing the page. Reads with
+    `max_bytes` are cut from the full body when one is cached; a body that
+    was actually truncated is kept under its own (url, cap) key, so capped
+    and full reads of one URL never overwrite each other.
+    """
+
+    def __init__(self, root: Path = None, max_bytes: int = None, default_ttl: int = None):
+        self.root = Path(root or CACHE_DIR / "http")
+        self.max_bytes = max_bytes if max_bytes is not None else HTTP_CACHE_MAX_MB * 1024 * 1024
+        self.default_ttl = default_ttl if default_ttl is not None else HTTP_CACHE_TTL
+        self._index_path = self.root / "index.json"
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._unflushed = 0
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "stale_served": 0, "evictions": 0}
+        self._index: Dict[str, Dict] = self._load_index()
+
+    @staticmethod
+    def _key(url: str, max_bytes: int = None) -> str:
+        name = f"{url}#max_bytes={max_bytes}" if max_bytes else url
+        return hashlib.sha256(name.encode("utf-8")).hexdigest()
+
+    def _body_path(self, key: str) -> Path:
+        return self.root / f"{key}.body"
+
+    def _load_index(self) -> Dict[str, Dict]:
+        try:
+            with open(self._index_path, "r") as f:
+                index = json.load(f)
+            return index if isinstance(index, dict) else {}
+        except Exception:
+            return {}
+
+    def flush(self):
+        """Write the index to disk (atomically) if it changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                self.root.mkdir(parents=True, exist_ok=True)
+                tmp_path = self._index_path.with_suffix(".tmp")
+                with open(tmp_path, "w") as f:
+                    json.dump(self._index, f)
+                os.replace(tmp_path, self._index_path)
+                self._dirty = False
+                self._unflushed = 0
+            except Exception as e:
+                print(f"      - Could not persist HTTP cache index: {e}")
+
+    def _changed(self):
+        """Note an index change (lock held); every HTTP_CACHE_FLUSH_EVERY changes hit the disk"""
+        self._dirty = True
+        self._unflushed += 1
+        if self._unflushed >= HTTP_CACHE_FLUSH_EVERY:
+            self.flush()
+
+    def _read_body(self, key: str) -> Optional[bytes]:
+        try:
+            return self._body_path(key).read_bytes()
+        except OSError:
+            return None
+
+    def _store(self, key: str, url: str, resp: requests.Response, content: bytes):
+        """Write the body (outside the lock), then index it"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        body_path = self._body_path(key)
+        tmp_path = body_path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(content)
+        os.replace(tmp_path, body_path)
+        now = time.time()
+        with self._lock:
+            self._index[key] = {
+                "url": url,
+                "status": resp.status_code,
+                "content_type": resp.headers.get("Content-Type", ""),
+                "etag": resp.headers.get("ETag", ""),
+                "last_modified": resp.headers.get("Last-Modified", ""),
+                "fetched_at": now,
+                "last_access": now,
+                "size": len(content),
+            }
+            self._evict()
+            self._changed()
+
+    def _evict(self):
+        total = sum(e.get("size", 0) for e in self._index.values())
+        if total <= self.max_bytes:
+            return
+        for key, entry in sorted(self._index.items(), key=lambda kv: kv[1].get("last_access", 0)):
+            if total <= self.max_bytes:
+                break
+            try:
+                self._body_path(key).unlink()
+            except OSError:
+                pass
+            total -= entry.get("size", 0)
+            del self._index[key]
+            self.stats["evictions"] += 1
+        self._dirty = True
+
+    def _from_entry(self, url: str, entry: Dict, content: bytes, revalidated: bool = False) -> CachedResponse:
+        return CachedResponse(
+            url,
+            entry.get("status", 200),
+            {"Content-Type": entry.get("content_type", "")},
+            content,
+            from_cache=True,
+            revalidated=revalidated,
+        )
+
+    @staticmethod
+    def _read_capped(resp: requests.Response, max_bytes: Optional[int]) -> bytes:
+        """Body of `resp`, reading at most max_bytes off the wire"""
+        if not max_bytes:
+            return resp.content
+        chunks, total = [], 0
+        for chunk in resp.iter_content(chunk_size=16 * 1024):
+            chunks.append(chunk)
+            total += len(chunk)
+            if total >= max_bytes:
+                break
+        resp.close()
+        return b"".join(chunks)[:max_bytes]
+
+    def get(self, url: str, headers: Dict[str, str] = None, timeout: float = 10,
+            ttl: int = None, max_bytes: int = None) -> CachedResponse:
+        """GET `url` through the cache. Raises like requests.get when nothing usable is cached.
+
+        With `max_bytes` the body is streamed and truncated at that size (enough
+        for the <head> and early body of an article page).
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        key = self._key(url)
+        now = time.time()
+
+        with self._lock:
+            entry = dict(self._index.get(key) or {})
+            if max_bytes and not entry:
+                # No full copy to cut from: use the truncated copy kept for this cap.
+                key = self._key(url, max_bytes)
+                entry = dict(self._index.get(key) or {})
+        cached_body = self._read_body(key) if entry else None
+        if cached_body is None:
+            entry = {}
+        elif max_bytes:
+            cached_body = cached_body[:max_bytes]
+
+        if entry and now - entry.get("fetched_at", 0) < ttl:
+            with self._lock:
+                self.stats["hits"] += 1
+                if key in self._index:
+                    self._index[key]["last_access"] = now
+                    self._dirty = True  # access times alone never force a write
+            return self._from_entry(url, entry, cached_body)
+
+        request_headers = dict(headers or {})
+        if entry.get("etag"):
+            request_headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            request_headers["If-Modified-Since"] = entry["last_modified"]
+
+        guard = get_host_guard()
+        try:
+            guard.acquire(url)
+            stream = {"stream": True} if max_bytes else {}
+            resp = requests.get(url, headers=request_headers, timeout=timeout, **stream)
+            guard.record(url, resp.status_code, retry_after=parse_retry_after(resp.headers.get("Retry-After")))
+        except Exception as e:
+            guard.record(url, error=e)
+            if entry:
+                with self._lock:
+                    self.stats["stale_served"] += 1
+                return self._from_entry(url, entry, cached_body)
+            with self._lock:
+                self.stats["misses"] += 1
+            raise
+
+        if resp.status_code == 304 and entry:
+            with self._lock:
+                self.stats["revalidated"] += 1
+                if key in self._index:
+                    self._index[key]["fetched_at"] = now
+                    self._index[key]["last_access"] = now
+                    self._changed()
+            return self._from_entry(url, entry, cached_body, revalidated=True)
+
+        with self._lock:
+            self.stats["misses"] += 1
+        content = self._read_capped(resp, max_bytes)
+        if resp.status_code == 200:
+            try:
+                truncated = bool(max_bytes) and len(content) >= max_bytes
+                self._store(self._key(url, max_bytes) if truncated else self._key(url), url, resp, content)
+            except Exception as e:
+                print(f"      - Could not cache {url[:60]}: {e}")
+        return CachedResponse(url, resp.status_code, dict(resp.headers), content)
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"{s['hits']} hits, {s['revalidated']} revalidated (304), {s['misses']} misses, "
+                f"{s['stale_served']} stale fallbacks, {s['evictions']} evictions")
+
+
+_shared_cache: Optional[HTTPCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_http_cache() -> HTTPCache:
+    """Process-wide cache shared by every scraper"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = HTTPCache()
+            atexit.register(_shared_cache.flush)
+        return _shared_cache
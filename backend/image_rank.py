@@ -0,0 +1,168 @@
+"""Deterministic cover-image choice: source tag, URL size hints and probed pixel size"""
+import re
+import struct
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+try:
+    import config as _cfg
+except Exception:
+    _cfg = None
+
+from host_guard import guarded_get
+
+IMAGE_PROBE_TOP = int(getattr(_cfg, "IMAGE_PROBE_TOP", 4))
+IMAGE_PROBE_BYTES = int(getattr(_cfg, "IMAGE_PROBE_BYTES", 64 * 1024))
+IMAGE_MIN_WIDTH = int(getattr(_cfg, "IMAGE_MIN_WIDTH", 200))
+IMAGE_FEATURE_MIN_WIDTH = int(getattr(_cfg, "IMAGE_FEATURE_MIN_WIDTH", 600))
+
+SOURCE_PRIORITY = {"og": 100, "twitter": 80, "itemprop": 60, "link": 30, "img": 20}
+
+_SIZE_HINTS = [
+    re.compile(r"(?<!\d)(\d{3,4})x(\d{3,4})(?!\d)"),  # 1200x630
+    re.compile(r"[?&](?:w|width)=(\d{2,4})(?:&(?:h|height)=(\d{2,4}))?", re.I),
+    re.compile(r"[/,]w_(\d{2,4})(?:,h_(\d{2,4}))?"),  # cloudinary
+    re.compile(r"width[-_](\d{3,4})"),  # wagtail: width-800.format-jpg
+    re.compile(r"-(\d{3,4})w\b"),
+]
+
+
+def url_dimension_hint(url: str) -> Tuple[Optional[int], Optional[int]]:
+    """(width, height) advertised by resize parameters in the URL, if any"""
+    for pattern in _SIZE_HINTS:
+        match = pattern.search(url)
+        if match:
+            width = int(match.group(1))
+            height = int(match.group(2)) if pattern.groups > 1 and match.group(2) else None
+            return width, height
+    return None, None
+
+
+def image_dimensions(head: bytes) -> Optional[Tuple[int, int]]:
+    """(width, height) from the first bytes of a PNG, JPEG or WebP file"""
+    try:
+        if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+            return struct.unpack(">II", head[16:24])
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            chunk = head[12:16]
+            if chunk == b"VP8 ":
+                w, h = struct.unpack("<HH", head[26:30])
+                return w & 0x3FFF, h & 0x3FFF
+            if chunk == b"VP8L":
+                b0, b1, b2, b3 = head[21:25]
+                return 1 + (((b1 & 0x3F) << 8) | b0), 1 + (((b3 & 0x0F) << 10) | (b2 << 2) | ((b1 & 0xC0) >> 6))
+            if chunk == b"VP8X":
+                return 1 + int.from_bytes(head[24:27], "little"), 1 + int.from_bytes(head[27:30], "little")
+            return None
+        if head.startswith(b"\xff\xd8"):
+            i = 2
+            while i + 9 < len(head):
+                if head[i] != 0xFF:
+                    return None
+                marker = head[i + 1]
+                if marker == 0xFF:  # fill byte
+                    i += 1
+                    continue
+                if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:
+                    i += 2
+                    continue
+                if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                    h, w = struct.unpack(">HH", head[i + 5:i + 9])
+                    return w, h
+                i += 2 + struct.unpack(">H", head[i + 2:i + 4])[0]
+    except (struct.error, ValueError, IndexError):
+        return None
+    return None
+
+
+def probe_dimensions(url: str, headers: Dict[str, str] = None, timeout: float = 5) -> Optional[Tuple[int, int]]:
+    """Read just enough of the image (a ranged GET) to learn its pixel size"""
+    request_headers = dict(headers or {})
+    request_headers["Range"] = f"bytes=0-{IMAGE_PROBE_BYTES - 1}"
+    try:
+        resp = guarded_get(url, headers=request_headers, timeout=timeout, stream=True)
+    except Exception:
+        return None
+    with resp:
+        if resp.status_code not in (200, 206):
+            return None
+        head = b""
+        for chunk in resp.iter_content(chunk_size=8192):
+            head += chunk
+            size = image_dimensions(head)
+            if size or len(head) >= IMAGE_PROBE_BYTES:
+                return size
+    return image_dimensions(head)
+
+
+def score_candidate(candidate: Dict) -> Optional[float]:
+    """Higher is better; None means the image is too small to use"""
+    score = float(SOURCE_PRIORITY.get(candidate.get("source"), 0))
+    width, height = candidate.get("width"), candidate.get("height")
+    if width:
+        if width < IMAGE_MIN_WIDTH:
+            return None
+        score += min(width, 1600) / 20
+    if width and height:
+        ratio = width / height
+        if ratio > 3 or ratio < 0.33:  # banners, strips, skyscraper ads
+            score -= 60
+    return score
+
+
+def rank_candidates(candidates: List[Dict], headers: Dict[str, str] = None,
+                    probe_top: int = None) -> List[Dict]:
+    """Score candidates best-first; the top few are probed for their real pixel size"""
+    probe_top = IMAGE_PROBE_TOP if probe_top is None else probe_top
+    ranked = []
+    for candidate in candidates:
+        candidate = dict(candidate)
+        if not candidate.get("width"):
+            candidate["width"], candidate["height"] = url_dimension_hint(candidate["url"])
+        ranked.append(candidate)
+    ranked.sort(key=lambda c: score_candidate(c) if score_candidate(c) is not None else -1, reverse=True)
+
+    to_probe = ranked[:probe_top]
+    if to_probe:
+        with ThreadPoolExecutor(max_workers=len(to_probe)) as executor:
+            sizes = list(executor.map(lambda c: probe_dimensions(c["url"], headers), to_probe))
+        for candidate, size in zip(to_probe, sizes):
+            if size:
+                candidate["width"], candidate["height"] = size
+                candidate["probed"] = True
+
+    scored = []
+    for candidate in ranked:
+        score = score_candidate(candidate)
+        if score is not None:
+            candidate["score"] = score
+            scored.append(candidate)
+    scored.sort(key=lambda c: c["score"], reverse=True)
+    return scored
+
+
+def layout_for(width: Optional[int], height: Optional[int]) -> str:
+    if not width or not height:
+        return "SQUARE"
+    ratio = width / height
+    if ratio >= 1.3:
+        return "WIDE"
+    if ratio <= 0.8:
+        return "TALL"
+    return "SQUARE"
+
+
+def choose_image(candidates: List[Dict], headers: Dict[str, str] = None) -> Dict:
+    """{'image_url', 'image_layout', 'worth_showing_image'} for the best candidate"""
+    ranked = rank_candidates(candidates, headers)
+    if not ranked:
+        return {"image_url": None, "image_layout": "SQUARE", "worth_showing_image": False}
+    best = ranked[0]
+    return {
+        "image_url": best["url"],
+        "image_layout": layout_for(best.get("width"), best.get("height")),
+        "worth_showing_image": bool(best.get("width") and best["width"] >= IMAGE_FEATURE_MIN_WIDTH),
+    }
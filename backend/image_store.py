@@ -0,0 +1,206 @@
+"""Content-addressed store for downloaded story images"""
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+try:
+    import config as _cfg
+except Exception:
+    _cfg = None
+
+from host_guard import guarded_get
+
+# Stored URLs are trusted this long before we ask the publisher again (with a conditional GET).
+IMAGE_REVALIDATE_DAYS = int(getattr(_cfg, "IMAGE_REVALIDATE_DAYS", 30))
+IMAGE_MAX_BYTES = int(getattr(_cfg, "IMAGE_MAX_BYTES", 8 * 1024 * 1024))
+
+
+def sniff_image_extension(head: bytes) -> Optional[str]:
+    """Extension for the raster formats we publish, judged by magic number rather than Content-Type"""
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return ".png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return ".jpg"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ".webp"
+    return None
+
+
+class ImageRejected(Exception):
+    """Body is not an image we accept, or exceeds the byte ceiling"""
+
+
+class ImageStore:
+    """Images saved as <sha256>.<ext> with a URL -> file index in index.json.
+
+    A URL already in the index is not downloaded again; once it is older
+    than IMAGE_REVALIDATE_DAYS it is revalidated with If-None-Match /
+    If-Modified-Since. Identical bytes served from different URLs share one
+    file, and a file is never rewritten. After close() downloads still in
+    flight finish without writing files or index entries.
+    """
+
+    def __init__(self, root: Path, revalidate_days: int = None):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.root / "index.json"
+        self.revalidate_seconds = (IMAGE_REVALIDATE_DAYS if revalidate_days is None else revalidate_days) * 86400
+        self._lock = threading.Lock()
+        self.closed = False
+        self.stats = {"stored": 0, "deduplicated": 0, "reused": 0, "revalidated": 0, "rejected": 0, "failed": 0,
+                      "late": 0}
+        try:
+            with open(self.index_path, "r") as f:
+                self.index: Dict[str, Dict] = json.load(f)
+        except Exception:
+            self.index = {}
+
+    def save(self):
+        with self._lock:
+            payload = json.dumps(self.index, indent=1, sort_keys=True)
+        tmp_path = self.index_path.with_suffix(".tmp")
+        tmp_path.write_text(payload)
+        os.replace(tmp_path, self.index_path)
+
+    def close(self):
+        """End the download stage: later writes are dropped, then the index is saved"""
+        with self._lock:
+            self.closed = True
+        self.save()
+
+    def lookup(self, url: str) -> Optional[Dict]:
+        """Index entry for `url` if its file is still on disk"""
+        with self._lock:
+            entry = self.index.get(url)
+        if entry and (self.root / entry["file"]).exists():
+            return entry
+        return None
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _remember(self, url: str, entry: Dict):
+        with self._lock:
+            if not self.closed:
+                self.index[url] = entry
+
+    def fetch(self, url: str, headers: Dict[str, str] = None, timeout: float = 10,
+              max_bytes: int = None) -> Optional[str]:
+        """Filename (relative to the store) holding `url`'s image, downloading only if needed.
+
+        Downloads are abandoned as soon as the first bytes are not a PNG/JPEG/WebP
+        or the body grows past `max_bytes` (IMAGE_MAX_BYTES by default).
+        """
+        max_bytes = IMAGE_MAX_BYTES if max_bytes is None else max_bytes
+        entry = self.lookup(url)
+        now = time.time()
+        if entry and now - entry.get("checked_at", 0) < self.revalidate_seconds:
+            self._count("reused")
+            return entry["file"]
+
+        if self.closed:
+            return entry["file"] if entry else None
+
+        request_headers = dict(headers or {})
+        if entry and entry.get("etag"):
+            request_headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            request_headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            resp = guarded_get(url, timeout=timeout, stream=True, headers=request_headers)
+        except Exception:
+            self._count("failed")
+            return entry["file"] if entry else None
+
+        with resp:
+            if resp.status_code == 304 and entry:
+                self._remember(url, dict(entry, checked_at=now))
+                self._count("revalidated")
+                return entry["file"]
+            try:
+                declared = int(resp.headers.get("Content-Length") or 0)
+            except (TypeError, ValueError):
+                declared = 0  # malformed header; the streamed byte count still enforces max_bytes
+            if resp.status_code != 200 or declared > max_bytes:
+                self._count("failed")
+                return entry["file"] if entry else None
+            try:
+                filename = self._write(resp, max_bytes)
+            except ImageRejected:
+                self._count("rejected")
+                return entry["file"] if entry else None
+
+        if not filename:
+            if not self.closed:  # late downloads were counted by _write
+                self._count("failed")
+            return entry["file"] if entry else None
+        content_type = resp.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        self._remember(url, {
+            "file": filename,
+            "sha256": filename.split(".")[0],
+            "content_type": content_type,
+            "etag": resp.headers.get("ETag", ""),
+            "last_modified": resp.headers.get("Last-Modified", ""),
+            "checked_at": now,
+        })
+        return filename
+
+    def _write(self, resp, max_bytes: int) -> Optional[str]:
+        """Stream the body to a temp file while hashing, then move it to <sha256><ext>"""
+        digest = hashlib.sha256()
+        ext = None
+        size = 0
+        fd, tmp_name = tempfile.mkstemp(dir=self.root, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in resp.iter_content(chunk_size=8192):
+                    if ext is None:
+                        # Decide on the first chunk; HTML error pages and SVGs stop here.
+                        ext = sniff_image_extension(chunk[:16])
+                        if ext is None:
+                            raise ImageRejected("not a PNG/JPEG/WebP")
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise ImageRejected(f"larger than {max_bytes} bytes")
+                    digest.update(chunk)
+                    f.write(chunk)
+            if ext is None:
+                raise ImageRejected("empty body")
+            filename = f"{digest.hexdigest()}{ext}"
+            target = self.root / filename
+            with self._lock:
+                # Decided under the lock so no file lands after close() has saved the index.
+                if self.closed:
+                    outcome = "late"
+                elif target.exists():
+                    outcome = "deduplicated"
+                else:
+                    os.replace(tmp_name, target)
+                    outcome = "stored"
+                self.stats[outcome] += 1
+            if outcome != "stored":
+                os.unlink(tmp_name)
+            return None if outcome == "late" else filename
+        except Exception as e:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            if isinstance(e, ImageRejected):
+                raise
+            return None
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"{s['stored']} new, {s['deduplicated']} duplicate bytes skipped, {s['reused']} reused, "
+                f"{s['revalidated']} revalidated (304), {s['rejected']} rejected, {s['failed']} failed"
+                + (f", {s['late']} finished after the deadline" if s['late'] else ""))
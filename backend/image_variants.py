@@ -0,0 +1,122 @@
+"""Resize/transcode stored story images into responsive WebP/AVIF variants plus an LQIP"""
+import base64
+import io
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+try:
+    import config as _cfg
+except Exception:
+    _cfg = None
+
+# Pillow is optional: without it images are served exactly as downloaded.
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+try:
+    from PIL import features as _pil_features
+    AVIF_AVAILABLE = PIL_AVAILABLE and bool(_pil_features.check("avif"))
+except Exception:
+    AVIF_AVAILABLE = False
+
+# Largest box an image may occupy per layout; articles sit in ~400px columns.
+LAYOUT_MAX_SIZE = getattr(_cfg, "IMAGE_LAYOUT_MAX_SIZE", {
+    "WIDE": (1200, 675),
+    "TALL": (600, 900),
+    "SQUARE": (800, 800),
+})
+RESPONSIVE_WIDTHS = tuple(getattr(_cfg, "IMAGE_RESPONSIVE_WIDTHS", (400, 800)))
+WEBP_QUALITY = int(getattr(_cfg, "IMAGE_WEBP_QUALITY", 78))
+AVIF_QUALITY = int(getattr(_cfg, "IMAGE_AVIF_QUALITY", 55))
+LQIP_WIDTH = 16
+
+
+def _flatten(img: "Image.Image") -> "Image.Image":
+    img = ImageOps.exif_transpose(img)
+    if img.mode in ("RGBA", "LA", "P"):
+        img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, (248, 243, 234))  # newsprint paper
+        background.paste(img, mask=img.getchannel("A"))
+        return background
+    return img.convert("RGB")
+
+
+def _target_widths(width: int, height: int, layout: str) -> List[int]:
+    max_w, max_h = LAYOUT_MAX_SIZE.get((layout or "SQUARE").upper(), LAYOUT_MAX_SIZE["SQUARE"])
+    # Largest width that fits the layout box without upscaling.
+    cap = int(min(width, max_w, max_h * width / height))
+    widths = sorted({w for w in RESPONSIVE_WIDTHS if w < cap} | {cap})
+    return [w for w in widths if w > 0]
+
+
+def _lqip(img: "Image.Image") -> str:
+    thumb = img.resize((LQIP_WIDTH, max(1, round(LQIP_WIDTH * img.height / img.width))))
+    buf = io.BytesIO()
+    thumb.save(buf, "WEBP", quality=30)
+    return "data:image/webp;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+def build_variants(images_dir: Path, filename: str, layout: str = "SQUARE") -> Optional[Dict]:
+    """Write (or reuse) the variants of a stored image.
+
+    Returns {'width', 'height', 'lqip', 'variants': [{'file', 'width', 'height', 'format'}]}
+    with variants ordered smallest first, or None when Pillow is missing or the
+    file cannot be decoded. Variant names derive from the source file's hash,
+    so an image is only transcoded once.
+    """
+    if not PIL_AVAILABLE or not filename:
+        return None
+    images_dir = Path(images_dir)
+    source = images_dir / filename
+    stem = source.stem
+    try:
+        with Image.open(source) as opened:
+            img = _flatten(opened)
+    except Exception:
+        return None
+
+    formats = [("webp", WEBP_QUALITY)] + ([("avif", AVIF_QUALITY)] if AVIF_AVAILABLE else [])
+    variants = []
+    for width in _target_widths(img.width, img.height, layout):
+        height = max(1, round(width * img.height / img.width))
+        resized = None
+        for fmt, quality in formats:
+            name = f"{stem}-{width}w.{fmt}"
+            path = images_dir / name
+            if not path.exists():
+                resized = resized or img.resize((width, height), Image.LANCZOS)
+                try:
+                    resized.save(path, fmt.upper(), quality=quality)
+                except Exception:
+                    continue
+            variants.append({"file": name, "width": width, "height": height, "format": fmt})
+
+    if not variants:
+        return None
+    largest = max(variants, key=lambda v: v["width"])
+    return {
+        "width": largest["width"],
+        "height": largest["height"],
+        "lqip": _lqip(img),
+        "variants": variants,
+    }
+
+
+def attach_variants(story: Dict, images_dir: Path) -> bool:
+    """Record variants on a story whose image is already in `images_dir`"""
+    path = story.get("generated_image_path")
+    if not path:
+        return False
+    info = build_variants(images_dir, Path(path).name, story.get("image_layout", "SQUARE"))
+    if not info:
+        return False
+    story["image_width"] = info["width"]
+    story["image_height"] = info["height"]
+    story["image_lqip"] = info["lqip"]
+    story["image_variants"] = info["variants"]
+    return True
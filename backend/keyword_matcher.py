@@ -0,0 +1,36 @@
+"""Precompiled keyword matching - one regex alternation instead of nested any() loops"""
+import re
+from typing import Iterable, List
+
+
+class KeywordMatcher:
+    """Case-insensitive matcher for a fixed keyword list, compiled once.
+
+    By default terms match as substrings, exactly like `term in text.lower()`.
+    With `word_boundary=True` a term only matches when not embedded in a
+    longer word ('ai' no longer hits 'said').
+    """
+
+    def __init__(self, keywords: Iterable[str], word_boundary: bool = False):
+        # Longest first so overlapping alternatives report the most specific term.
+        self.terms = sorted({k.lower() for k in keywords if k}, key=len, reverse=True)
+        self.word_boundary = word_boundary
+        body = "|".join(re.escape(t) for t in self.terms) or r"(?!x)x"
+        if word_boundary:
+            body = rf"(?<!\w)(?:{body})(?!\w)"
+        self._search = re.compile(body, re.IGNORECASE)
+        # Zero-width lookahead lets findall report matches that overlap.
+        self._findall = re.compile(rf"(?=({body}))", re.IGNORECASE)
+
+    def search(self, *texts: str) -> bool:
+        """True if any term occurs in any of the texts"""
+        return any(text and self._search.search(text) for text in texts)
+
+    def matches(self, *texts: str) -> List[str]:
+        """Distinct matched terms (lowercased), in order of first appearance"""
+        found = {}
+        for text in texts:
+            if text:
+                for term in self._findall.findall(text):
+                    found.setdefault(term.lower(), None)
+        return list(found)
@@ -0,0 +1,111 @@
+"""SQLite-backed cache of LLM responses keyed by prompt content, so reruns skip identical calls"""
+import hashlib
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from http_cache import CACHE_DIR
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+try:
+    import config as _cfg
+except Exception:
+    _cfg = None
+
+LLM_CACHE_TTL = int(getattr(_cfg, "LLM_CACHE_TTL", 7 * 86400))
+LLM_CACHE_MAX_ENTRIES = int(getattr(_cfg, "LLM_CACHE_MAX_ENTRIES", 5000))
+# Bump when prompt wording stays put but the meaning of a response changes (parsing, categories...)
+LLM_PROMPT_VERSION = str(getattr(_cfg, "LLM_PROMPT_VERSION", "1"))
+
+
+class LLMResponseCache:
+    """Responses stored by sha256(template version, model tier, prompt).
+
+    Entries expire after `ttl` seconds; beyond `max_entries` the least
+    recently used are evicted. Each row records the model and provider that
+    produced it, which call_llm hands back on a hit.
+    """
+
+    def __init__(self, path: Path = None, ttl: int = None, max_entries: int = None):
+        self.path = Path(path or CACHE_DIR / "llm_responses.sqlite3")
+        self.ttl = LLM_CACHE_TTL if ttl is None else ttl
+        self.max_entries = LLM_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0}
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, response TEXT, model TEXT, provider TEXT,"
+                " quality_score INTEGER, created_at REAL, last_access REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+
+    @staticmethod
+    def key(prompt: str, tier: str, version: str = None) -> str:
+        version = LLM_PROMPT_VERSION if version is None else version
+        return hashlib.sha256(f"{version}\0{tier}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT response, model, provider, quality_score, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row and now - row[4] >= self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self.stats["hits"] += 1
+        return {
+            "response": row[0],
+            "model": row[1],
+            "provider": row[2],
+            "cost": 0,
+            "quality_score": row[3],
+            "cached": True,
+        }
+
+    def put(self, key: str, result: Dict):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses"
+                " (key, response, model, provider, quality_score, created_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, result["response"], result.get("model"), result.get("provider"),
+                 result.get("quality_score"), now, now),
+            )
+            self.stats["stored"] += 1
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+            if count > self.max_entries:
+                cur = self._conn.execute(
+                    "DELETE FROM responses WHERE key IN"
+                    " (SELECT key FROM responses ORDER BY last_access LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+                self.stats["evicted"] += cur.rowcount
+
+    def summary(self) -> str:
+        s = self.stats
+        return f"{s['hits']} hits, {s['misses']} misses, {s['stored']} stored, {s['evicted']} evicted"
+
+
+_shared_cache: Optional[LLMResponseCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Process-wide response cache shared by every router instance"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = LLMResponseCache()
+        return _shared_cache
@@ -0,0 +1,182 @@
+"""Adaptive (AIMD) concurrency limits per LLM provider/model, honouring Retry-After"""
+import re
+import statistics
+import sys
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+try:
+    import config as _cfg
+except Exception:
+    _cfg = None
+
+LLM_CONCURRENCY_START = float(getattr(_cfg, "LLM_CONCURRENCY_START", 2))
+LLM_CONCURRENCY_MAX = float(getattr(_cfg, "LLM_CONCURRENCY_MAX", 8))
+LLM_BACKOFF_FACTOR = float(getattr(_cfg, "LLM_BACKOFF_FACTOR", 0.5))
+LLM_DEFAULT_RETRY_AFTER = float(getattr(_cfg, "LLM_DEFAULT_RETRY_AFTER", 5))
+LLM_MAX_QUEUE_WAIT = float(getattr(_cfg, "LLM_MAX_QUEUE_WAIT", 2))
+LLM_MAX_RETRY_AFTER = 300
+LATENCY_WINDOW = 50  # recent successful call durations kept per lane
+MIN_LATENCY_SAMPLES = 3
+
+
+def parse_retry_after(value) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)"""
+    if value is None or value == "":
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(str(value)).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def status_from_text(text: str) -> Optional[int]:
+    """HTTP status the scraped chatbot clients embed in their error strings.
+
+    Most say "... HTTP 429 ..."; ChatGPT's bootstrap ends a line with a bare
+    status instead ("Failed to get requirements: 403").
+    """
+    match = re.search(r"HTTP (\d{3})\b|:\s*(\d{3})\s*$", text or "", re.MULTILINE)
+    return int(match.group(1) or match.group(2)) if match else None
+
+
+class _Lane:
+    def __init__(self, start: float, ceiling: float):
+        self.limit = min(start, ceiling)
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.calls = 0
+        self.throttled = 0
+        self.peak = self.limit
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+
+class AdaptiveLimiter:
+    """One AIMD window per key ("huggingface/<model_id>", "free/gemini", ...).
+
+    A call takes a slot while `in_flight < limit`. Every success grows the
+    limit by 1/limit (about +1 per window of successes, up to `ceiling`); a
+    429, 5xx or transport error multiplies it by `backoff` (never below 1).
+    A 429 also closes the lane until its Retry-After has passed. Callers that
+    cannot get a slot within `max_wait` seconds are told to try another model.
+    """
+
+    def __init__(self, start: float = None, ceiling: float = None, backoff: float = None,
+                 default_retry_after: float = None, max_wait: float = None):
+        self.start = LLM_CONCURRENCY_START if start is None else start
+        self.ceiling = LLM_CONCURRENCY_MAX if ceiling is None else ceiling
+        self.backoff = LLM_BACKOFF_FACTOR if backoff is None else backoff
+        self.default_retry_after = LLM_DEFAULT_RETRY_AFTER if default_retry_after is None else default_retry_after
+        self.max_wait = LLM_MAX_QUEUE_WAIT if max_wait is None else max_wait
+        self._lanes: Dict[str, _Lane] = {}
+        self._cond = threading.Condition()
+
+    def _lane(self, key: str) -> _Lane:
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = self._lanes[key] = _Lane(self.start, self.ceiling)
+        return lane
+
+    def acquire(self, key: str, max_wait: float = None) -> bool:
+        """Take a slot on `key`; False if none frees up (or Retry-After outlasts) `max_wait` seconds"""
+        max_wait = self.max_wait if max_wait is None else max_wait
+        deadline = time.monotonic() + max_wait
+        with self._cond:
+            lane = self._lane(key)
+            while True:
+                now = time.monotonic()
+                if lane.blocked_until > deadline:
+                    return False
+                if now >= lane.blocked_until and lane.in_flight < int(lane.limit):
+                    lane.in_flight += 1
+                    lane.calls += 1
+                    return True
+                if now >= deadline:
+                    return False
+                wake = lane.blocked_until if now < lane.blocked_until else deadline
+                self._cond.wait(max(0.01, wake - now))
+
+    def release(self, key: str, status_code: Optional[int] = None, retry_after: float = None,
+                error: Exception = None, sent: bool = True):
+        """Return the slot taken by acquire() and adapt the lane to the call's outcome.
+
+        With sent=False (the request never left, e.g. its host's circuit was open)
+        the slot is returned without touching the limit.
+        """
+        if status_code is None and error is not None:
+            status_code = status_from_text(str(error))
+        with self._cond:
+            lane = self._lane(key)
+            lane.in_flight = max(0, lane.in_flight - 1)
+            if not sent:
+                pass
+            elif status_code == 429:
+                lane.throttled += 1
+                wait = retry_after if retry_after is not None else self.default_retry_after
+                lane.blocked_until = max(lane.blocked_until, time.monotonic() + min(wait, LLM_MAX_RETRY_AFTER))
+                lane.limit = max(1.0, lane.limit * self.backoff)
+            elif error is not None or (status_code is not None and status_code >= 500):
+                lane.limit = max(1.0, lane.limit * self.backoff)
+            elif status_code is None or status_code < 400:
+                lane.limit = min(self.ceiling, lane.limit + 1.0 / lane.limit)
+                lane.peak = max(lane.peak, lane.limit)
+            self._cond.notify_all()
+
+    def observe_latency(self, key: str, seconds: float):
+        """Record how long a successful call on `key` took"""
+        with self._cond:
+            self._lane(key).latencies.append(seconds)
+
+    def p50(self, key: str) -> Optional[float]:
+        """Median recent latency of `key`, or None until there are a few samples"""
+        with self._cond:
+            samples = list(self._lane(key).latencies)
+        return statistics.median(samples) if len(samples) >= MIN_LATENCY_SAMPLES else None
+
+    def limit(self, key: str) -> int:
+        with self._cond:
+            return int(self._lane(key).limit)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._cond:
+            return {
+                key: {
+                    "calls": lane.calls,
+                    "throttled": lane.throttled,
+                    "limit": round(lane.limit, 2),
+                    "peak_limit": round(lane.peak, 2),
+                    "p50_seconds": round(statistics.median(lane.latencies), 2) if lane.latencies else None,
+                }
+                for key, lane in sorted(self._lanes.items())
+            }
+
+    def summary(self) -> str:
+        lanes = self.snapshot()
+        if not lanes:
+            return "no LLM calls"
+        return ", ".join(
+            f"{key}: {s['calls']} calls, {s['throttled']}x 429, limit {s['limit']:g} (peak {s['peak_limit']:g})"
+            for key, s in lanes.items()
+        )
+
+
+_shared_limiter: Optional[AdaptiveLimiter] = None
+_shared_lock = threading.Lock()
+
+
+def get_llm_limiter() -> AdaptiveLimiter:
+    """Process-wide limiter shared by every router instance and worker thread"""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = AdaptiveLimiter()
+        return _shared_limiter
@@ -3,20 +3,42 @@ LLM Router - Intelligently route requests across multiple providers
 Supports: HuggingFace Inference, with fallbacks
 """
 import os
-import random
 import json
+import importlib
+import re
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import Optional, Dict, List
 from enum import Enum
 from dataclasses import dataclass
 import httpx
 from datetime import datetime
 
+from host_guard import CircuitOpenError, get_host_guard
+from llm_cache import get_llm_cache
+from llm_limiter import get_llm_limiter, parse_retry_after, status_from_text
+from model_scheduler import get_model_scheduler
+
 # Load .env
 from pathlib import Path
 from dotenv import load_dotenv
 _repo_root = Path(__file__).resolve().parent.parent
 load_dotenv(_repo_root / ".env")
 
+sys.path.insert(0, str(_repo_root))
+try:
+    import config as _cfg
+except Exception:
+    _cfg = None
+
+PROCESSING_MAX_WORKERS = int(getattr(_cfg, "PROCESSING_MAX_WORKERS", 8))
+LLM_HEDGE_MAX_INFLIGHT = int(getattr(_cfg, "LLM_HEDGE_MAX_INFLIGHT", 2))
+LLM_HEDGE_MULTIPLIER = float(getattr(_cfg, "LLM_HEDGE_MULTIPLIER", 1.0))
+LLM_HEDGE_DEFAULT_DELAY = float(getattr(_cfg, "LLM_HEDGE_DEFAULT_DELAY", 8))
+LLM_HEDGE_MIN_DELAY = float(getattr(_cfg, "LLM_HEDGE_MIN_DELAY", 1))
+
 
 @dataclass
 class LLMModel:
@@ -65,6 +87,51 @@ SIGNIFICANCE_SCORE: 50
 SELECTED_IMAGE_URL: NONE
 IMAGE_LAYOUT: SQUARE"""
 
+def is_auth_failure(text: str) -> bool:
+    """Whether a chatbot error/response says its session or tokens are no longer accepted"""
+    return status_from_text(text) in (401, 403)
+
+
+class ChatbotClientPool:
+    """Idle free-chatbot clients per provider, created on first use and reused.
+
+    Building a client costs a homepage visit (cookies, SID, Cloudflare), so
+    each worker thread checks one out, uses it exclusively and hands it back;
+    the pool only grows to the number of concurrent callers. A client whose
+    call fails with 401/403 is dropped instead of returned, so the next
+    checkout builds a fresh session.
+    """
+
+    def __init__(self, factories: Dict[str, tuple]):
+        self.factories = factories  # provider -> (module, class name)
+        self._idle: Dict[str, List] = {provider: [] for provider in factories}
+        self._lock = threading.Lock()
+        self.stats = {"created": 0, "reused": 0, "refreshed": 0}
+
+    def checkout(self, provider: str):
+        with self._lock:
+            idle = self._idle.setdefault(provider, [])
+            if idle:
+                self.stats["reused"] += 1
+                return idle.pop()
+        module, name = self.factories[provider]
+        client = getattr(importlib.import_module(module), name)()
+        with self._lock:
+            self.stats["created"] += 1
+        return client
+
+    def checkin(self, provider: str, client, healthy: bool = True):
+        with self._lock:
+            if healthy:
+                self._idle.setdefault(provider, []).append(client)
+            else:
+                self.stats["refreshed"] += 1
+
+    def summary(self) -> str:
+        s = self.stats
+        return f"{s['created']} chatbot sessions created, {s['reused']} reused, {s['refreshed']} refreshed after auth failures"
+
+
 class LLMRouter:
     """Route LLM requests across multiple models with fallback"""
     
@@ -116,13 +183,17 @@ class LLMRouter:
         ),
     ]
     
-    # Weight distribution
-    WEIGHTS = [
-        0.40,  # Qwen3-235B
-        0.30,  # GPT-OSS-120B
-        0.20,  # DeepSeek HF
-        0.10,  # OpenRouter Free
-    ]
+    # Hosts behind the free chatbot clients, for the shared rate limiter / circuit breaker
+    FREE_CHATBOT_HOSTS = {
+        "gemini": "gemini.google.com",
+        "mistral": "chat.mistral.ai",
+        "chatgpt": "chatgpt.com",
+    }
+    FREE_CHATBOT_CLIENTS = {
+        "gemini": ("clients.gemini", "Gemini"),
+        "mistral": ("clients.mistral", "Mistral"),
+        "chatgpt": ("clients.chatgpt", "ChatGPT"),
+    }
     
     def __init__(self):
         """Initialize router with API keys"""
@@ -130,7 +201,6 @@ class LLMRouter:
         self.openrouter_key = os.getenv("OPENROUTER_API_KEY", "").strip()
         
         # Add clients directory to path for imports
-        import sys
         clients_path = str(Path(__file__).parent / "clients")
         if clients_path not in sys.path:
             sys.path.append(clients_path)
@@ -142,6 +212,17 @@ class LLMRouter:
             print("⚠ OPENROUTER_API_KEY not found in .env. OpenRouter models will be skipped.")
         
         self.usage_log: List[Dict] = []
+        self.limiter = get_llm_limiter()
+        self.chatbots = ChatbotClientPool(self.FREE_CHATBOT_CLIENTS)
+        self.cache = get_llm_cache()
+        # Attempts run here so a slow provider can be hedged; sized for every processing worker hedging at once.
+        self._hedge_pool = ThreadPoolExecutor(max_workers=max(1, PROCESSING_MAX_WORKERS * LLM_HEDGE_MAX_INFLIGHT),
+                                              thread_name_prefix="llm-attempt")
+        self._stats_lock = threading.Lock()
+        self.hedge_stats = {"calls": 0, "hedged": 0, "won_by_hedge": 0}
+        self.scheduler = get_model_scheduler()
+        # How the current thread's attempt ended, for the scheduler (set by the provider calls)
+        self._outcome = threading.local()
         print("✓ LLM Router initialized with Free Chatbots + HF + OpenRouter Fallback")
     
     def _extract_json(self, text: str) -> Optional[Dict]:
@@ -192,45 +273,84 @@ class LLMRouter:
 
             return None
 
-    def _call_free_chatbot(self, prompt: str) -> Optional[str]:
-        """Try the reverse-engineered free chatbots from the ported code"""
-        providers = ["gemini", "mistral", "chatgpt"]
-        random.shuffle(providers)
-        
-        for provider in providers:
+    def _extract_json_array(self, text: str) -> Optional[List]:
+        """Extract a JSON array (e.g. batch results) from a model response"""
+        if not text: return None
+        try:
+            data = json.loads(text.strip())
+        except json.JSONDecodeError:
+            import re
+            match = re.search(r'\[.*\]', text, re.DOTALL)
+            if not match:
+                return None
             try:
-                print(f"    → Trying Free {provider.capitalize()}...", end=" ")
-                if provider == "gemini":
-                    from clients.gemini import Gemini
-                    client = Gemini()
-                    response = client.chat(prompt)
-                elif provider == "mistral":
-                    from clients.mistral import Mistral
-                    client = Mistral()
-                    response = client.chat(prompt)
-                elif provider == "chatgpt":
-                    from clients.chatgpt import ChatGPT
-                    client = ChatGPT()
-                    response = client.chat(prompt)
-                else: continue
-                
-                if response and not response.startswith("Error:") and response != "No response":
-                    # For JSON prompts, we want to keep the raw response for _extract_json to handle
-                    print("✓")
-                    return response
-                print("✗")
+                data = json.loads(match.group(0))
+            except json.JSONDecodeError:
+                return None
+        if isinstance(data, dict):
+            # {"results": [...]} style wrappers
+            data = next((v for v in data.values() if isinstance(v, list)), None)
+        return data if isinstance(data, list) else None
+
+    def _call_free_chatbot_provider(self, provider: str, prompt: str) -> Optional[str]:
+        """One free chatbot, behind the host guard and its limiter lane"""
+        guard = get_host_guard()
+        host = self.FREE_CHATBOT_HOSTS[provider]
+        lane = f"free/{provider}"
+        if guard.is_open(host) or not self.limiter.acquire(lane):
+            self._outcome.skipped = True
+            return None
+        error = None
+        sent = True
+        try:
+            guard.acquire(host)
+            print(f"    → Trying Free {provider.capitalize()}...", end=" ")
+            client = self.chatbots.checkout(provider)
+            try:
+                response = client.chat(prompt)
             except Exception as e:
-                print(f"✗ ({str(e)[:50]})")
+                self.chatbots.checkin(provider, client, healthy=not is_auth_failure(str(e)))
+                raise
+            self.chatbots.checkin(provider, client, healthy=not is_auth_failure(str(response)))
+
+            if response and not response.startswith("Error:") and response != "No response":
+                # For JSON prompts, we want to keep the raw response for _extract_json to handle
+                guard.record(host)
+                print("✓")
+                return response
+            error = RuntimeError(str(response)[:80])
+            print("✗")
+        except CircuitOpenError:
+            sent = False
+            self._outcome.skipped = True
+        except Exception as e:
+            error = e
+            print(f"✗ ({str(e)[:50]})")
+        finally:
+            # A 429 only throttles this lane (the limiter honours it); it says nothing about the host's health.
+            if error is not None and status_from_text(str(error)) != 429:
+                guard.record(host, error=error)
+            self.limiter.release(lane, error=error, sent=sent)
+        self._outcome.status = status_from_text(str(error)) if error else None
         return None
 
+    @staticmethod
+    def model_lane(model: LLMModel) -> str:
+        return f"{model.provider}/{model.model_id}"
+
+    def rank_models(self, models: List[LLMModel], prefer_cheap: bool = True) -> List[LLMModel]:
+        """Models best-first by a Thompson draw over their success, latency, quality and cost"""
+        ranked = self.scheduler.rank([
+            {"key": self.model_lane(m), "quality": m.quality_score, "cost": m.input_cost + m.output_cost, "model": m}
+            for m in models
+        ], prefer_cheap=prefer_cheap)
+        return [c["model"] for c in ranked]
+
     def pick_model(self, prefer_cheap: bool = True) -> LLMModel:
         """
-        Pick a random model from available pool.
+        Pick the model the scheduler currently rates best (with exploration).
         """
-        if prefer_cheap:
-            return random.choices(self.MODELS, weights=self.WEIGHTS)[0]
-        else:
-            return random.choice(self.MODELS)
+        return self.rank_models(self.MODELS, prefer_cheap)[0]
 
     def _call_inference_endpoint(self, model: LLMModel, prompt: str) -> Optional[str]:
         """
@@ -252,82 +372,100 @@ class LLMRouter:
                     "Content-Type": "application/json"
                 }
 
-            with httpx.Client() as client:
-                response = client.post(
-                    url,
-                    headers=headers,
-                    json={
-                        "model": model.model_id,
-                        "messages": [{"role": "user", "content": prompt}],
-                        "temperature": 0.7,
-                        "max_tokens": 800,
-                    },
-                    timeout=model.timeout
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    if data.get("choices") and len(data["choices"]) > 0:
-                        return data["choices"][0]["message"]["content"].strip()
-                elif response.status_code == 429:
-                    print(f"    ⚠ Rate limited on {model.name}")
-                    return None
-                
-                print(f"    ⚠ {model.provider.upper()} returned {response.status_code}")
+            lane = f"{model.provider}/{model.model_id}"
+            guard = get_host_guard()
+            if guard.is_open(url):
+                print(f"    ⚠ {model.provider.upper()} circuit is open, skipping {model.name}")
+                self._outcome.skipped = True
+                return None
+            if not self.limiter.acquire(lane):
+                print(f"    ⚠ {model.name} is saturated or cooling down, skipping")
+                self._outcome.skipped = True
                 return None
+            try:
+                guard.acquire(url)
+                with httpx.Client() as client:
+                    response = client.post(
+                        url,
+                        headers=headers,
+                        json={
+                            "model": model.model_id,
+                            "messages": [{"role": "user", "content": prompt}],
+                            "temperature": 0.7,
+                            "max_tokens": 800,
+                        },
+                        timeout=model.timeout
+                    )
+            except CircuitOpenError:
+                # Tripped by another thread since the check above; nothing was sent.
+                self._outcome.skipped = True
+                self.limiter.release(lane, sent=False)
+                return None
+            except Exception as e:
+                guard.record(url, error=e)
+                self.limiter.release(lane, error=e)
+                raise
+            if response.status_code != 429:  # per-model throttling is the limiter's business, not the host's
+                guard.record(url, response.status_code)
+            self._outcome.status = response.status_code
+            self.limiter.release(
+                lane,
+                response.status_code,
+                retry_after=parse_retry_after(response.headers.get("Retry-After")),
+            )
+
+            if response.status_code == 200:
+                data = response.json()
+                if data.get("choices") and len(data["choices"]) > 0:
+                    return data["choices"][0]["message"]["content"].strip()
+            elif response.status_code == 429:
+                print(f"    ⚠ Rate limited on {model.name} (concurrency now {self.limiter.limit(lane)})")
+                return None
+
+            print(f"    ⚠ {model.provider.upper()} returned {response.status_code}")
+            return None
         except Exception as e:
             print(f"    ⚠ {model.provider.upper()} call failed: {e}")
             return None
 
-    def call_llm(self, prompt: str, prefer_cheap: bool = True, fallback_chain: bool = True) -> Dict:
+    def call_llm(self, prompt: str, prefer_cheap: bool = True, fallback_chain: bool = True,
+                 use_cache: bool = True, require_json: Optional[bool] = None) -> Dict:
         """
-        Call an LLM with smart fallback.
-        1. Try Free Chatbots (Gemini, Mistral, etc.)
-        2. Try HuggingFace Inference
-        3. Try OpenRouter (Final Fallback)
+        Call an LLM with smart fallback, answering repeated prompts from the response cache.
+        Pass use_cache=False to force a fresh call (its answer still refreshes the cache).
+        With require_json (the default for prompts that mention JSON) a reply without a
+        JSON object/array counts as a failure and the next provider is asked.
         """
         if not prompt or len(prompt.strip()) == 0:
             return {"response": None, "error": "Empty prompt"}
-        
-        # 1. Try Free Chatbots First (Tier 0)
-        response = self._call_free_chatbot(prompt)
-        if response:
-            return {
-                "response": response,
-                "model": "Free-Chatbot",
-                "provider": "reverse-engineered",
-                "cost": 0,
-                "quality_score": 4,
-            }
 
-        # 2. Try HuggingFace / OpenRouter (Normal Pool)
-        selected_model = self.pick_model(prefer_cheap=prefer_cheap)
-        models_to_try = [selected_model]
-        
-        if fallback_chain:
-            other_models = [m for m in self.MODELS if m != selected_model]
-            models_to_try.extend(random.sample(other_models, min(len(other_models), 3)))
-        
-        for model in models_to_try:
-            if model.provider == "huggingface" and not self.hf_token: continue
-            if model.provider == "openrouter" and not self.openrouter_key: continue
+        key = self.cache.key(prompt, tier="cheap" if prefer_cheap else "quality")
+        if use_cache:
+            cached = self.cache.get(key)
+            if cached:
+                print(f"  → Cached response ({cached['model']})")
+                return cached
+
+        if require_json is None:
+            require_json = "JSON" in prompt
+        result = self._call_uncached(prompt, prefer_cheap, fallback_chain, require_json)
+        # The local keyword fallback is a stand-in, not an answer worth replaying next run.
+        if result.get("response") and result.get("provider") != "local":
+            self.cache.put(key, result)
+        return result
+
+    def _call_uncached(self, prompt: str, prefer_cheap: bool, fallback_chain: bool,
+                       require_json: bool = False) -> Dict:
+        """
+        1. Try Free Chatbots (Gemini, Mistral, etc.)
+        2. Try HuggingFace Inference
+        3. Try OpenRouter (Final Fallback)
+        """
+        # 1. Free Chatbots (Tier 0), then 2. the HuggingFace / OpenRouter pool, hedged
+        result = self._call_hedged(self._attempts(prefer_cheap, fallback_chain), prompt, require_json)
+        if result:
+            return result
 
-            print(f"  → Trying {model.name}...", end=" ")
-            
-            # Call LLM
-            response = self._call_inference_endpoint(model, prompt)
-            
-            if response:
-                print("✓")
-                return {
-                    "response": response,
-                    "model": model.name,
-                    "provider": model.provider,
-                    "cost": 0, # Estimates removed for brevity
-                    "quality_score": model.quality_score,
-                }
-            print("✗")
-        
         # 3. Final Emergency Fallback: Meta-AI
         print("  → Trying Meta-AI (Emergency Fallback)...", end=" ")
         try:
@@ -362,6 +500,123 @@ class LLMRouter:
 
         return {"response": None, "error": "All providers failed"}
     
+    def _attempts(self, prefer_cheap: bool, fallback_chain: bool) -> List[tuple]:
+        """(lane, result metadata, callable(prompt)) for every provider worth asking, in order"""
+        providers = [c["key"].split("/", 1)[1] for c in self.scheduler.rank(
+            [{"key": f"free/{provider}", "quality": 4} for provider in self.FREE_CHATBOT_HOSTS]
+        )]
+        attempts = [
+            (f"free/{provider}",
+             {"model": "Free-Chatbot", "provider": "reverse-engineered", "quality_score": 4},
+             lambda prompt, provider=provider: self._call_free_chatbot_provider(provider, prompt))
+            for provider in providers
+        ]
+
+        models_to_try = self.rank_models(self.MODELS, prefer_cheap)
+        if not fallback_chain:
+            models_to_try = models_to_try[:1]
+        for model in models_to_try:
+            if model.provider == "huggingface" and not self.hf_token: continue
+            if model.provider == "openrouter" and not self.openrouter_key: continue
+            attempts.append((
+                self.model_lane(model),
+                {"model": model.name, "provider": model.provider, "quality_score": model.quality_score},
+                lambda prompt, model=model: self._call_inference_endpoint(model, prompt),
+            ))
+        return attempts
+
+    @staticmethod
+    def _has_json(text: str) -> bool:
+        """Whether a reply contains a parseable JSON object or array (no debug logging)"""
+        for pattern in (r'\{.*\}', r'\[.*\]'):
+            match = re.search(pattern, text, re.DOTALL)
+            if match:
+                try:
+                    json.loads(match.group(0))
+                    return True
+                except json.JSONDecodeError:
+                    pass
+        return False
+
+    def _run_attempt(self, lane: str, call, prompt: str, require_json: bool) -> Optional[str]:
+        self._outcome.status = None
+        self._outcome.skipped = False
+        started = time.monotonic()
+        try:
+            response = call(prompt)
+        except Exception as e:
+            print(f"    ⚠ {lane} failed: {str(e)[:60]}")
+            response = None
+        elapsed = time.monotonic() - started
+        if not response:
+            if not self._outcome.skipped:  # saturated lanes and open circuits were never asked
+                self.scheduler.record(lane, False, elapsed, status_code=self._outcome.status)
+            return None
+        if require_json and not self._has_json(response):
+            self.scheduler.record(lane, False, elapsed, json_failed=True)
+            return None
+        self.scheduler.record(lane, True, elapsed)
+        self.limiter.observe_latency(lane, elapsed)
+        return response
+
+    def _hedge_delay(self, lane: str) -> float:
+        p50 = self.limiter.p50(lane)
+        delay = LLM_HEDGE_DEFAULT_DELAY if p50 is None else p50 * LLM_HEDGE_MULTIPLIER
+        return max(LLM_HEDGE_MIN_DELAY, delay)
+
+    def _call_hedged(self, attempts: List[tuple], prompt: str, require_json: bool) -> Optional[Dict]:
+        """Ask providers in order, hedging slow ones; first valid reply wins.
+
+        The next provider is started when the newest in-flight attempt has run
+        longer than its lane's p50 latency (LLM_HEDGE_DEFAULT_DELAY until there
+        is history), or at once when an attempt fails. At most
+        LLM_HEDGE_MAX_INFLIGHT attempts run together (1 = plain serial
+        failover). Losers that have not started are cancelled; running ones
+        finish in the background and their replies are dropped.
+        """
+        queue = list(attempts)
+        pending: Dict = {}
+        with self._stats_lock:
+            self.hedge_stats["calls"] += 1
+
+        def launch():
+            lane, meta, call = queue.pop(0)
+            future = self._hedge_pool.submit(self._run_attempt, lane, call, prompt, require_json)
+            pending[future] = (lane, meta, len(pending) > 0)
+            return lane
+
+        newest = launch() if queue else None
+        while pending:
+            can_hedge = bool(queue) and len(pending) < LLM_HEDGE_MAX_INFLIGHT
+            done, _ = wait(list(pending), timeout=self._hedge_delay(newest) if can_hedge else None,
+                           return_when=FIRST_COMPLETED)
+            if not done:
+                with self._stats_lock:
+                    self.hedge_stats["hedged"] += 1
+                newest = launch()
+                continue
+            for future in done:
+                lane, meta, was_hedge = pending.pop(future)
+                response = future.result()
+                if response:
+                    for other in pending:
+                        other.cancel()
+                    if was_hedge:
+                        with self._stats_lock:
+                            self.hedge_stats["won_by_hedge"] += 1
+                    return dict(meta, response=response, cost=0)
+            if queue and len(pending) < LLM_HEDGE_MAX_INFLIGHT:
+                newest = launch()
+        return None
+
+    def close(self):
+        """Stop the attempt threads; queued attempts are dropped and losers still running are abandoned"""
+        self._hedge_pool.shutdown(wait=False, cancel_futures=True)
+
+    def hedge_summary(self) -> str:
+        s = self.hedge_stats
+        return f"{s['calls']} calls, {s['hedged']} hedged, {s['won_by_hedge']} won by the hedge"
+
     def get_usage_stats(self) -> Dict:
         """Get usage statistics"""
         if not self.usage_log:
@@ -0,0 +1,225 @@
+"""Naive Bayes story categorizer trained on archived editions, used to skip obvious LLM calls"""
+import glob
+import json
+import math
+import os
+import re
+import sys
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from http_cache import CACHE_DIR
+from keyword_matcher import KeywordMatcher
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+try:
+    import config as _cfg
+except Exception:
+    _cfg = None
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+ARCHIVE_GLOB = str(REPO_ROOT / "docs" / "archive" / "**" / "newspaper.json")
+# Stories the LLM judged irrelevant; archives only hold published ones, so this is the category-0 class.
+NEGATIVES_PATH = CACHE_DIR / "irrelevant_stories.json"
+NEGATIVES_MAX = 2000
+
+# Predictions are only trusted above the lowest threshold whose cross-validated precision reaches this.
+PRECLASSIFIER_MIN_PRECISION = float(getattr(_cfg, "PRECLASSIFIER_MIN_PRECISION", 0.9))
+PRECLASSIFIER_MIN_EXAMPLES = int(getattr(_cfg, "PRECLASSIFIER_MIN_EXAMPLES", 100))
+PRECLASSIFIER_MIN_CLASS_EXAMPLES = int(getattr(_cfg, "PRECLASSIFIER_MIN_CLASS_EXAMPLES", 8))
+# Release stories still go to the LLM, which also names the model (detected_model).
+PRECLASSIFIER_SKIP_CATEGORIES = set(getattr(_cfg, "PRECLASSIFIER_SKIP_CATEGORIES", {7}))
+
+THRESHOLD_GRID = (0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.98, 0.99)
+CV_FOLDS = 5
+MIN_CONFIDENT_PREDICTIONS = 10  # a threshold that only a handful of held-out stories clear proves nothing
+TITLE_WEIGHT = 2
+# A story must still look like AI news before the LLM's relevance check is skipped.
+RELEVANCE_MATCHER = KeywordMatcher(getattr(_cfg, "AI_KEYWORDS", ['ai', 'llm', 'machine learning']), word_boundary=True)
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9.+-]*[a-z0-9]|[a-z0-9]")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how in into is it its of on or our that the their this to "
+    "was we what when where which who why will with you your new".split()
+)
+
+
+def tokenize(title: str, summary: str = "") -> List[str]:
+    """Unigrams and bigrams; title terms count TITLE_WEIGHT times"""
+    def grams(text: str) -> List[str]:
+        words = [w for w in _WORD.findall((text or "").lower()) if w not in _STOPWORDS]
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    return grams(title) * TITLE_WEIGHT + grams(summary)
+
+
+def load_archive_examples(pattern: str = ARCHIVE_GLOB) -> List[Tuple[str, str, int]]:
+    """(title, summary, category_id) for every distinct story in the archived editions"""
+    examples: Dict[str, Tuple[str, str, int]] = {}
+    for path in sorted(glob.glob(pattern, recursive=True)):
+        try:
+            with open(path, "r") as f:
+                edition = json.load(f)
+        except Exception:
+            continue
+        for page in (edition.get("pages") or {}).values():
+            stories = page.get("stories") if isinstance(page, dict) else page
+            for story in stories if isinstance(stories, list) else []:
+                try:
+                    category_id = int(story.get("category_id") or 0)
+                except (TypeError, ValueError):
+                    continue
+                title = story.get("original_title") or ""
+                if category_id <= 0 or not title:
+                    continue
+                # Later editions win, so a re-categorized story keeps its newest label.
+                examples[story.get("url") or title] = (title, story.get("summary") or "", category_id)
+    return list(examples.values())
+
+
+def load_negative_examples(path: Path = None) -> List[Tuple[str, str, int]]:
+    """(title, summary, 0) for stories earlier runs' LLM calls filtered out as irrelevant"""
+    try:
+        with open(path or NEGATIVES_PATH, "r") as f:
+            return [(s["title"], s.get("summary") or "", 0) for s in json.load(f) if s.get("title")]
+    except Exception:
+        return []
+
+
+def record_negative_examples(stories: Iterable[Dict], path: Path = None) -> int:
+    """Remember stories the LLM filtered out, newest last, keeping at most NEGATIVES_MAX"""
+    path = Path(path or NEGATIVES_PATH)
+    try:
+        with open(path, "r") as f:
+            kept = {s.get("url") or s["title"]: s for s in json.load(f)}
+    except Exception:
+        kept = {}
+    added = 0
+    for story in stories:
+        title = story.get("title") or ""
+        if not title:
+            continue
+        key = story.get("url") or title
+        added += key not in kept
+        kept.pop(key, None)
+        kept[key] = {"title": title, "summary": (story.get("summary") or "")[:300], "url": story.get("url") or ""}
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(list(kept.values())[-NEGATIVES_MAX:], indent=1))
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"      - Could not persist irrelevant stories: {e}")
+    return added
+
+
+class NaiveBayesCategorizer:
+    """Multinomial Naive Bayes over title/summary n-grams with Laplace smoothing"""
+
+    def __init__(self, alpha: float = 0.5):
+        self.alpha = alpha
+        self.priors: Dict[int, float] = {}
+        self.counts: Dict[int, Counter] = {}
+        self.totals: Dict[int, int] = {}
+        self.vocab: set = set()
+        self.threshold: Optional[float] = None
+
+    def fit(self, examples: Iterable[Tuple[str, str, int]]) -> "NaiveBayesCategorizer":
+        docs = defaultdict(list)
+        for title, summary, category_id in examples:
+            docs[category_id].append(tokenize(title, summary))
+        total = sum(len(d) for d in docs.values())
+        self.counts = {c: Counter(t for doc in d for t in doc) for c, d in docs.items()}
+        self.totals = {c: sum(counts.values()) for c, counts in self.counts.items()}
+        self.priors = {c: math.log(len(d) / total) for c, d in docs.items()}
+        self.vocab = {t for counts in self.counts.values() for t in counts}
+        return self
+
+    def predict(self, title: str, summary: str = "") -> Tuple[Optional[int], float]:
+        """(category_id, posterior probability) of the most likely category"""
+        tokens = [t for t in tokenize(title, summary) if t in self.vocab]
+        if not tokens or not self.counts:
+            return None, 0.0
+        vocab_size = len(self.vocab)
+        scores = {}
+        for category_id, counts in self.counts.items():
+            denominator = math.log(self.totals[category_id] + self.alpha * vocab_size)
+            scores[category_id] = self.priors[category_id] + sum(
+                math.log(counts[t] + self.alpha) - denominator for t in tokens
+            )
+        best = max(scores, key=scores.get)
+        norm = sum(math.exp(s - scores[best]) for s in scores.values())
+        return best, 1.0 / norm
+
+    def calibrate(self, examples: List[Tuple[str, str, int]], min_precision: float = None,
+                  allowed: Iterable[int] = None) -> Optional[float]:
+        """Lowest threshold whose cross-validated precision reaches `min_precision` (None if none does).
+
+        Only predictions of `allowed` categories count, since those are the only ones acted on.
+        """
+        min_precision = PRECLASSIFIER_MIN_PRECISION if min_precision is None else min_precision
+        predictions = []
+        for fold in range(CV_FOLDS):
+            train = [e for i, e in enumerate(examples) if i % CV_FOLDS != fold]
+            model = NaiveBayesCategorizer(self.alpha).fit(train)
+            for title, summary, category_id in examples[fold::CV_FOLDS]:
+                predicted, probability = model.predict(title, summary)
+                if allowed is None or predicted in allowed:
+                    predictions.append((probability, predicted == category_id))
+        self.threshold = None
+        for threshold in THRESHOLD_GRID:
+            confident = [correct for probability, correct in predictions if probability >= threshold]
+            if len(confident) >= MIN_CONFIDENT_PREDICTIONS and sum(confident) / len(confident) >= min_precision:
+                self.threshold = threshold
+                break
+        return self.threshold
+
+
+class LocalPreClassifier:
+    """Categorizes a story without the LLM when the archive-trained model is sure enough.
+
+    The model is trained once per run from docs/archive plus the stories
+    earlier runs' LLM calls rejected (category 0), so an off-topic story can
+    win the Irrelevant class instead of being forced into a page, and the
+    cross-validated precision counts those misfiles. It stays disabled when
+    the archive is too small, or when no confidence threshold reaches
+    PRECLASSIFIER_MIN_PRECISION under cross-validation. It only answers for
+    categories with enough labelled examples that are not in
+    PRECLASSIFIER_SKIP_CATEGORIES, and only for stories that mention an
+    AI_KEYWORDS term; deciding relevance is left to the LLM.
+    """
+
+    def __init__(self, examples: List[Tuple[str, str, int]] = None, valid_categories: Iterable[int] = None):
+        examples = load_archive_examples() + load_negative_examples() if examples is None else examples
+        class_sizes = Counter(category_id for _, _, category_id in examples)
+        self.allowed = {
+            c for c, n in class_sizes.items()
+            if c > 0 and n >= PRECLASSIFIER_MIN_CLASS_EXAMPLES and c not in PRECLASSIFIER_SKIP_CATEGORIES
+            and (valid_categories is None or c in valid_categories)
+        }
+        self.model = NaiveBayesCategorizer()
+        self.stats = {"examples": len(examples), "negatives": class_sizes.get(0, 0), "answered": 0, "deferred": 0}
+        if len(examples) - class_sizes.get(0, 0) >= PRECLASSIFIER_MIN_EXAMPLES and self.allowed:
+            self.model.fit(examples)
+            self.model.calibrate(examples, allowed=self.allowed)
+
+    @property
+    def enabled(self) -> bool:
+        return self.model.threshold is not None
+
+    def classify(self, title: str, summary: str = "") -> Optional[Tuple[int, float]]:
+        """(category_id, confidence) when confident, else None (ask the LLM)"""
+        if self.enabled and RELEVANCE_MATCHER.search(title, summary):
+            category_id, confidence = self.model.predict(title, summary)
+            if category_id in self.allowed and confidence >= self.model.threshold:
+                self.stats["answered"] += 1
+                return category_id, confidence
+        self.stats["deferred"] += 1
+        return None
+
+    def summary(self) -> str:
+        if not self.enabled:
+            return f"disabled ({self.stats['examples']} archived examples, no threshold met the precision target)"
+        s = self.stats
+        return (f"{s['answered']} answered locally, {s['deferred']} sent to the LLM "
+                f"(threshold {self.model.threshold:g}, {s['examples']} examples incl. {s['negatives']} irrelevant)")
@@ -3,6 +3,7 @@ import json
 import re
 import shutil
 import sys
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timezone
 from email.utils import parsedate_to_datetime
 from pathlib import Path
@@ -20,10 +21,23 @@ try:
 except ImportError:
     pass
 
+from dedup import dedupe_stories
 from exporter import NewsExporter
+from host_guard import get_host_guard
+from image_store import ImageStore
+from image_variants import AVIF_AVAILABLE, PIL_AVAILABLE, attach_variants
+from keyword_matcher import KeywordMatcher
 from processor_with_router import NewsProcessorWithRouter as NewsProcessor
 from scraper import NewsAggregator
 
+try:
+    import config as _cfg
+except Exception:
+    _cfg = None
+
+IMAGE_DOWNLOAD_WORKERS = int(getattr(_cfg, "IMAGE_DOWNLOAD_WORKERS", 8))
+IMAGE_STAGE_DEADLINE = float(getattr(_cfg, "IMAGE_STAGE_DEADLINE", 60))
+
 MODEL_PROVIDER_HINTS = {
     "openai": "OpenAI",
     "anthropic": "Anthropic",
@@ -113,6 +127,45 @@ NON_RELEASE_HINTS = (
     "show hn",
 )
 
+RELEASE_TERMS = (
+    "release",
+    "released",
+    "launch",
+    "launched",
+    "announce",
+    "announced",
+    "introducing",
+    "unveil",
+    "debut",
+)
+
+LAB_SOURCE_HINTS = (
+    "openai",
+    "anthropic",
+    "deepmind",
+    "google",
+    "meta",
+    "mistral",
+    "huggingface",
+    "xai",
+    "cohere",
+    "deepseek",
+    "qwen",
+    "zhipu",
+    "z.ai",
+)
+
+# Compiled once; substring semantics match the plain `term in text` checks they replace.
+RELEASE_MATCHER = KeywordMatcher(RELEASE_TERMS)
+RELEASE_ARTIFACT_MATCHER = KeywordMatcher(("model card", "weights", "checkpoint"))
+MODEL_CONTEXT_MATCHER = KeywordMatcher(MODEL_CONTEXT_TERMS)
+NON_RELEASE_MATCHER = KeywordMatcher(NON_RELEASE_HINTS)
+LAB_SOURCE_MATCHER = KeywordMatcher(LAB_SOURCE_HINTS)
+API_UPDATE_MATCHER = KeywordMatcher(("api", "sdk", "preview", "beta"))
+COMMENT_SIGNAL_MATCHER = KeywordMatcher(
+    ("model", "llm", "release", "launch", "card", "weights", "gpt", "claude", "gemini", "qwen", "glm", "opus")
+)
+
 GENERIC_MODEL_STOPWORDS = {
     "ios", "macos", "python", "linux", "windows", "postgres", "chrome",
     "android", "airpods", "tesla", "nvidia", "intel", "amd", "github",
@@ -227,15 +280,13 @@ def _is_official_release_domain(domain: str) -> bool:
 
 def _attach_hn_comment_signals(stories: List[Dict], aggregator: NewsAggregator, max_items: int = 12) -> None:
     """Attach condensed HN comment text to likely model-release stories for better detection."""
-    scanned = 0
+    candidates = []
     for story in stories:
-        if scanned >= max_items:
-            break
         title = (story.get("title") or story.get("original_title") or "").lower()
         url = (story.get("url") or story.get("link") or "").lower()
         if not story.get("hn_url") and not story.get("id"):
             continue
-        if not any(term in title or term in url for term in ("model", "llm", "release", "launch", "card", "weights", "gpt", "claude", "gemini", "qwen", "glm", "opus")):
+        if not COMMENT_SIGNAL_MATCHER.search(title, url):
             continue
 
         item_id = story.get("id")
@@ -243,53 +294,34 @@ def _attach_hn_comment_signals(stories: List[Dict], aggregator: NewsAggregator,
             m = re.search(r"id=(\d+)", str(story.get("hn_url")))
             if m:
                 item_id = int(m.group(1))
-        if not item_id:
-            continue
+        if item_id:
+            candidates.append((story, int(item_id)))
+    if not candidates:
+        return
 
+    # Only the first few top-level comments are used, so walk one level per thread, a batch at a time,
+    # sized to the stories still needed so threads without comments don't pull in the whole list.
+    scanned = 0
+    pos = 0
+    while scanned < max_items and pos < len(candidates):
+        batch = candidates[pos:pos + max_items - scanned]
+        pos += len(batch)
         try:
-            details = aggregator.hn_scraper._get_story(int(item_id))
-            if not details or not details.get("kids"):
-                continue
-            comments = aggregator.hn_scraper.fetch_hn_comments(details["kids"], limit=6)
+            trees = aggregator.hn_scraper.fetch_comment_trees([item_id for _, item_id in batch],
+                                                              max_depth=1, max_items=6)
+        except Exception:
+            return
+        for story, item_id in batch:
+            comments = [c["text"] for c in trees.get(item_id, [])]
             if comments:
                 story["release_signal_text"] = " ".join(comments[:3])
                 scanned += 1
-        except Exception:
-            continue
 
 
 def _extract_model_releases(stories: List[Dict], edition_day: datetime) -> List[Dict]:
-    release_terms = (
-        "release",
-        "released",
-        "launch",
-        "launched",
-        "announce",
-        "announced",
-        "introducing",
-        "unveil",
-        "debut",
-    )
-
     seen = set()
     releases: List[Dict] = []
 
-    lab_source_hints = (
-        "openai",
-        "anthropic",
-        "deepmind",
-        "google",
-        "meta",
-        "mistral",
-        "huggingface",
-        "xai",
-        "cohere",
-        "deepseek",
-        "qwen",
-        "zhipu",
-        "z.ai",
-    )
-
     for story in stories:
         title = (story.get("title") or story.get("generated_headline") or story.get("original_title") or "").strip()
         if not title:
@@ -309,14 +341,14 @@ def _extract_model_releases(stories: List[Dict], edition_day: datetime) -> List[
         if not model_candidates:
             continue
 
-        has_release_language = any(term in combined for term in release_terms)
-        has_release_title = any(term in lower for term in release_terms)
+        has_release_language = RELEASE_MATCHER.search(combined)
+        has_release_title = RELEASE_MATCHER.search(lower)
         has_release_url_path = bool(re.search(r"/(news|blog|index|announcements?|releases?|introducing|launch)", url_lower))
-        has_release_artifact = any(term in combined for term in ("model card", "weights", "checkpoint"))
-        from_lab_source = any(hint in source or hint in url_lower for hint in lab_source_hints)
+        has_release_artifact = RELEASE_ARTIFACT_MATCHER.search(combined)
+        from_lab_source = LAB_SOURCE_MATCHER.search(source, url_lower)
         categorized_release = str(category_id) == "7" or bool(story.get("detected_model"))
-        has_model_context = any(term in combined for term in MODEL_CONTEXT_TERMS)
-        looks_non_release = any(term in lower for term in NON_RELEASE_HINTS)
+        has_model_context = MODEL_CONTEXT_MATCHER.search(combined)
+        looks_non_release = NON_RELEASE_MATCHER.search(lower)
         official_domain = _is_official_release_domain(domain)
 
         # Avoid assigning release dates from generic mentions.
@@ -360,7 +392,7 @@ def _extract_model_releases(stories: List[Dict], edition_day: datetime) -> List[
             seen.add(key)
 
             release_type = "Model Release"
-            if any(word in combined for word in ["api", "sdk", "preview", "beta"]):
+            if API_UPDATE_MATCHER.search(combined):
                 release_type = "Model/API Update"
 
             releases.append(
@@ -536,10 +568,10 @@ def get_archive_dir_for_date(repo_root: Path, dt: datetime) -> Path:
     return archive_dir
 
 
-def fetch_raw_news(repo_root: Path) -> List[Dict]:
+def fetch_raw_news(repo_root: Path, aggregator: Optional[NewsAggregator] = None) -> List[Dict]:
     """Step 1: Aggregate news and save to raw file."""
     print("\n[1/5] Aggregating news from HackerNews and RSS feeds...")
-    aggregator = NewsAggregator()
+    aggregator = aggregator or NewsAggregator()
     raw_news = aggregator.aggregate_all()
 
     all_stories: List[Dict] = []
@@ -556,7 +588,10 @@ def fetch_raw_news(repo_root: Path) -> List[Dict]:
             normalized["url"] = normalized.get("link", normalized.get("url", ""))
             all_stories.append(normalized)
 
-    print(f"   ✓ Found {len(all_stories)} stories")
+    # The same lab post often arrives via HN, its RSS feed and the blog scraper.
+    found = len(all_stories)
+    all_stories = dedupe_stories(all_stories)
+    print(f"   ✓ Found {found} stories ({found - len(all_stories)} cross-source duplicates merged)")
 
     raw_path = repo_root / "output" / "raw_news.json"
     with open(raw_path, "w") as f:
@@ -566,6 +601,55 @@ def fetch_raw_news(repo_root: Path) -> List[Dict]:
     return all_stories
 
 
+def _download_story_images(organized: Dict[int, List[Dict]], image_store: ImageStore) -> int:
+    """Fetch every selected story image concurrently, then close the store; stories still downloading at the deadline go without."""
+    jobs = []
+    for cat_id in sorted(organized.keys()):
+        for story_idx, story in enumerate(organized.get(cat_id, [])):
+            image_url = story.get("selected_image_url")
+            worth_showing = story.get("worth_showing_image", False)
+            if story_idx < 3 and cat_id in [1, 2, 3]:
+                worth_showing = True
+
+            if worth_showing and image_url and str(image_url).startswith("http"):
+                jobs.append(story)
+            else:
+                story["generated_image_path"] = None
+    if not jobs:
+        image_store.close()
+        return 0
+
+    def fetch(story: Dict) -> Optional[str]:
+        headers = {
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+            "Referer": story.get("url", ""),
+        }
+        return image_store.fetch(story["selected_image_url"], headers=headers)
+
+    executor = ThreadPoolExecutor(max_workers=min(IMAGE_DOWNLOAD_WORKERS, len(jobs)))
+    futures = {executor.submit(fetch, story): story for story in jobs}
+    done, not_done = wait(futures, timeout=IMAGE_STAGE_DEADLINE)
+    executor.shutdown(wait=False, cancel_futures=True)
+    # Saves the index; downloads still running from here on leave no files or entries behind.
+    image_store.close()
+
+    img_count = 0
+    for future in done:
+        story = futures[future]
+        try:
+            image_filename = future.result()
+        except Exception as e:
+            print(f"      ⚠ Image download failed: {e}")
+            image_filename = None
+        if image_filename:
+            story["generated_image_path"] = f"../images/{image_filename}"
+            print(f"      ✓ Image: {image_filename[:16]}... ({story.get('original_title', 'story')[:40]})")
+            img_count += 1
+    if not_done:
+        print(f"      - {len(not_done)} image download(s) still running after {IMAGE_STAGE_DEADLINE:.0f}s, skipped")
+    return img_count
+
+
 def generate_daily_newspaper(skip_fetch: bool = False) -> Dict:
     """Main pipeline: fetch -> process -> export."""
     repo_root = Path(__file__).resolve().parent.parent
@@ -576,6 +660,9 @@ def generate_daily_newspaper(skip_fetch: bool = False) -> Dict:
 
     archive_previous_current_edition(repo_root)
 
+    # One aggregator per run so every step shares its HN item cache.
+    aggregator = NewsAggregator()
+
     if skip_fetch:
         raw_path = repo_root / "output" / "raw_news.json"
         if raw_path.exists():
@@ -583,25 +670,31 @@ def generate_daily_newspaper(skip_fetch: bool = False) -> Dict:
             with open(raw_path, "r") as f:
                 all_stories = json.load(f)
         else:
-            all_stories = fetch_raw_news(repo_root)
+            all_stories = fetch_raw_news(repo_root, aggregator)
     else:
-        all_stories = fetch_raw_news(repo_root)
+        all_stories = fetch_raw_news(repo_root, aggregator)
 
     print("\n[2/5] Processing stories with LLM (Free Chatbots + HF + Fallbacks)...")
     processor = NewsProcessor()
     processed_stories = processor.process_stories(all_stories)
 
     print("\n[2c] Enriching Insights with HackerNews discussions...")
-    aggregator = NewsAggregator()
+    insight_ids = []
+    for story in processed_stories:
+        match = re.search(r"id=(\d+)", story.get("hn_url") or "")
+        if story["category_id"] == 8 and match:
+            insight_ids.append(int(match.group(1)))
+    # Walk every insight thread together, one pooled batch per tree level; the loop below reads the cache.
+    aggregator.hn_scraper.fetch_comment_trees(insight_ids)
     for story in processed_stories:
         if story["category_id"] == 8 and story.get("hn_url"):
             try:
                 match = re.search(r"id=(\d+)", story["hn_url"])
                 if match:
                     item_id = int(match.group(1))
-                    details = aggregator.hn_scraper._get_story(item_id)
-                    if details and details.get("kids"):
-                        comments = aggregator.hn_scraper.fetch_hn_comments(details["kids"])
+                    # Replies included: the disagreement is usually one level down.
+                    comments = aggregator.hn_scraper.fetch_comment_texts(item_id, limit=8)
+                    if comments:
                         insight_data = processor.process_insight_story(story["original_title"], comments)
                         story["generated_headline"] = insight_data["headline"]
                         story["summary"] = insight_data["summary"]
@@ -622,9 +715,14 @@ def generate_daily_newspaper(skip_fetch: bool = False) -> Dict:
     else:
         editorial = processor.generate_editorial_pass(top_candidates)
     print(f"   ✓ Editor's Note: {editorial.get('editors_note')}")
+    processor.close()  # last LLM call of the run
 
     print("\n[2e] Mining model-release signals from HN discussions...")
     _attach_hn_comment_signals(all_stories, aggregator)
+    item_cache = aggregator.hn_scraper.item_cache
+    print(f"   ✓ HN item cache: {item_cache.hits} hits, {item_cache.misses} fetches; "
+          f"{aggregator.hn_scraper.comment_trees.hits} comment trees reused")
+    aggregator.close()  # last HackerNews step of the run
 
     edition_dt = datetime.now()
     model_releases = _extract_model_releases(all_stories, edition_dt)
@@ -644,50 +742,21 @@ def generate_daily_newspaper(skip_fetch: bool = False) -> Dict:
     images_dir = repo_root / "output" / "images"
     images_dir.mkdir(parents=True, exist_ok=True)
 
-    import requests
+    image_store = ImageStore(images_dir)
+    img_count = _download_story_images(organized, image_store)
 
-    img_count = 0
-    for cat_id in sorted(organized.keys()):
-        for story_idx, story in enumerate(organized.get(cat_id, [])):
-            image_url = story.get("selected_image_url")
-            worth_showing = story.get("worth_showing_image", False)
-            if story_idx < 3 and cat_id in [1, 2, 3]:
-                worth_showing = True
-
-            if worth_showing and image_url and str(image_url).startswith("http"):
-                safe_title = "".join([c if c.isalnum() else "_" for c in story.get("original_title", "story")[:30]])
-                try:
-                    headers = {
-                        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-                        "Referer": story.get("url", ""),
-                    }
-                    img_response = requests.get(image_url, timeout=10, stream=True, headers=headers)
-                    if img_response.status_code == 200:
-                        content_type = img_response.headers.get("Content-Type", "").lower()
-                        if "image/png" in content_type:
-                            ext = ".png"
-                        elif "image/webp" in content_type:
-                            ext = ".webp"
-                        elif "image/jpeg" in content_type or "image/jpg" in content_type:
-                            ext = ".jpg"
-                        else:
-                            continue
-
-                        image_filename = f"story_{cat_id}_{story_idx}_{safe_title}{ext}"
-                        img_path = images_dir / image_filename
-                        with open(img_path, "wb") as f:
-                            for chunk in img_response.iter_content(chunk_size=8192):
-                                f.write(chunk)
-
-                        story["generated_image_path"] = f"../images/{image_filename}"
-                        print(f"      ✓ Downloaded: {image_filename}")
-                        img_count += 1
-                except Exception:
-                    pass
-            else:
-                story["generated_image_path"] = None
+    if PIL_AVAILABLE:
+        resized = sum(
+            attach_variants(story, images_dir)
+            for stories in organized.values()
+            for story in stories
+            if story.get("generated_image_path")
+        )
+        print(f"   ✓ Responsive variants for {resized} images{' (WebP + AVIF)' if AVIF_AVAILABLE else ' (WebP)'}")
+    else:
+        print("   - Pillow not installed; serving images as downloaded")
 
-    print(f"   ✓ Downloaded {img_count} images")
+    print(f"   ✓ {img_count} images ready: {image_store.summary()}")
 
     print("\n[5/5] Exporting newspaper...")
     archive_root = repo_root / "output" / "archive"
@@ -734,11 +803,18 @@ def generate_daily_newspaper(skip_fetch: bool = False) -> Dict:
         "processed_stories": len(processed_stories),
         "model_releases": len(model_releases),
         "pages": {str(p): sum(len(organized.get(c, [])) for c in PAGES_CONFIG[p]["categories"]) for p in range(1, 6)},
+        "hosts": get_host_guard().snapshot(),
     }
 
     with open(current_dir / "metadata.json", "w") as f:
         json.dump(metadata, f, indent=2)
 
+    # Only now that the edition is on disk do its feed entries count as seen; a crashed run re-ingests them.
+    committed = aggregator.rss_scraper.commit_state()
+    if committed:
+        print(f"   ✓ Feed state: {committed} new entries marked as seen")
+
+    print(f"\nHost guard: {get_host_guard().summary()}")
     print("\n" + "=" * 60)
     print("✓ Daily newspaper generated successfully!")
     print("=" * 60)
@@ -0,0 +1,163 @@
+"""Thompson-sampling model choice from per-model success, 429, JSON and latency history"""
+import atexit
+import json
+import os
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from http_cache import CACHE_DIR
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+try:
+    import config as _cfg
+except Exception:
+    _cfg = None
+
+# Evidence halves in weight every this many hours, so yesterday's outage fades by next week.
+MODEL_STATS_HALF_LIFE_HOURS = float(getattr(_cfg, "MODEL_STATS_HALF_LIFE_HOURS", 72))
+MODEL_LATENCY_EWMA_ALPHA = float(getattr(_cfg, "MODEL_LATENCY_EWMA_ALPHA", 0.2))
+MODEL_LATENCY_SCALE = float(getattr(_cfg, "MODEL_LATENCY_SCALE", 10))  # seconds; score halves at this latency
+MODEL_COST_WEIGHT = float(getattr(_cfg, "MODEL_COST_WEIGHT", 1.0))  # per $ of (input + output) cost per 1M tokens
+LATENCY_PRIOR = MODEL_LATENCY_SCALE  # assumed for a model with no history
+
+
+class _ModelStats:
+    def __init__(self, data: Dict = None):
+        data = data or {}
+        self.successes = float(data.get("successes", 0.0))
+        self.failures = float(data.get("failures", 0.0))
+        self.throttled = float(data.get("throttled", 0.0))
+        self.errors = float(data.get("errors", 0.0))
+        self.json_failures = float(data.get("json_failures", 0.0))
+        self.latency = data.get("ewma_latency")
+        self.updated_at = float(data.get("updated_at", time.time()))
+
+    def decay(self, now: float, half_life_seconds: float):
+        if half_life_seconds <= 0:
+            return
+        factor = 0.5 ** (max(0.0, now - self.updated_at) / half_life_seconds)
+        for name in ("successes", "failures", "throttled", "errors", "json_failures"):
+            setattr(self, name, getattr(self, name) * factor)
+        self.updated_at = now
+
+    def to_dict(self) -> Dict:
+        total = self.successes + self.failures
+        return {
+            "successes": round(self.successes, 3),
+            "failures": round(self.failures, 3),
+            "throttled": round(self.throttled, 3),
+            "errors": round(self.errors, 3),
+            "json_failures": round(self.json_failures, 3),
+            "ewma_latency": None if self.latency is None else round(self.latency, 3),
+            "success_rate": round(self.successes / total, 3) if total else None,
+            "updated_at": self.updated_at,
+        }
+
+
+class ModelScheduler:
+    """Orders candidate models by a sampled objective instead of fixed weights.
+
+    Each model (keyed like the limiter lanes, "huggingface/<model_id>") has a
+    Beta(1 + successes, 1 + failures) belief that a call returns a usable
+    reply; 429s, transport/HTTP errors and replies that fail JSON parsing all
+    count as failures. A draw from that belief is multiplied by the model's
+    quality, divided by its EWMA latency and, when preferring cheap models,
+    by its price. Sorting by the draw explores untried or recovering models
+    while mostly picking today's best. Counts decay with a half-life and are
+    persisted in output/cache/model_stats.json.
+    """
+
+    def __init__(self, path: Path = None, half_life_hours: float = None, rng: random.Random = None):
+        self.path = Path(path or CACHE_DIR / "model_stats.json")
+        self.half_life_seconds = (MODEL_STATS_HALF_LIFE_HOURS if half_life_hours is None else half_life_hours) * 3600
+        self.rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, _ModelStats] = {}
+        try:
+            with open(self.path, "r") as f:
+                self._stats = {key: _ModelStats(data) for key, data in json.load(f).items()}
+        except Exception:
+            self._stats = {}
+
+    def _get(self, key: str) -> _ModelStats:
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = _ModelStats()
+        stats.decay(time.time(), self.half_life_seconds)
+        return stats
+
+    def record(self, key: str, ok: bool, latency: float = None, status_code: Optional[int] = None,
+               json_failed: bool = False):
+        """Outcome of one call; `status_code` 429 marks throttling, any other failure an error"""
+        with self._lock:
+            stats = self._get(key)
+            if ok:
+                stats.successes += 1
+            else:
+                stats.failures += 1
+                if json_failed:
+                    stats.json_failures += 1
+                elif status_code == 429:
+                    stats.throttled += 1
+                else:
+                    stats.errors += 1
+            if latency is not None:
+                stats.latency = latency if stats.latency is None else (
+                    MODEL_LATENCY_EWMA_ALPHA * latency + (1 - MODEL_LATENCY_EWMA_ALPHA) * stats.latency
+                )
+
+    def score(self, key: str, quality: float = 5, cost: float = 0.0, prefer_cheap: bool = True) -> float:
+        """One Thompson draw of the objective for `key`"""
+        with self._lock:
+            stats = self._get(key)
+            reliability = self.rng.betavariate(1 + stats.successes, 1 + stats.failures)
+            latency = LATENCY_PRIOR if stats.latency is None else stats.latency
+        value = reliability * (quality / 5) / (1 + latency / MODEL_LATENCY_SCALE)
+        if prefer_cheap:
+            value /= 1 + MODEL_COST_WEIGHT * cost
+        return value
+
+    def rank(self, candidates: List[Dict], prefer_cheap: bool = True) -> List[Dict]:
+        """Candidates ({'key', 'quality', 'cost', ...}) best-first by one fresh draw each"""
+        scored = [(self.score(c["key"], c.get("quality", 5), c.get("cost", 0.0), prefer_cheap), c) for c in candidates]
+        return [c for _, c in sorted(scored, key=lambda pair: pair[0], reverse=True)]
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {key: stats.to_dict() for key, stats in sorted(self._stats.items())}
+
+    def save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(self.snapshot(), indent=1))
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"      - Could not persist model stats: {e}")
+
+    def summary(self) -> str:
+        parts = []
+        for key, s in self.snapshot().items():
+            if s["success_rate"] is None:
+                continue
+            latency = "?" if s["ewma_latency"] is None else f"{s['ewma_latency']:.1f}s"
+            parts.append(f"{key.split('/')[-1]}: {s['success_rate']:.0%} ok, {latency}")
+        return ", ".join(parts) or "no history yet"
+
+
+_shared_scheduler: Optional[ModelScheduler] = None
+_shared_lock = threading.Lock()
+
+
+def get_model_scheduler() -> ModelScheduler:
+    """Process-wide scheduler; its stats are written back when the process exits"""
+    global _shared_scheduler
+    with _shared_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = ModelScheduler()
+            atexit.register(_shared_scheduler.save)
+        return _shared_scheduler
@@ -1,6 +1,5 @@
 """LLM-based news categorization and summarization"""
 import os
-import time
 import json
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, List, Tuple
@@ -44,7 +43,7 @@ except ImportError:
     SUMMARIZATION_PROMPT = "Summarize this story"
     LLM_TIMEOUT = 30
     CONFIDENCE_THRESHOLD = 0.8
-    PROCESSING_MAX_WORKERS = 5
+    PROCESSING_MAX_WORKERS = 8
     OPENROUTER_REASONING_MODELS = ["google/gemini-2.0-flash-exp:free"]
     KIMI_MODEL = "moonshot-v1-8k"
 
@@ -205,9 +204,6 @@ class NewsProcessor:
     
     def _process_one_story(self, index_and_story: Tuple[int, Dict]) -> Tuple[int, Dict]:
         """Process a single story (categorize + summarize). Used for parallel execution."""
-        # Add delay to avoid rate limits (especially for Meta AI / Gemini free tier)
-        time.sleep(2)
-        
         i, story = index_and_story
         try:
             from scraper import ImageFetcher
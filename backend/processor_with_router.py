@@ -3,7 +3,6 @@ Updated NewsProcessor with LLM Router
 Routes requests across Qwen, GPT-OSS-120B, DeepSeek with intelligent fallback
 """
 import os
-import time
 import json
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, List, Tuple
@@ -11,7 +10,9 @@ from pathlib import Path
 import re
 
 # Import router
+from image_rank import choose_image
 from llm_router import LLMRouter
+from local_classifier import LocalPreClassifier, record_negative_examples
 
 # Load config
 import sys
@@ -66,31 +67,42 @@ Title: {title}
 Category: {category}
 Summary: {summary}
 
-IMAGE CANDIDATES:
-{image_urls}
-
 RESPOND ONLY WITH A VALID JSON OBJECT:
 {{
   "headline": "[Professional Headline]",
   "summary": "[1-2 sentence concise summary]",
-  "significance_score": [1-100],
-  "selected_image_url": "[Full URL from list or 'NONE']",
-  "image_layout": "WIDE|TALL|SQUARE"
+  "significance_score": [1-100]
 }}
 """
     
     LLM_TIMEOUT = 30
-    PROCESSING_MAX_WORKERS = 5
+    PROCESSING_MAX_WORKERS = 8
+
+try:
+    from config import IMAGE_DISCOVERY_WORKERS, IMAGE_DISCOVERY_TIMEOUT
+except ImportError:
+    IMAGE_DISCOVERY_WORKERS = 8
+    IMAGE_DISCOVERY_TIMEOUT = 20
+
+try:
+    from config import CATEGORIZATION_BATCH_MAX, CATEGORIZATION_BATCH_CONTEXT_SHARE
+except ImportError:
+    CATEGORIZATION_BATCH_MAX = 12  # 0 disables batching
+    CATEGORIZATION_BATCH_CONTEXT_SHARE = 0.1
+
+CATEGORIZATION_SUMMARY_CHARS = 500
+CHARS_PER_TOKEN = 4
+BATCH_OUTPUT_TOKENS_PER_STORY = 40
+
+NO_IMAGE = {'image_url': None, 'image_layout': 'SQUARE', 'worth_showing_image': False}
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
 
 
 class NewsProcessorWithRouter:
     """Process news using LLM Router for intelligent model selection"""
     
-    CATEGORIZATION_PROMPT = """[SYSTEM: RESPOND ONLY WITH JSON]
-You are a high-end AI news curator. Categorize this story.
-
-CATEGORIES:
-1: Breaking Vectors (Major breakthroughs, high-impact news)
+    CATEGORY_GUIDE = """1: Breaking Vectors (Major breakthroughs, high-impact news)
 2: Model Architectures (New techniques, layers, methods)
 3: Neural Horizons (Robotics, future tech, world models)
 4: Lab Outputs (Open source tools, smaller releases)
@@ -103,7 +115,13 @@ CATEGORIES:
 11: Infra & Cost Watch (compute economics, GPU supply, cloud/on-prem cost shifts, serving efficiency)
 12: Policy & Safety Moves (regulatory actions, governance updates, safety policy changes with practical impact)
 13: Corrections & Revisions (retractions, errata, model updates, deprecations, changelog-impacting fixes)
+"""
 
+    CATEGORIZATION_PROMPT = """[SYSTEM: RESPOND ONLY WITH JSON]
+You are a high-end AI news curator. Categorize this story.
+
+CATEGORIES:
+""" + CATEGORY_GUIDE + """
 STORY:
 Title: {title}
 Summary: {summary}
@@ -115,6 +133,20 @@ REQUIRED JSON FORMAT:
   "is_model_release": [true/false],
   "detected_model": "[Name if cat 7, else null]"
 }}
+"""
+
+    BATCH_CATEGORIZATION_PROMPT = """[SYSTEM: RESPOND ONLY WITH JSON]
+You are a high-end AI news curator. Categorize EACH story below independently.
+
+CATEGORIES:
+""" + CATEGORY_GUIDE + """
+STORIES:
+{stories}
+
+REQUIRED JSON FORMAT (an array with exactly one object per story, keyed by its [index]):
+[
+  {{"index": 0, "category_id": [1-13], "confidence": [0.0-1.0], "is_model_release": [true/false], "detected_model": "[Name if cat 7, else null]"}}
+]
 """
     
     SUMMARIZATION_PROMPT = """[SYSTEM: RESPOND ONLY WITH JSON]
@@ -128,24 +160,18 @@ Style constraints:
 - acknowledge uncertainty only when real
 Editorial posture: quietly cynical about the erosion of software craft, but open-ended about where discipline can return.
 
-Summarize this AI story and decide if the cover image is high-quality enough to feature.
+Summarize this AI story.
 
 STORY:
 Title: {title}
 Category: {category}
 Summary: {summary}
 
-IMAGE CANDIDATES:
-{image_urls}
-
 REQUIRED JSON FORMAT:
 {{
   "headline": "[Newspaper-style headline, concise and concrete]",
   "summary": "[1-2 sentence distillation with concrete implications and a human newsroom voice]",
-  "significance_score": [1-100],
-  "selected_image_url": "[Chosen URL or 'NONE']",
-  "worth_showing_image": [true/false],
-  "image_layout": "WIDE|TALL|SQUARE"
+  "significance_score": [1-100]
 }}
 """
 
@@ -203,7 +229,20 @@ REQUIRED JSON FORMAT:
         """
         self.router = LLMRouter()
         self.prefer_cheap = prefer_cheap
+        # Cover-image discovery runs here, alongside the LLM calls of the same story.
+        self._image_pool = ThreadPoolExecutor(max_workers=IMAGE_DISCOVERY_WORKERS, thread_name_prefix="image-discovery")
+        try:
+            self.preclassifier = LocalPreClassifier(valid_categories=PAGE_CATEGORIES.keys())
+        except Exception as e:
+            print(f"⚠ Local pre-classifier unavailable: {e}")
+            self.preclassifier = None
         print(f"✓ Processor initialized with LLM Router (prefer_cheap={prefer_cheap})")
+
+    def close(self):
+        """Release the router's attempt threads and the image discovery pool once the run is done with the LLM"""
+        self.router.close()
+        self._image_pool.shutdown(wait=False, cancel_futures=True)
+
     def process_insight_story(self, title: str, comments: List[str]) -> Dict:
         """Specialized processor for Page 4 (Insights) using discussion context"""
         comments_text = "\n---\n".join(comments) if comments else "No comments found."
@@ -271,8 +310,22 @@ REQUIRED JSON FORMAT:
             }
         
         # Parse JSON response
-        data = self.router._extract_json(result["response"])
-        if data:
+        parsed = self._parse_category(self.router._extract_json(result["response"]), result)
+        if parsed:
+            return parsed
+        
+        return {
+            'category': 'Irrelevant',
+            'category_id': 0,
+            'confidence': 0.0,
+            'model_used': result['model'],
+            'cost': result.get('cost', 0)
+        }
+
+    @staticmethod
+    def _parse_category(data, result: Dict):
+        """Category dict from one parsed categorization object, or None if it is unusable"""
+        if isinstance(data, dict):
             raw_category_id = data.get("category_id", 0)
             try:
                 category_id = int(raw_category_id)
@@ -308,41 +361,107 @@ REQUIRED JSON FORMAT:
                     'model_used': result['model'],
                     'cost': result.get('cost', 0)
                 }
-        
-        return {
-            'category': 'Irrelevant',
-            'category_id': 0,
-            'confidence': 0.0,
-            'model_used': result['model'],
-            'cost': result.get('cost', 0)
-        }
-# ... Summarization parsing ...
-    def _normalize_model_output_url(self, value: str) -> str:
-        """Extract a clean URL from common LLM wrappers like markdown links."""
-        if not value:
-            return ""
-        text = str(value).strip()
-        if text.upper() == "NONE":
-            return ""
-        markdown_match = re.search(r'\((https?://[^)\s]+)\)', text)
-        if markdown_match:
-            return markdown_match.group(1)
-        raw_match = re.search(r'https?://[^\s\]>)"]+', text)
-        if raw_match:
-            return raw_match.group(0)
-        return ""
+        return None
+
+    def _categorization_batches(self, stories: List[Tuple[int, Dict]]) -> List[List[Tuple[int, Dict]]]:
+        """Pack stories into batches that fit the smallest routed model's context window"""
+        context_window = min(m.context_window for m in self.router.MODELS)
+        budget = int(context_window * CATEGORIZATION_BATCH_CONTEXT_SHARE)
+        overhead = len(self.BATCH_CATEGORIZATION_PROMPT) // CHARS_PER_TOKEN
+        batches, current, used = [], [], overhead
+        for item in stories:
+            cost = len(self._batch_line(0, item[1])) // CHARS_PER_TOKEN + BATCH_OUTPUT_TOKENS_PER_STORY
+            if current and (len(current) >= CATEGORIZATION_BATCH_MAX or used + cost > budget):
+                batches.append(current)
+                current, used = [], overhead
+            current.append(item)
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    @staticmethod
+    def _batch_line(index: int, story: Dict) -> str:
+        summary = (story.get('summary') or '')[:CATEGORIZATION_SUMMARY_CHARS]
+        return f"[{index}] Title: {story['title']}\nSummary: {summary}\n"
+
+    def _categorize_one_batch(self, batch: List[Tuple[int, Dict]]) -> Dict[int, Dict]:
+        """{story index: category} for the elements of one batch reply that validate"""
+        prompt = self.BATCH_CATEGORIZATION_PROMPT.format(
+            stories="\n".join(self._batch_line(pos, story) for pos, (_, story) in enumerate(batch))
+        )
+        result = self.router.call_llm(prompt=prompt, prefer_cheap=self.prefer_cheap, fallback_chain=True)
+        items = self.router._extract_json_array(result.get("response") or "")
+        categories: Dict[int, Dict] = {}
+        for item in items or []:
+            if not isinstance(item, dict):
+                continue
+            try:
+                pos = int(item.get("index"))
+            except (TypeError, ValueError):
+                continue
+            if not 0 <= pos < len(batch) or batch[pos][0] in categories:
+                continue
+            if not str(item.get("category_id", "")).strip().isdigit():
+                continue  # single-story parsing would read this as "irrelevant"; ask again instead
+            parsed = self._parse_category(item, result)
+            if parsed:
+                categories[batch[pos][0]] = parsed
+        return categories
+
+    def preclassify(self, stories: List[Tuple[int, Dict]]) -> Dict[int, Dict]:
+        """{story index: category} for stories the archive-trained classifier is confident about"""
+        categories: Dict[int, Dict] = {}
+        if not self.preclassifier or not self.preclassifier.enabled:
+            return categories
+        for i, story in stories:
+            verdict = self.preclassifier.classify(story['title'], story.get('summary', ''))
+            if verdict:
+                category_id, confidence = verdict
+                categories[i] = {
+                    'category': PAGE_CATEGORIES[category_id],
+                    'category_id': category_id,
+                    'confidence': round(confidence, 3),
+                    'detected_model': None,
+                    'model_used': 'Local-Classifier',
+                    'cost': 0,
+                }
+        return categories
 
+    def categorize_batch(self, stories: List[Tuple[int, Dict]], max_workers: int = None) -> Dict[int, Dict]:
+        """Categorize (index, story) pairs a batch per LLM call.
+
+        Elements of a reply that are missing, duplicated or malformed are
+        re-queued and categorized one story at a time.
+        """
+        if CATEGORIZATION_BATCH_MAX <= 1 or len(stories) <= 1:
+            return {}
+        batches = self._categorization_batches(stories)
+        print(f"   Categorizing {len(stories)} stories in {len(batches)} batch call(s)...")
+        categories: Dict[int, Dict] = {}
+        with ThreadPoolExecutor(max_workers=max_workers or PROCESSING_MAX_WORKERS) as executor:
+            for batch_result in executor.map(self._categorize_one_batch, batches):
+                categories.update(batch_result)
+            requeue = [(i, story) for i, story in stories if i not in categories]
+            if requeue:
+                print(f"   Re-queueing {len(requeue)} stories the batch replies did not cover")
+            singles = executor.map(
+                lambda item: self.categorize_story(item[1]['title'], item[1].get('url', ''), item[1].get('summary', '')),
+                requeue,
+            )
+            for (i, _), cat_result in zip(requeue, singles):
+                categories[i] = cat_result
+        return categories
+# ... Summarization parsing ...
     def summarize_story(self, title: str, url: str, summary: str = "", 
-                       category: str = "", image_urls: List[str] = None) -> Dict:
+                       category: str = "") -> Dict:
         """
-        Summarize story using LLM Router
+        Summarize story using LLM Router (the cover image is chosen locally, see image_rank)
         """
-        image_urls_str = "\n".join(image_urls) if image_urls else "NONE FOUND"
         prompt = self.SUMMARIZATION_PROMPT.format(
             title=title,
             category=category,
             summary=summary,
-            image_urls=image_urls_str
         )
         
         result = self.router.call_llm(
@@ -354,10 +473,7 @@ REQUIRED JSON FORMAT:
         default_res = {
             'headline': title,
             'summary': summary[:100],
-            'image_url': None,
-            'image_layout': 'SQUARE',
             'significance_score': 50,
-            'worth_showing_image': False,
             'model_used': None,
             'cost': 0
         }
@@ -368,13 +484,9 @@ REQUIRED JSON FORMAT:
         # Parse JSON response
         data = self.router._extract_json(result["response"])
         if data:
-            normalized_image = self._normalize_model_output_url(data.get('selected_image_url', ''))
             return {
                 'headline': data.get('headline', title),
                 'summary': data.get('summary', summary[:100]),
-                'image_url': normalized_image if normalized_image else None,
-                'worth_showing_image': data.get('worth_showing_image', False),
-                'image_layout': data.get('image_layout', 'SQUARE'),
                 'significance_score': data.get('significance_score', 50),
                 'model_used': result['model'],
                 'cost': result.get('cost', 0)
@@ -382,21 +494,28 @@ REQUIRED JSON FORMAT:
         
         return default_res
     
-    def _process_one_story(self, index_and_story: Tuple[int, Dict]) -> Tuple[int, Dict]:
-        """Process a single story (categorize + summarize)"""
-        time.sleep(1)  # Rate limiting
-        
+    @staticmethod
+    def _discover_image(story_url: str) -> Dict:
+        """Fetch the article page and pick its cover image"""
+        from scraper import ImageFetcher
+        candidates = ImageFetcher.get_candidate_details(story_url)
+        return choose_image(candidates, headers={'User-Agent': USER_AGENT, 'Referer': story_url})
+
+    def _process_one_story(self, index_and_story: Tuple[int, Dict], cat_result: Dict = None,
+                           image_future=None) -> Tuple[int, Dict]:
+        """Process a single story (categorize unless already batch-categorized, then summarize).
+
+        No fixed sleep: the router's adaptive limiter paces calls per provider/model.
+        """
         i, story = index_and_story
         try:
-            from scraper import ImageFetcher
-            image_candidates = ImageFetcher.get_candidate_images(story.get('url', ''))
-            
             # Categorize
-            cat_result = self.categorize_story(
-                story['title'],
-                story.get('url', ''),
-                story.get('summary', '')
-            )
+            if cat_result is None:
+                cat_result = self.categorize_story(
+                    story['title'],
+                    story.get('url', ''),
+                    story.get('summary', '')
+                )
             
             print(f"  [{i+1}] {story['title'][:50]}...")
             print(f"      Category: {cat_result['category']} (model: {cat_result['model_used']})")
@@ -404,21 +523,26 @@ REQUIRED JSON FORMAT:
             # Filter irrelevant
             if cat_result['category_id'] == 0:
                 print(f"      → Filtered (irrelevant)")
+                if image_future is not None:
+                    image_future.cancel()
                 return (i, None)
             
+            # Started only after categorization kept the story; runs alongside summarization.
+            if image_future is None:
+                image_future = self._image_pool.submit(self._discover_image, story.get('url', ''))
+            
             # Summarize
             sum_result = self.summarize_story(
                 story['title'],
                 story.get('url', ''),
                 story.get('summary', ''),
                 cat_result['category'],
-                image_candidates
             )
             
-            selected_image_url = sum_result['image_url']
-            # FALLBACK: Auto-select if LLM failed but we have candidates
-            if (not selected_image_url or selected_image_url.upper() == "NONE") and image_candidates:
-                selected_image_url = image_candidates[0]
+            try:
+                image = image_future.result(timeout=IMAGE_DISCOVERY_TIMEOUT)
+            except Exception:
+                image = NO_IMAGE
 
             return (i, {
                 'original_title': story['title'],
@@ -433,9 +557,9 @@ REQUIRED JSON FORMAT:
                 'confidence': cat_result['confidence'],
                 'detected_model': cat_result.get('detected_model'),
                 'summary': sum_result['summary'],
-                'selected_image_url': selected_image_url,
-                'worth_showing_image': sum_result.get('worth_showing_image', False),
-                'image_layout': sum_result.get('image_layout', 'SQUARE'),
+                'selected_image_url': image['image_url'],
+                'worth_showing_image': image['worth_showing_image'],
+                'image_layout': image['image_layout'],
                 'published': story.get('published', story.get('time')),
                 'model_used': f"Cat: {cat_result.get('model_used', 'Meta-AI')}, Sum: {sum_result.get('model_used', 'Meta-AI')}",
                 'cost': cat_result.get('cost', 0) + sum_result.get('cost', 0),
@@ -443,6 +567,8 @@ REQUIRED JSON FORMAT:
         
         except Exception as e:
             print(f"  ✗ Story {i+1} failed: {e}")
+            if image_future is not None:
+                image_future.cancel()
             return (i, None)
     
     def process_stories(self, stories: List[Dict], max_workers: int = None) -> List[Dict]:
@@ -458,9 +584,30 @@ REQUIRED JSON FORMAT:
         
         print(f"Processing {total} stories with LLM Router (workers={max_workers})...")
         results: Dict[int, Dict] = {}
+        categories = self.preclassify(to_process)
+        if self.preclassifier:
+            print(f"   Local pre-classifier: {self.preclassifier.summary()}")
+        categories.update(self.categorize_batch(
+            [item for item in to_process if item[0] not in categories], max_workers=max_workers
+        ))
+        # Confident "irrelevant" verdicts from a real model teach the pre-classifier what to leave alone.
+        rejected = [story for i, story in to_process if categories.get(i, {}).get('category_id') == 0
+                    and categories[i].get('confidence', 0) > 0
+                    and categories[i].get('model_used') not in (None, 'Local-Fallback')]
+        if rejected:
+            record_negative_examples(rejected)
+        # Discovery starts only for stories that survived categorization and overlaps summarization.
+        image_futures = {
+            i: self._image_pool.submit(self._discover_image, story.get('url', ''))
+            for i, story in to_process
+            if categories.get(i, {}).get('category_id', 1) != 0
+        }
         
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {executor.submit(self._process_one_story, item): item[0] for item in to_process}
+            futures = {
+                executor.submit(self._process_one_story, item, categories.get(item[0]), image_futures.get(item[0])): item[0]
+                for item in to_process
+            }
             done = 0
             
             for future in as_completed(futures):
@@ -484,6 +631,12 @@ REQUIRED JSON FORMAT:
         print(f"   - Total calls: {stats['total_calls']}")
         print(f"   - Total cost: ${stats['total_cost']:.4f}")
         print(f"   - Avg per story: ${stats['avg_cost_per_call']:.6f}")
+        print(f"   - LLM concurrency: {self.router.limiter.summary()}")
+        print(f"   - Free chatbots: {self.router.chatbots.summary()}")
+        print(f"   - Response cache: {self.router.cache.summary()}")
+        print(f"   - Hedging: {self.router.hedge_summary()}")
+        print(f"   - Model stats: {self.router.scheduler.summary()}")
+        self.router.scheduler.save()
         
         return processed
     
@@ -1,16 +1,25 @@
 """HackerNews scraper with RSS feed support for major AI labs"""
-import requests
 import feedparser
 import re
 from typing import List, Dict
-from datetime import datetime
+from datetime import datetime, timezone
 from email.utils import parsedate_to_datetime
 import json
+import os
 import sys
+import threading
+import time
 from pathlib import Path
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 
+from async_fetch import AsyncJSONFetcher, HTTP2_AVAILABLE
+from host_guard import get_host_guard, guarded_get
+from html_meta import extract_page_meta, html_to_text
+from http_cache import CACHE_DIR, get_http_cache
+from keyword_matcher import KeywordMatcher
+from state_store import FeedStateStore
+
 # Import configuration
 sys.path.insert(0, str(Path(__file__).parent.parent))
 try:
@@ -22,6 +31,29 @@ AI_KEYWORDS = getattr(_cfg, "AI_KEYWORDS", ['ai', 'llm', 'machine learning', 'de
 HACKERNEWS_STORY_LIMIT = int(getattr(_cfg, "HACKERNEWS_STORY_LIMIT", 30))
 RSS_FEEDS = getattr(_cfg, "RSS_FEEDS", {'arxiv': 'http://arxiv.org/rss/cs.AI'})
 RSS_STORIES_PER_FEED = int(getattr(_cfg, "RSS_STORIES_PER_FEED", 5))
+HN_FETCH_CONCURRENCY = int(getattr(_cfg, "HN_FETCH_CONCURRENCY", 32))
+HN_PER_HOST_LIMIT = int(getattr(_cfg, "HN_PER_HOST_LIMIT", 16))
+HN_NEW_STORIES_BATCH = int(getattr(_cfg, "HN_NEW_STORIES_BATCH", 50))
+RSS_FETCH_WORKERS = int(getattr(_cfg, "RSS_FETCH_WORKERS", 8))
+RSS_FEED_DEADLINE = float(getattr(_cfg, "RSS_FEED_DEADLINE", 15))
+RSS_INCREMENTAL = bool(getattr(_cfg, "RSS_INCREMENTAL", True))
+HN_ITEM_CACHE_TTL = int(getattr(_cfg, "HN_ITEM_CACHE_TTL", 3600))
+ALGOLIA_RANGE_CHUNK_DAYS = int(getattr(_cfg, "ALGOLIA_RANGE_CHUNK_DAYS", 7))
+ALGOLIA_MAX_HITS = 1000  # Algolia never returns more than this per query, however it is paged
+HN_COMMENT_DEPTH = int(getattr(_cfg, "HN_COMMENT_DEPTH", 2))
+HN_COMMENT_MAX_ITEMS = int(getattr(_cfg, "HN_COMMENT_MAX_ITEMS", 40))
+HN_COMMENT_MAX_BYTES = int(getattr(_cfg, "HN_COMMENT_MAX_BYTES", 16 * 1024))
+HN_COMMENT_CHARS = 500  # per comment
+HN_COMMENT_TREE_RETENTION = 14 * 86400
+# Article pages rarely change once published; feeds and listings do.
+HTTP_CACHE_ARTICLE_TTL = int(getattr(_cfg, "HTTP_CACHE_ARTICLE_TTL", 7 * 86400))
+BLOG_DATE_PROBE_WORKERS = int(getattr(_cfg, "BLOG_DATE_PROBE_WORKERS", 4))
+BLOG_DATE_PROBE_DEADLINE = float(getattr(_cfg, "BLOG_DATE_PROBE_DEADLINE", 12))
+# A page whose date we could not find is retried after a day; found dates never change.
+ARTICLE_DATE_RETRY_TTL = 86400
+ARTICLE_DATE_RETENTION = 90 * 86400
+# Metadata and dates live near the top; never pull more than this of an article page.
+HTML_MAX_BYTES = int(getattr(_cfg, "HTML_MAX_BYTES", 512 * 1024))
 
 class ImageFetcher:
     """Fetch potential images from URLs for AI review"""
@@ -29,6 +61,20 @@ class ImageFetcher:
     @staticmethod
     def get_candidate_images(url: str) -> List[str]:
         """Extract potential raster cover images from URL (SEO, OpenGraph, Thumbnails)"""
+        return [c['url'] for c in ImageFetcher.get_candidate_details(url)]
+
+    @staticmethod
+    def _dimension(value: str) -> int | None:
+        match = re.match(r'\s*(\d+)\s*(px)?\s*$', value or '')
+        return int(match.group(1)) if match else None
+
+    @staticmethod
+    def get_candidate_details(url: str) -> List[Dict]:
+        """Candidate images as {'url', 'source', 'width', 'height'}, in source-tag order.
+
+        `source` is 'og', 'twitter', 'itemprop', 'link' or 'img'; width/height
+        come from <img> attributes when present.
+        """
         if not url or not url.startswith('http'):
             return []
             
@@ -39,12 +85,10 @@ class ImageFetcher:
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
             }
-            response = requests.get(url, timeout=10, headers=headers)
+            response = get_http_cache().get(url, headers=headers, timeout=10, ttl=HTTP_CACHE_ARTICLE_TTL,
+                                            max_bytes=HTML_MAX_BYTES)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            # print(f"      - Successfully fetched HTML for {url[:40]}")
-            
             # Helper to check if URL is a valid raster image
             def is_valid(img_url):
                 img_url_lower = img_url.lower()
@@ -68,51 +112,60 @@ class ImageFetcher:
                     return True
                 return False
 
-            # 1. Meta Tag extraction (OG, Twitter, Schema)
-            for meta in soup.find_all('meta'):
-                # Check ALL attributes for 'image' related content in keys/values
-                meta_str = str(meta).lower()
-                if 'image' not in meta_str: continue
-                
-                content = meta.get('content')
-                if not content: continue
-                
-                prop = meta.get('property', '').lower()
-                name = meta.get('name', '').lower()
-                itemprop = meta.get('itemprop', '').lower()
-                
-                if any(x in prop or x in name for x in ['og:image', 'twitter:image']) or itemprop == 'image' or 'og:image' in prop:
+            def meta_images(page):
+                for meta in page.metas:
+                    content = meta.get('content')
+                    if not content:
+                        continue
+                    prop = meta.get('property', '').lower()
+                    name = meta.get('name', '').lower()
+                    itemprop = meta.get('itemprop', '').lower()
+                    if 'og:image' in prop or 'og:image' in name:
+                        source = 'og'
+                    elif 'twitter:image' in prop or 'twitter:image' in name:
+                        source = 'twitter'
+                    elif itemprop == 'image':
+                        source = 'itemprop'
+                    else:
+                        continue
                     full_url = urljoin(url, content)
                     if is_valid(full_url):
-                        candidates.append(full_url)
+                        yield {'url': full_url, 'source': source, 'width': None, 'height': None}
+
+            # A usable OG/Twitter image in <head> is the answer; don't tokenize the body.
+            page = extract_page_meta(response.text, stop_after_head=lambda p: any(meta_images(p)))
+
+            # 1. Meta Tag extraction (OG, Twitter, Schema)
+            candidates.extend(meta_images(page))
 
             # 2. Article Thumbnails & Icons
-            for link in soup.find_all('link', rel=re.compile(r'image_src|thumbnail|icon', re.I)):
+            for link in page.links:
                 c = link.get('href')
-                if c:
+                if c and re.search(r'image_src|thumbnail|icon', link.get('rel', ''), re.I):
                     full_url = urljoin(url, c)
                     if is_valid(full_url):
-                        candidates.append(full_url)
+                        candidates.append({'url': full_url, 'source': 'link', 'width': None, 'height': None})
 
             # 3. Large images in article body
-            for img in soup.find_all('img'):
+            for img in page.images:
                 src = img.get('src') or img.get('data-src') or img.get('data-original-src')
                 if not src: continue
                 
                 full_url = urljoin(url, src)
                 if is_valid(full_url):
-                    candidates.append(full_url)
-            
-            # if candidates:
-            #     print(f"      - Found {len(candidates)} image candidates")
+                    candidates.append({
+                        'url': full_url,
+                        'source': 'img',
+                        'width': ImageFetcher._dimension(img.get('width')),
+                        'height': ImageFetcher._dimension(img.get('height')),
+                    })
             
-            # Deduplicate while preserving order
-            unique_candidates = []
+            # Deduplicate while preserving order (first occurrence has the strongest source tag)
+            unique_candidates = {}
             for c in candidates:
-                if c not in unique_candidates:
-                    unique_candidates.append(c)
+                unique_candidates.setdefault(c['url'], c)
                     
-            return unique_candidates[:15]
+            return list(unique_candidates.values())[:15]
         except Exception:
             return []
 
@@ -122,68 +175,324 @@ class ImageFetcher:
         candidates = ImageFetcher.get_candidate_images(url)
         return candidates[0] if candidates else None
 
+class HNItemCache:
+    """Run-scoped store of raw HN item payloads, optionally persisted between runs.
+
+    Dead, deleted and null items are cached too (negative caching), so every
+    consumer - top stories, insight enrichment, comment mining - pays for each
+    item at most once per run. Entries persisted to disk expire after `ttl`.
+    """
+
+    def __init__(self, path: Path = None, ttl: int = None):
+        self.ttl = HN_ITEM_CACHE_TTL if ttl is None else ttl
+        self.path = path if path is not None else (CACHE_DIR / "hn_items.json" if self.ttl > 0 else None)
+        self._items: Dict[int, Dict | None] = {}
+        self._fetched_at: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, "r") as f:
+                payload = json.load(f)
+        except Exception:
+            return
+        now = time.time()
+        for key, entry in payload.items():
+            if now - entry.get("fetched_at", 0) < self.ttl:
+                self._items[int(key)] = entry.get("data")
+                self._fetched_at[int(key)] = entry["fetched_at"]
+
+    def save(self):
+        """Write the cache to disk (atomically) if anything was stored since the last save"""
+        if not self.path:
+            return
+        now = time.time()
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {
+                str(i): {"data": self._items[i], "fetched_at": ts}
+                for i, ts in self._fetched_at.items() if now - ts < self.ttl
+            }
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_suffix(".tmp")
+                with open(tmp_path, "w") as f:
+                    json.dump(payload, f)
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+            except Exception as e:
+                print(f"      - Could not persist HN item cache: {e}")
+
+    def lookup(self, item_ids: List[int]) -> tuple[Dict[int, Dict | None], List[int]]:
+        """Split ids into ({id: cached payload}, [ids still to fetch])"""
+        found, missing = {}, []
+        with self._lock:
+            for i in dict.fromkeys(item_ids):
+                if i in self._items:
+                    found[i] = self._items[i]
+                else:
+                    missing.append(i)
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def store(self, items: Dict[int, Dict | None]):
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            for i, data in items.items():
+                self._items[i] = data
+                self._fetched_at[i] = now
+            self._dirty = True
+
+
+class CommentTreeCache:
+    """Flattened HN comment trees keyed by item id, valid while `descendants` is unchanged"""
+
+    def __init__(self, path: Path = None):
+        self.path = path
+        self._trees: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.hits = 0
+        if self.path:
+            try:
+                with open(self.path, "r") as f:
+                    self._trees = json.load(f)
+            except Exception:
+                self._trees = {}
+
+    def get(self, item_id: int, descendants: int, budget: List[int]) -> List[Dict] | None:
+        with self._lock:
+            entry = self._trees.get(str(item_id))
+            if entry and entry.get("descendants") == descendants and entry.get("budget") == budget:
+                self.hits += 1
+                return entry["comments"]
+        return None
+
+    def put(self, item_id: int, descendants: int, budget: List[int], comments: List[Dict]):
+        with self._lock:
+            self._trees[str(item_id)] = {
+                "descendants": descendants,
+                "budget": budget,
+                "comments": comments,
+                "fetched_at": time.time(),
+            }
+            self._dirty = True
+
+    def save(self):
+        if not self.path:
+            return
+        cutoff = time.time() - HN_COMMENT_TREE_RETENTION
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {k: e for k, e in self._trees.items() if e.get("fetched_at", 0) >= cutoff}
+            self._dirty = False
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "w") as f:
+                json.dump(payload, f)
+        except Exception as e:
+            print(f"      - Could not persist HN comment trees: {e}")
+
+
 class HackerNewsScraper:
     """Scrape top stories from HackerNews"""
     
     def __init__(self):
         self.hn_api = "https://hacker-news.firebaseio.com/v0"
+        self.algolia_api = "https://hn.algolia.com/api/v1"
         self.timeout = 10
+        self.fetcher = AsyncJSONFetcher(
+            concurrency=HN_FETCH_CONCURRENCY,
+            per_host=HN_PER_HOST_LIMIT,
+            timeout=self.timeout,
+        )
+        self.item_cache = HNItemCache()
+        self.comment_trees = CommentTreeCache(CACHE_DIR / "hn_comment_trees.json")
+
+    def close(self):
+        """Persist the item cache and release the pooled HN connections"""
+        self.item_cache.save()
+        self.fetcher.close()
         
-    def get_historical_stories(self, target_date: datetime, limit: int = 50) -> List[Dict]:
-        """Fetch top AI stories for a specific date using Algolia Search API"""
-        start_ts = int(target_date.replace(hour=0, minute=0, second=0, microsecond=0).timestamp())
-        end_ts = start_ts + 86400
-        queries = [
+    @staticmethod
+    def _algolia_queries(start_ts: int, end_ts: int) -> List[tuple]:
+        """(endpoint, query, numericFilters) in priority order for a time span"""
+        span = f"created_at_i>{start_ts},created_at_i<{end_ts}"
+        return [
             # Primary: keep relevance threshold high.
-            (
-                "https://hn.algolia.com/api/v1/search"
-                f"?query=ai&numericFilters=created_at_i>{start_ts},created_at_i<{end_ts},points>20"
-                f"&tags=story&hitsPerPage={limit}"
-            ),
+            ("search", "ai", f"{span},points>20"),
             # Fallback 1: broader AI terms, no point floor.
-            (
-                "https://hn.algolia.com/api/v1/search"
-                f"?query=llm&numericFilters=created_at_i>{start_ts},created_at_i<{end_ts}"
-                f"&tags=story&hitsPerPage={limit}"
-            ),
+            ("search", "llm", span),
             # Fallback 2: date-sorted slice for the day.
-            (
-                "https://hn.algolia.com/api/v1/search_by_date"
-                f"?query=ai&numericFilters=created_at_i>{start_ts},created_at_i<{end_ts}"
-                f"&tags=story&hitsPerPage={limit}"
-            ),
+            ("search_by_date", "ai", span),
         ]
 
-        for idx, url in enumerate(queries, start=1):
-            try:
-                print(f"      - Querying Algolia for {target_date.date()} (attempt {idx})...")
-                resp = requests.get(url, timeout=15)
-                resp.raise_for_status()
-                data = resp.json()
-
-                stories = []
-                for hit in data.get('hits', []):
-                    title = hit.get('title') or hit.get('story_title') or ""
-                    link = hit.get('url') or hit.get('story_url') or ""
-                    if not title or not link:
-                        continue
-                    stories.append({
-                        'id': int(hit['objectID']),
-                        'title': title,
-                        'url': link,
-                        'score': hit.get('points', 0),
-                        'by': hit.get('author', 'unknown'),
-                        'time': hit.get('created_at_i', 0),
-                        'kids': hit.get('children', []),
-                    })
+    @staticmethod
+    def _hits_to_stories(hits: List[Dict]) -> List[Dict]:
+        stories = []
+        for hit in hits:
+            title = hit.get('title') or hit.get('story_title') or ""
+            link = hit.get('url') or hit.get('story_url') or ""
+            if not title or not link:
+                continue
+            stories.append({
+                'id': int(hit['objectID']),
+                'title': title,
+                'url': link,
+                'score': hit.get('points', 0),
+                'by': hit.get('author', 'unknown'),
+                'time': hit.get('created_at_i', 0),
+                'kids': hit.get('children', []),
+            })
+        return stories
 
-                if stories:
-                    return stories
+    def _algolia_search(self, endpoint: str, query: str, numeric_filters: str, hits_per_page: int) -> Dict:
+        """Run one Algolia query and return its first page (hits plus nbHits)"""
+        resp = guarded_get(
+            f"{self.algolia_api}/{endpoint}",
+            params={
+                'query': query,
+                'numericFilters': numeric_filters,
+                'tags': 'story',
+                'hitsPerPage': hits_per_page,
+            },
+            timeout=15,
+        )
+        resp.raise_for_status()
+        return resp.json()
+
+    def get_historical_stories(self, target_date: datetime, limit: int = 50) -> List[Dict]:
+        """Fetch top AI stories for a specific date using Algolia Search API"""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        start_ts = int(target_date.replace(hour=0, minute=0, second=0, microsecond=0).timestamp())
+        end_ts = start_ts + 86400
+        queries = self._algolia_queries(start_ts, end_ts)
+
+        def run(query):
+            try:
+                return self._hits_to_stories(self._algolia_search(*query, hits_per_page=limit).get('hits', []))
             except Exception as e:
-                print(f"      - Algolia attempt {idx} failed: {e}")
+                print(f"      - Algolia {query[0]} '{query[1]}' failed: {e}")
+                return []
+
+        # Fire primary and fallbacks together; keep the first non-empty by priority.
+        print(f"      - Querying Algolia for {target_date.date()} ({len(queries)} queries in parallel)...")
+        with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+            results = list(executor.map(run, queries))
 
+        for stories in results:
+            if stories:
+                return stories
         return []
 
+    def _algolia_window(self, priority: int, start: datetime, end: datetime) -> List[Dict]:
+        """Stories for one priority query over the days [start, end).
+
+        Algolia returns at most ALGOLIA_MAX_HITS per query, so a window that
+        matches more is split in half (down to single days) rather than paged.
+        """
+        from datetime import timedelta
+
+        endpoint, query, filters = self._algolia_queries(int(start.timestamp()), int(end.timestamp()))[priority]
+        data = self._algolia_search(endpoint, query, filters, hits_per_page=ALGOLIA_MAX_HITS)
+        span_days = (end - start).days
+        if data.get('nbHits', 0) > ALGOLIA_MAX_HITS and span_days > 1:
+            middle = start + timedelta(days=span_days // 2)
+            return self._algolia_window(priority, start, middle) + self._algolia_window(priority, middle, end)
+        return self._hits_to_stories(data.get('hits', []))
+
+    def get_historical_stories_range(self, start: datetime, end: datetime, limit: int = 50) -> Dict[str, List[Dict]]:
+        """Fetch a whole span of days in a few windowed queries, bucketed by YYYY-MM-DD.
+
+        The primary query runs for every ALGOLIA_RANGE_CHUNK_DAYS window. Each
+        fallback (same priority order as the single-day lookup) then runs only
+        over the windows that still have days short of `limit`, narrowed to
+        those days, and tops them up. Days with no hits are absent from the result.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from datetime import timedelta
+        
+        first_day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        last_day = end.replace(hour=0, minute=0, second=0, microsecond=0)
+        windows = []
+        window_start = first_day
+        while window_start <= last_day:
+            window_end = min(window_start + timedelta(days=ALGOLIA_RANGE_CHUNK_DAYS), last_day + timedelta(days=1))
+            windows.append((window_start, window_end))
+            window_start = window_end
+
+        def run(job):
+            priority, (window_start, window_end) = job
+            try:
+                return self._algolia_window(priority, window_start, window_end)
+            except Exception as e:
+                print(f"      - Algolia range query {priority} for {window_start.date()} failed: {e}")
+                return []
+
+        days: Dict[str, List[Dict]] = {}
+        seen_ids = set()
+        jobs = [(0, window) for window in windows]
+        print(f"      - Querying Algolia for {first_day.date()}..{last_day.date()} ({len(jobs)} window(s))...")
+        for priority in range(len(self._algolia_queries(0, 0))):
+            if priority:
+                # Narrow each window to the span of its days the earlier queries left short.
+                jobs = []
+                for window_start, window_end in windows:
+                    window_days = (window_start + timedelta(days=d) for d in range((window_end - window_start).days))
+                    short = [day for day in window_days if len(days.get(day.strftime("%Y-%m-%d"), [])) < limit]
+                    if short:
+                        jobs.append((priority, (short[0], short[-1] + timedelta(days=1))))
+                if not jobs:
+                    break
+            with ThreadPoolExecutor(max_workers=min(8, len(jobs))) as executor:
+                results = list(executor.map(run, jobs))
+            for stories in results:
+                for story in stories:
+                    day_key = datetime.fromtimestamp(story['time']).strftime("%Y-%m-%d")
+                    bucket = days.setdefault(day_key, [])
+                    if len(bucket) < limit and story['id'] not in seen_ids:
+                        seen_ids.add(story['id'])
+                        bucket.append(story)
+        return {day_key: stories for day_key, stories in days.items() if stories}
+
+    @staticmethod
+    def _load_watermark() -> int:
+        """Lowest HN item ID that may still fall inside the 24h window (0 if unknown)"""
+        try:
+            with open(CACHE_DIR / "hn_watermark.json", "r") as f:
+                return int(json.load(f).get("watermark", 0))
+        except Exception:
+            return 0
+
+    @staticmethod
+    def _save_watermark(watermark: int) -> None:
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            with open(CACHE_DIR / "hn_watermark.json", "w") as f:
+                json.dump({"watermark": watermark, "updated_at": datetime.now().isoformat()}, f, indent=2)
+        except Exception as e:
+            print(f"      - Could not persist HN watermark: {e}")
+
+    @staticmethod
+    def _advance_watermark(watermark: int, items: Dict[int, Dict | None], cutoff_time: float) -> int:
+        """HN IDs grow with creation time, so every ID up to the newest stale item is stale too."""
+        stale_ids = [i for i, item in items.items() if item and item.get('time', 0) <= cutoff_time]
+        if stale_ids:
+            watermark = max(watermark, max(stale_ids) + 1)
+        return watermark
+
     def get_top_stories(self, limit: int = None) -> List[Dict]:
         """Fetch stories from Top, Best, and New pools to ensure depth and quality"""
         if limit is None:
@@ -191,95 +500,194 @@ class HackerNewsScraper:
         
         # We'll pull from multiple endpoints to get a broader view
         endpoints = ["topstories", "beststories", "newstories"]
-        all_ids = []
+        ids_by_endpoint = {}
         
         try:
             for endpoint in endpoints:
                 # Top/New have 500, Best has 200. 
                 # We take a subset of each to stay efficient.
                 count = 100 if endpoint != "newstories" else 200
-                resp = requests.get(f"{self.hn_api}/{endpoint}.json", timeout=self.timeout)
-                all_ids.extend(resp.json()[:count])
+                resp = guarded_get(f"{self.hn_api}/{endpoint}.json", timeout=self.timeout)
+                ids_by_endpoint[endpoint] = resp.json()[:count]
             
             # Deduplicate IDs while maintaining some order (top/best first)
             unique_ids = []
             seen_ids = set()
-            for s_id in all_ids:
-                if s_id not in seen_ids:
-                    unique_ids.append(s_id)
-                    seen_ids.add(s_id)
+            for endpoint in endpoints:
+                for s_id in ids_by_endpoint[endpoint]:
+                    if s_id not in seen_ids:
+                        unique_ids.append(s_id)
+                        seen_ids.add(s_id)
 
-            import time
-            from concurrent.futures import ThreadPoolExecutor
             cutoff_time = time.time() - (24 * 3600)
+            watermark = self._load_watermark()
+            items: Dict[int, Dict | None] = {}
             
-            stories = []
-            print(f"      - Fetching details for {min(len(unique_ids), 400)} HN candidates in parallel...")
+            transport = "HTTP/2" if HTTP2_AVAILABLE else "HTTP/1.1"
+            print(f"      - Fetching HN candidates (async {transport}, concurrency={self.fetcher.concurrency}, "
+                  f"watermark={watermark or 'none'})...")
             
-            def fetch_and_filter(s_id):
-                story = self._get_story(s_id)
+            # newstories is sorted newest-first: walk it in batches and stop at the
+            # first batch that lies entirely outside the window.
+            new_ids = [i for i in ids_by_endpoint["newstories"] if i >= watermark]
+            for start in range(0, len(new_ids), HN_NEW_STORIES_BATCH):
+                batch = self.fetch_items(new_ids[start:start + HN_NEW_STORIES_BATCH])
+                items.update(batch)
+                live = [item for item in batch.values() if item]
+                if live and all(item.get('time', 0) <= cutoff_time for item in live):
+                    break
+            watermark = self._advance_watermark(watermark, items, cutoff_time)
+            
+            # Top/best candidates below the watermark are known to be too old.
+            candidate_ids = unique_ids[:400]
+            pending = [i for i in candidate_ids if i not in items and i >= watermark]
+            items.update(self.fetch_items(pending))
+            watermark = self._advance_watermark(watermark, items, cutoff_time)
+            self._save_watermark(watermark)
+            
+            pruned = sum(1 for i in candidate_ids if i not in items)
+            print(f"      - Fetched {len(candidate_ids) - pruned} of {len(candidate_ids)} HN candidates "
+                  f"({pruned} pruned as older than 24h)")
+            
+            stories = []
+            for s_id in candidate_ids:
+                story = items.get(s_id)
                 if story and story.get('time', 0) > cutoff_time and story.get('url'):
-                    return story
-                return None
-
-            with ThreadPoolExecutor(max_workers=20) as executor:
-                results = list(executor.map(fetch_and_filter, unique_ids[:400]))
+                    stories.append(story)
             
-            stories = [r for r in results if r is not None]
             return stories[:100]
         except Exception as e:
             print(f"Error fetching HackerNews: {e}")
             return []
     
-    def _get_story(self, story_id: int) -> Dict | None:
-        """Fetch individual story details"""
-        try:
-            response = requests.get(
-                f"{self.hn_api}/item/{story_id}.json",
-                timeout=self.timeout
-            )
-            data = response.json()
+    @staticmethod
+    def _normalize_item(story_id: int, data: Dict | None) -> Dict | None:
+        """Map a raw HN item payload to our story dict (None for dead/deleted)"""
+        # Filter out dead/deleted stories
+        if not data or data.get('deleted') or data.get('dead'):
+            return None
+        
+        return {
+            'id': story_id,
+            'title': data.get('title', ''),
+            'url': data.get('url', ''),
+            'score': data.get('score', 0),
+            'by': data.get('by', 'unknown'),
+            'time': data.get('time', 0),
+            'descendants': data.get('descendants', 0),
+            'type': data.get('type', 'story'),
+            'kids': data.get('kids', [])
+        }
+
+    def fetch_raw_items(self, item_ids: List[int]) -> Dict[int, Dict | None]:
+        """Raw HN item payloads, served from the item cache where possible"""
+        if not item_ids:
+            return {}
+        found, missing = self.item_cache.lookup(item_ids)
+        if missing:
+            url_to_id = {f"{self.hn_api}/item/{i}.json": i for i in missing}
+            failed = set()
             
-            # Filter out dead/deleted stories
-            if not data or data.get('deleted') or data.get('dead'):
-                return None
+            def report(url, e):
+                failed.add(url_to_id.get(url))
+                print(f"Error fetching story {url_to_id.get(url)}: {e}")
             
-            return {
-                'id': story_id,
-                'title': data.get('title', ''),
-                'url': data.get('url', ''),
-                'score': data.get('score', 0),
-                'by': data.get('by', 'unknown'),
-                'time': data.get('time', 0),
-                'descendants': data.get('descendants', 0),
-                'type': data.get('type', 'story'),
-                'kids': data.get('kids', [])
-            }
-        except Exception as e:
-            print(f"Error fetching story {story_id}: {e}")
-            return None
+            payloads = self.fetcher.fetch_json(url_to_id.keys(), on_error=report)
+            fetched = {i: payloads.get(url) for url, i in url_to_id.items()}
+            # Transport errors are retried next time; null/dead/deleted items are cached as-is.
+            self.item_cache.store({i: data for i, data in fetched.items() if i not in failed})
+            found.update(fetched)
+        return found
+
+    def fetch_items(self, item_ids: List[int]) -> Dict[int, Dict | None]:
+        """Fetch many HN items concurrently over one pooled client"""
+        raw = self.fetch_raw_items(item_ids)
+        return {i: self._normalize_item(i, raw.get(i)) for i in item_ids}
+    
+    def _get_story(self, story_id: int) -> Dict | None:
+        """Fetch individual story details"""
+        return self.fetch_items([story_id]).get(story_id)
 
     def fetch_hn_comments(self, kid_ids: List[int], limit: int = 5) -> List[str]:
         """Fetch top-level comments for an HN item"""
-        comments = []
         if not kid_ids: return []
         
-        def fetch_comment(c_id):
-            try:
-                resp = requests.get(f"{self.hn_api}/item/{c_id}.json", timeout=5)
-                data = resp.json()
-                if data and not data.get('deleted') and not data.get('dead') and data.get('text'):
-                    # Clean HTML tags from HN comments
-                    text = BeautifulSoup(data['text'], 'html.parser').get_text()
-                    return text[:500] # Truncate long comments
-                return None
-            except: return None
+        payloads = self.fetch_raw_items(kid_ids[:limit])
+        comments = []
+        for c_id in kid_ids[:limit]:
+            data = payloads.get(c_id)
+            if data and not data.get('deleted') and not data.get('dead') and data.get('text'):
+                comments.append(html_to_text(data['text'])[:HN_COMMENT_CHARS]) # Truncate long comments
+        return comments
 
-        from concurrent.futures import ThreadPoolExecutor
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            results = list(executor.map(fetch_comment, kid_ids[:limit]))
-        
-        return [r for r in results if r]
+    def fetch_comment_trees(self, item_ids: List[int], max_depth: int = None, max_items: int = None,
+                            max_bytes: int = None) -> Dict[int, List[Dict]]:
+        """Walk the comment trees of several items breadth-first, one pooled batch per level.
+
+        Each tree stops at `max_depth` levels below its item, or once
+        `max_items` comments / `max_bytes` of comment text have been collected.
+        Returns {item_id: [{'id', 'parent', 'depth', 'by', 'text'}]}, top-level
+        comments first. Trees whose `descendants` count is unchanged since the
+        last walk come from the cache without any comment requests.
+        """
+        max_depth = HN_COMMENT_DEPTH if max_depth is None else max_depth
+        max_items = HN_COMMENT_MAX_ITEMS if max_items is None else max_items
+        max_bytes = HN_COMMENT_MAX_BYTES if max_bytes is None else max_bytes
+        budget = [max_depth, max_items, max_bytes]
+
+        trees: Dict[int, List[Dict]] = {}
+        walks = {}  # item_id -> {'level': [(kid, parent)], 'bytes': int, 'full': bool, 'descendants': int}
+        roots = self.fetch_raw_items(item_ids)
+        for item_id in dict.fromkeys(item_ids):
+            root = roots.get(item_id)
+            if not root or not root.get('kids'):
+                trees[item_id] = []
+                continue
+            descendants = root.get('descendants', len(root['kids']))
+            cached = self.comment_trees.get(item_id, descendants, budget)
+            if cached is not None:
+                trees[item_id] = cached
+                continue
+            trees[item_id] = []
+            walks[item_id] = {'level': [(kid, item_id) for kid in root['kids']], 'bytes': 0,
+                              'full': False, 'descendants': descendants}
+
+        for depth in range(max_depth):
+            active = {i: w for i, w in walks.items() if w['level'] and not w['full']}
+            if not active:
+                break
+            for item_id, walk in active.items():
+                walk['level'] = walk['level'][:max_items - len(trees[item_id])]
+            payloads = self.fetch_raw_items([kid for w in active.values() for kid, _ in w['level']])
+            for item_id, walk in active.items():
+                comments = trees[item_id]
+                next_level = []
+                for kid, parent in walk['level']:
+                    data = payloads.get(kid)
+                    if not data or data.get('deleted') or data.get('dead'):
+                        continue
+                    text = html_to_text(data.get('text', ''))[:HN_COMMENT_CHARS]
+                    if text:
+                        if walk['bytes'] + len(text) > max_bytes:
+                            walk['full'] = True
+                            break
+                        comments.append({'id': kid, 'parent': parent, 'depth': depth, 'by': data.get('by', ''), 'text': text})
+                        walk['bytes'] += len(text)
+                    next_level.extend((child, kid) for child in data.get('kids', []))
+                walk['level'] = next_level
+                walk['full'] = walk['full'] or len(comments) >= max_items
+
+        for item_id, walk in walks.items():
+            self.comment_trees.put(item_id, walk['descendants'], budget, trees[item_id])
+        self.comment_trees.save()
+        return trees
+
+    def fetch_comment_tree(self, item_id: int, **budget) -> List[Dict]:
+        return self.fetch_comment_trees([item_id], **budget).get(item_id, [])
+
+    def fetch_comment_texts(self, item_id: int, limit: int = 5, **budget) -> List[str]:
+        """Comment texts from the item's tree, top-level first"""
+        return [c['text'] for c in self.fetch_comment_tree(item_id, **budget)[:limit]]
 
 
 class RSSFeedScraper:
@@ -288,8 +696,19 @@ class RSSFeedScraper:
     # RSS feeds from config.py
     AI_LAB_FEEDS = RSS_FEEDS
     
-    def __init__(self):
+    def __init__(self, incremental: bool = None):
         self.timeout = 10
+        self.last_report: Dict[str, Dict] = {}
+        # Entries handed downstream but not yet marked seen, keyed by feed URL; see commit_state().
+        self.pending_state: Dict[str, List] = {}
+        if incremental is None:
+            incremental = RSS_INCREMENTAL
+        self.state = None
+        if incremental:
+            try:
+                self.state = FeedStateStore()
+            except Exception as e:
+                print(f"Feed state store unavailable, ingesting feeds in full: {e}")
 
     @staticmethod
     def _entry_datetime(entry) -> datetime | None:
@@ -315,55 +734,187 @@ class RSSFeedScraper:
                 continue
         return None
         
-    def fetch_feed(self, feed_url: str, limit: int = None, target_date: datetime = None) -> List[Dict]:
-        """Fetch entries from a single RSS feed"""
+    def _fetch_feed_entries(self, feed_url: str, limit: int = None, target_date: datetime = None,
+                            timeout: float = None) -> tuple[List[Dict], bool, List]:
+        """Download and parse one feed; raises on failure.
+
+        Returns (entries, served_from_cache, emitted) where `emitted` holds the
+        (guid, published) pairs of new entries for commit_state(); nothing is
+        recorded here, since the caller may still drop the feed.
+        """
         if limit is None:
             limit = RSS_STORIES_PER_FEED
-        try:
-            feed = feedparser.parse(feed_url)
-            
-            if feed.bozo:
-                print(f"Feed parsing warning for {feed_url}: {feed.bozo_exception}")
-            
-            entries = []
-            # For historical backfills, scan more entries and keep only target-day posts.
-            feed_entries = feed.entries
+        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
+        response = get_http_cache().get(feed_url, headers=headers, timeout=timeout or self.timeout)
+        response.raise_for_status()
+        feed = feedparser.parse(
+            response.content,
+            response_headers={'content-type': response.headers.get('Content-Type', '')},
+        )
+        
+        if feed.bozo:
+            print(f"Feed parsing warning for {feed_url}: {feed.bozo_exception}")
+        
+        entries = []
+        # For historical backfills, scan more entries and keep only target-day posts.
+        feed_entries = feed.entries
+        if target_date:
+            feed_entries = feed.entries[:150]
+        # Daily runs only emit entries newer than what earlier runs already emitted.
+        incremental = self.state is not None and not target_date
+        emitted = []
+
+        for entry in feed_entries:
+            entry_dt = self._entry_datetime(entry)
             if target_date:
-                feed_entries = feed.entries[:150]
+                # Without a trustworthy timestamp we cannot map to a historical day.
+                if not entry_dt or entry_dt.date() != target_date.date():
+                    continue
+            if incremental:
+                guid = entry.get('id') or entry.get('link') or entry.get('title', '')
+                published_ts = entry_dt.replace(tzinfo=timezone.utc).timestamp() if entry_dt else None
+                if not guid or not self.state.is_new(feed_url, guid, published_ts):
+                    continue
+                emitted.append((guid, published_ts))
 
-            for entry in feed_entries:
-                entry_dt = self._entry_datetime(entry)
-                if target_date:
-                    # Without a trustworthy timestamp we cannot map to a historical day.
-                    if not entry_dt or entry_dt.date() != target_date.date():
-                        continue
+            entries.append({
+                'title': entry.get('title', ''),
+                'link': entry.get('link', ''),
+                'published': entry.get('published', ''),
+                'summary': entry.get('summary', '')[:200],  # Truncate
+                'source': feed.feed.get('title', 'Unknown'),
+            })
 
-                entries.append({
-                    'title': entry.get('title', ''),
-                    'link': entry.get('link', ''),
-                    'published': entry.get('published', ''),
-                    'summary': entry.get('summary', '')[:200],  # Truncate
-                    'source': feed.feed.get('title', 'Unknown'),
-                })
+            if limit and len(entries) >= limit:
+                break
+        
+        return entries, response.from_cache, emitted
 
-                if limit and len(entries) >= limit:
-                    break
-            
+    def fetch_feed(self, feed_url: str, limit: int = None, target_date: datetime = None) -> List[Dict]:
+        """Fetch entries from a single RSS feed"""
+        try:
+            entries, _, emitted = self._fetch_feed_entries(feed_url, limit, target_date=target_date)
+            if emitted:
+                self.pending_state.setdefault(feed_url, []).extend(emitted)
             return entries
         except Exception as e:
             print(f"Error parsing feed {feed_url}: {e}")
             return []
     
     def fetch_all_feeds(self, limit_per_feed: int = 5, target_date: datetime = None) -> Dict[str, List[Dict]]:
-        """Fetch from all AI lab feeds"""
-        results = {}
+        """Fetch all AI lab feeds concurrently, giving each feed a hard deadline"""
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+        
+        feeds = dict(self.AI_LAB_FEEDS)
+        results = {name: [] for name in feeds}
+        report = {}
+        started = {}
+        
+        def fetch_one(name, url):
+            started[name] = time.monotonic()
+            return self._fetch_feed_entries(url, limit_per_feed, target_date=target_date,
+                                            timeout=min(self.timeout, RSS_FEED_DEADLINE))
+        
+        print(f"Fetching {len(feeds)} feeds (workers={RSS_FETCH_WORKERS}, deadline={RSS_FEED_DEADLINE}s)...")
+        phase_start = time.monotonic()
+        executor = ThreadPoolExecutor(max_workers=RSS_FETCH_WORKERS)
+        pending = {executor.submit(fetch_one, name, url): name for name, url in feeds.items()}
+        try:
+            while pending:
+                done, _ = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = pending.pop(future)
+                    elapsed = time.monotonic() - started.get(name, phase_start)
+                    try:
+                        entries, from_cache, emitted = future.result()
+                        results[name] = entries
+                        if emitted:
+                            self.pending_state.setdefault(feeds[name], []).extend(emitted)
+                        report[name] = {'status': 'cached' if from_cache else 'ok',
+                                        'latency': elapsed, 'entries': len(entries)}
+                    except Exception as e:
+                        report[name] = {'status': 'error', 'latency': elapsed, 'entries': 0,
+                                        'error': str(e)[:80]}
+                
+                # Abandon feeds that have run past their deadline; queued feeds keep waiting.
+                now = time.monotonic()
+                for future, name in list(pending.items()):
+                    if name in started and now - started[name] > RSS_FEED_DEADLINE:
+                        pending.pop(future)
+                        future.cancel()
+                        report[name] = {'status': 'timeout', 'latency': now - started[name], 'entries': 0}
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
         
-        for lab_name, feed_url in self.AI_LAB_FEEDS.items():
-            print(f"Fetching {lab_name}...")
-            results[lab_name] = self.fetch_feed(feed_url, limit_per_feed, target_date=target_date)
+        for name in feeds:
+            info = report.get(name, {'status': 'skipped', 'latency': 0.0, 'entries': 0})
+            mark = "✓" if info['status'] in ('ok', 'cached') else "✗"
+            detail = f"{info['entries']} entries" if mark == "✓" else info.get('error', info['status'])
+            print(f"   {mark} {name:<20} {info['status']:<7} {info['latency']:5.2f}s  {detail}")
+        print(f"   RSS phase took {time.monotonic() - phase_start:.2f}s")
         
+        self.last_report = report
         return results
 
+    def commit_state(self) -> int:
+        """Mark the entries handed out so far as seen; call once the edition using them is written"""
+        if self.state is None:
+            self.pending_state.clear()
+            return 0
+        committed = 0
+        for feed_url, emitted in self.pending_state.items():
+            self.state.record(feed_url, emitted)
+            committed += len(emitted)
+        self.pending_state.clear()
+        return committed
+
+
+class ArticleDateCache:
+    """Publish dates already resolved for article URLs, persisted between runs"""
+
+    def __init__(self, path: Path = None):
+        self.path = path
+        self._dates: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        if self.path:
+            try:
+                with open(self.path, "r") as f:
+                    self._dates = json.load(f)
+            except Exception:
+                self._dates = {}
+
+    def get(self, url: str) -> str | None:
+        """Cached date ('' if known to be undated), or None when the page must be probed"""
+        with self._lock:
+            entry = self._dates.get(url)
+        if not entry:
+            return None
+        if not entry.get("published") and time.time() - entry.get("checked_at", 0) > ARTICLE_DATE_RETRY_TTL:
+            return None
+        return entry.get("published", "")
+
+    def put(self, url: str, published: str):
+        with self._lock:
+            self._dates[url] = {"published": published, "checked_at": time.time()}
+            self._dirty = True
+
+    def save(self):
+        if not self.path:
+            return
+        cutoff = time.time() - ARTICLE_DATE_RETENTION
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {u: e for u, e in self._dates.items() if e.get("checked_at", 0) >= cutoff}
+            self._dirty = False
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "w") as f:
+                json.dump(payload, f)
+        except Exception as e:
+            print(f"      - Could not persist article date cache: {e}")
+
 
 class GenericWebScraper:
     """Fallback scraper for sites without RSS feeds"""
@@ -388,25 +939,30 @@ class GenericWebScraper:
     def _extract_article_published(article_url: str, headers: Dict[str, str]) -> str:
         """Try hard to extract article publication date from metadata."""
         try:
-            response = requests.get(article_url, timeout=10, headers=headers)
+            response = get_http_cache().get(article_url, headers=headers, timeout=10, ttl=HTTP_CACHE_ARTICLE_TTL,
+                                            max_bytes=HTML_MAX_BYTES)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
 
-            date_candidates = []
-            for meta in soup.find_all("meta"):
-                k = (meta.get("property") or meta.get("name") or meta.get("itemprop") or "").lower()
-                v = meta.get("content")
-                if not v:
-                    continue
-                if any(token in k for token in ("published", "publish", "date", "modified", "updated", "article:published_time")):
-                    date_candidates.append(v)
+            def meta_dates(page):
+                for meta in page.metas:
+                    k = (meta.get("property") or meta.get("name") or meta.get("itemprop") or "").lower()
+                    v = meta.get("content")
+                    if v and any(token in k for token in ("published", "publish", "date", "modified", "updated")):
+                        yield v
 
-            for time_tag in soup.find_all("time"):
-                if time_tag.get("datetime"):
-                    date_candidates.append(time_tag.get("datetime"))
-                txt = time_tag.get_text(strip=True)
-                if txt:
-                    date_candidates.append(txt)
+            # Metadata dates win, so once <head> has one the body is irrelevant.
+            page = extract_page_meta(
+                response.text,
+                stop_after_head=lambda p: any(GenericWebScraper._normalize_published(v) for v in meta_dates(p)),
+                collect_text=True,
+            )
+
+            date_candidates = list(meta_dates(page))
+            for time_tag in page.times:
+                if time_tag["datetime"]:
+                    date_candidates.append(time_tag["datetime"])
+                if time_tag["text"]:
+                    date_candidates.append(time_tag["text"])
 
             for candidate in date_candidates:
                 normalized = GenericWebScraper._normalize_published(candidate)
@@ -414,18 +970,9 @@ class GenericWebScraper:
                     return normalized
 
             # Some sites (e.g., Anthropic news) render date in visible text only.
-            page_text = soup.get_text(" ", strip=True)
-            text_match = re.search(
-                r"\b(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+(\d{1,2}),\s*(\d{4})\b",
-                page_text,
-                re.IGNORECASE,
-            )
-            if text_match:
-                normalized = f"{text_match.group(1).title()} {int(text_match.group(2))}, {text_match.group(3)}"
-                return datetime.strptime(normalized, "%b %d, %Y").isoformat()
+            return GenericWebScraper._extract_date_from_text(page.text)
         except Exception:
             return ""
-        return ""
 
     @staticmethod
     def _extract_date_from_text(text: str) -> str:
@@ -446,71 +993,115 @@ class GenericWebScraper:
             return ""
     
     @staticmethod
-    def scrape_blog(name: str, url: str, limit: int = 3) -> List[Dict]:
-        """Simple heuristic scraper to find article links on a blog page"""
-        try:
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-            response = requests.get(url, timeout=10, headers=headers)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            stories = []
-            base_host = urlparse(url).netloc.lower().lstrip("www.")
-            
-            # Find all links that look like articles
-            # We look for links within h1, h2, h3 or with 'article' in class
-            links = []
-            for tag in soup.find_all(['a']):
-                href = tag.get('href')
-                if not href or href.startswith('#') or len(href) < 5:
-                    continue
-                
-                full_url = urljoin(url, href)
-                if not full_url.startswith("http"):
-                    continue
+    def _discover_links(name: str, url: str, html: str, limit: int) -> List[Dict]:
+        """Shortlist article links on a listing page (no per-article requests)"""
+        soup = BeautifulSoup(html, 'html.parser')
+        stories = []
+        seen = set()
+        base_host = urlparse(url).netloc.lower().lstrip("www.")
 
-                parsed = urlparse(full_url)
-                host = parsed.netloc.lower().lstrip("www.")
-                path = (parsed.path or "").lower()
-                if host and base_host and host != base_host and not host.endswith(f".{base_host}"):
-                    continue
-                if any(full_url.lower().startswith(s) for s in ("mailto:", "tel:")):
+        # Find all links that look like articles
+        # We look for links within h1, h2, h3 or with 'article' in class
+        for tag in soup.find_all(['a']):
+            href = tag.get('href')
+            if not href or href.startswith('#') or len(href) < 5:
+                continue
+
+            full_url = urljoin(url, href)
+            if not full_url.startswith("http") or full_url in seen:
+                continue
+
+            parsed = urlparse(full_url)
+            host = parsed.netloc.lower().lstrip("www.")
+            path = (parsed.path or "").lower()
+            if host and base_host and host != base_host and not host.endswith(f".{base_host}"):
+                continue
+            if any(full_url.lower().startswith(s) for s in ("mailto:", "tel:")):
+                continue
+            if any(token in full_url.lower() for token in ("twitter.com", "x.com", "linkedin.com", "facebook.com", "instagram.com", "youtube.com")):
+                continue
+
+            title = tag.get_text().strip()
+
+            # Title must be reasonably long to be a headline
+            if len(title) < 15:
+                # Try finding title in parent or sibling
+                parent_text = tag.parent.get_text().strip()
+                if 15 < len(parent_text) < 200:
+                    title = parent_text
+
+            if len(title) > 15:
+                if not any(token in path for token in ("/news", "/blog", "/research", "/index")):
                     continue
-                if any(token in full_url.lower() for token in ("twitter.com", "x.com", "linkedin.com", "facebook.com", "instagram.com", "youtube.com")):
+                # Tighten source-specific paths for better precision.
+                if "anthropic.com" in host and "/news/" not in path:
                     continue
 
-                title = tag.get_text().strip()
-                
-                # Title must be reasonably long to be a headline
-                if len(title) < 15:
-                    # Try finding title in parent or sibling
-                    parent_text = tag.parent.get_text().strip()
-                    if 15 < len(parent_text) < 200:
-                        title = parent_text
-                
-                if len(title) > 15 and full_url not in [s['link'] for s in stories]:
-                    if not any(token in path for token in ("/news", "/blog", "/research", "/index")):
-                        continue
-                    # Tighten source-specific paths for better precision.
-                    if "anthropic.com" in host and "/news/" not in path:
-                        continue
+                # Filter for relevance to the lab name or generic AI terms
+                if any(x in title.lower() or x in full_url.lower() for x in ['news', 'blog', '2024', '2025', '2026', name.lower()]):
+                    seen.add(full_url)
+                    stories.append({
+                        'title': title,
+                        'link': full_url,
+                        'published': '',
+                        'summary': '',
+                        'source': name.title()
+                    })
 
-                    # Filter for relevance to the lab name or generic AI terms
-                    if any(x in title.lower() or x in full_url.lower() for x in ['news', 'blog', '2024', '2025', '2026', name.lower()]):
-                        published = GenericWebScraper._extract_article_published(full_url, headers)
-                        if not published:
-                            published = GenericWebScraper._extract_date_from_text(title)
-                        stories.append({
-                            'title': title,
-                            'link': full_url,
-                            'published': published,
-                            'summary': '',
-                            'source': name.title()
-                        })
-                
-                if len(stories) >= limit:
-                    break
-            
+            if len(stories) >= limit:
+                break
+        return stories
+
+    @staticmethod
+    def _resolve_dates(stories: List[Dict], headers: Dict[str, str], date_cache: ArticleDateCache,
+                       deadline: float = None) -> int:
+        """Fill story['published'] by probing article pages concurrently within `deadline` seconds.
+
+        Returns how many probes were cut off by the deadline.
+        """
+        from concurrent.futures import ThreadPoolExecutor, wait
+
+        deadline = BLOG_DATE_PROBE_DEADLINE if deadline is None else deadline
+        pending = []
+        for story in stories:
+            cached = date_cache.get(story['link'])
+            if cached is None:
+                pending.append(story)
+            else:
+                story['published'] = cached
+
+        timed_out = 0
+        if pending:
+            executor = ThreadPoolExecutor(max_workers=min(BLOG_DATE_PROBE_WORKERS, len(pending)))
+            futures = {
+                executor.submit(GenericWebScraper._extract_article_published, story['link'], headers): story
+                for story in pending
+            }
+            done, not_done = wait(futures, timeout=deadline)
+            executor.shutdown(wait=False, cancel_futures=True)
+            for future in done:
+                published = future.result()
+                futures[future]['published'] = published
+                date_cache.put(futures[future]['link'], published)
+            timed_out = len(not_done)
+
+        for story in stories:
+            if not story['published']:
+                story['published'] = GenericWebScraper._extract_date_from_text(story['title'])
+        return timed_out
+
+    @staticmethod
+    def scrape_blog(name: str, url: str, limit: int = 3, date_cache: ArticleDateCache = None) -> List[Dict]:
+        """Simple heuristic scraper to find article links on a blog page"""
+        try:
+            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
+            response = get_http_cache().get(url, headers=headers, timeout=10)
+            response.raise_for_status()
+
+            stories = GenericWebScraper._discover_links(name, url, response.text, limit)
+            timed_out = GenericWebScraper._resolve_dates(stories, headers, date_cache or ArticleDateCache())
+            if timed_out:
+                print(f"      - {name}: {timed_out} date probe(s) exceeded {BLOG_DATE_PROBE_DEADLINE:.0f}s, using link text")
             return stories
         except Exception as e:
             print(f"Error scraping {url}: {e}")
@@ -521,6 +1112,8 @@ class NewsAggregator:
     
     # Keywords from config.py
     AI_KEYWORDS = AI_KEYWORDS
+    # Expanded keywords for local check, compiled once
+    RELEVANCE_MATCHER = KeywordMatcher(AI_KEYWORDS + ['learning', 'neural', 'robot', 'compute', 'data', 'algorithm', 'model'])
     
     def __init__(self):
         self.hn_scraper = HackerNewsScraper()
@@ -531,20 +1124,28 @@ class NewsAggregator:
             self.labs_to_scrape = LABS_TO_SCRAPE
         except ImportError:
             self.labs_to_scrape = {}
+        self.article_dates = ArticleDateCache(CACHE_DIR / "article_dates.json")
+        # Historical HN buckets prefetched for a backfill span, keyed YYYY-MM-DD.
+        self.historical_hn: Dict[str, List[Dict]] = {}
+    
+    def close(self):
+        """Persist the HN item cache and release pooled connections once the run is done with HackerNews"""
+        self.hn_scraper.close()
+
+    def prefetch_historical(self, start: datetime, end: datetime) -> None:
+        """Load HN history for a whole date span up front (used by multi-day backfills)"""
+        self.historical_hn.update(self.hn_scraper.get_historical_stories_range(start, end))
+        print(f"   ✓ Prefetched HN history for {len(self.historical_hn)} day(s)")
     
     def filter_ai_stories(self, stories: List[Dict]) -> List[Dict]:
         """Filter stories by AI relevance - be more permissive"""
         filtered = []
         
-        # Expanded keywords for local check
-        local_keywords = self.AI_KEYWORDS + ['learning', 'neural', 'robot', 'compute', 'data', 'algorithm', 'model']
-        
         for story in stories:
-            title = story.get('title', '').lower()
-            url = story.get('url', '').lower()
-            
             # Check if contains AI keywords - case insensitive
-            if any(keyword.lower() in title or keyword.lower() in url for keyword in local_keywords):
+            terms = self.RELEVANCE_MATCHER.matches(story.get('title', ''), story.get('url', ''))
+            if terms:
+                story['matched_keywords'] = terms
                 filtered.append(story)
             
         return filtered
@@ -556,7 +1157,9 @@ class NewsAggregator:
         
         # Get HackerNews stories
         if target_date and target_date.date() < datetime.now().date():
-            hn_stories = self.hn_scraper.get_historical_stories(target_date)
+            hn_stories = self.historical_hn.get(target_date.strftime("%Y-%m-%d"))
+            if not hn_stories:
+                hn_stories = self.hn_scraper.get_historical_stories(target_date)
         else:
             hn_stories = self.hn_scraper.get_top_stories()
             
@@ -574,10 +1177,13 @@ class NewsAggregator:
             
             def scrape_one(item):
                 name, url = item
-                return name, GenericWebScraper.scrape_blog(name, url, limit=3)
+                return name, GenericWebScraper.scrape_blog(name, url, limit=3, date_cache=self.article_dates)
 
+            phase_start = time.monotonic()
             with ThreadPoolExecutor(max_workers=10) as executor:
                 results = list(executor.map(scrape_one, self.labs_to_scrape.items()))
+            self.article_dates.save()
+            print(f"   Blog scraping phase took {time.monotonic() - phase_start:.2f}s")
             
             for name, stories in results:
                 scraped_results[name] = stories
@@ -590,6 +1196,11 @@ class NewsAggregator:
             else:
                 all_rss_combined[name] = stories
         
+        http_cache = get_http_cache()
+        http_cache.flush()
+        print(f"HTTP cache: {http_cache.summary()}")
+        print(f"Host guard: {get_host_guard().summary()}")
+        
         return {
             'timestamp': datetime.now().isoformat(),
             'hackernews': hn_filtered[:50],
@@ -601,6 +1212,7 @@ if __name__ == "__main__":
     # Test scraper
     aggregator = NewsAggregator()
     news = aggregator.aggregate_all()
+    aggregator.close()
     
     print(f"\nFound {len(news['hackernews'])} AI stories on HackerNews")
     print("\nTop 5 stories:")
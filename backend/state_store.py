@@ -0,0 +1,77 @@
+"""SQLite-backed run-to-run state: per-feed high-water marks for incremental RSS ingestion"""
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from http_cache import CACHE_DIR
+
+# GUIDs older than this are forgotten; the timestamp mark still screens them out.
+SEEN_RETENTION_SECONDS = 60 * 86400
+
+
+class FeedStateStore:
+    """Remembers the newest entry emitted per feed so only new entries go downstream.
+
+    An entry counts as new when its GUID has not been emitted before and it is
+    not older than the feed's high-water mark (the newest published timestamp
+    emitted so far). Entries without a timestamp are judged by GUID alone.
+    """
+
+    def __init__(self, path: Path = None):
+        self.path = Path(path or CACHE_DIR / "feed_state.sqlite3")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS feed_marks ("
+                " feed TEXT PRIMARY KEY, newest_published REAL, newest_guid TEXT, updated_at REAL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS seen_entries ("
+                " feed TEXT, guid TEXT, published REAL, first_seen REAL, PRIMARY KEY (feed, guid))"
+            )
+
+    def get_mark(self, feed: str) -> Tuple[Optional[float], Optional[str]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT newest_published, newest_guid FROM feed_marks WHERE feed = ?", (feed,)
+            ).fetchone()
+        return (row[0], row[1]) if row else (None, None)
+
+    def is_new(self, feed: str, guid: str, published: Optional[float]) -> bool:
+        mark, _ = self.get_mark(feed)
+        if published is not None and mark is not None and published < mark:
+            return False
+        with self._lock:
+            seen = self._conn.execute(
+                "SELECT 1 FROM seen_entries WHERE feed = ? AND guid = ?", (feed, guid)
+            ).fetchone()
+        return seen is None
+
+    def record(self, feed: str, emitted: List[Tuple[str, Optional[float]]]) -> None:
+        """Persist emitted (guid, published) pairs and advance the feed's mark"""
+        if not emitted:
+            return
+        now = time.time()
+        mark, mark_guid = self.get_mark(feed)
+        for guid, published in emitted:
+            if published is not None and (mark is None or published > mark):
+                mark, mark_guid = published, guid
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO seen_entries (feed, guid, published, first_seen) VALUES (?, ?, ?, ?)",
+                [(feed, guid, published, now) for guid, published in emitted],
+            )
+            self._conn.execute(
+                "INSERT INTO feed_marks (feed, newest_published, newest_guid, updated_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(feed) DO UPDATE SET newest_published = excluded.newest_published,"
+                " newest_guid = excluded.newest_guid, updated_at = excluded.updated_at",
+                (feed, mark, mark_guid, now),
+            )
+            self._conn.execute(
+                "DELETE FROM seen_entries WHERE first_seen < ?", (now - SEEN_RETENTION_SECONDS,)
+            )
+
@@ -1,9 +1,73 @@
+import asyncio
+import atexit
+import io
+import json
+import os
+import random
+import re
+import struct
+import sys
+import tempfile
+import threading
+import time
+import types
 import unittest
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+import httpx
+import requests
+
+import http_cache
+import model_scheduler
 from llm_router import LLMRouter
 from processor_with_router import NewsProcessorWithRouter
 from scraper import ImageFetcher
 
+CACHE_MODULES = ('http_cache', 'llm_cache', 'model_scheduler', 'scraper', 'state_store')
+_scratch = None
+_patches = []
+
+
+def setUpModule():
+    """Point every run-state file (caches, feed state, model stats) at a scratch dir instead of output/cache"""
+    global _scratch
+    _scratch = tempfile.TemporaryDirectory()
+    cache_dir = Path(_scratch.name)
+    _patches.extend(mock.patch(f'{module}.CACHE_DIR', cache_dir) for module in CACHE_MODULES)
+    _patches.append(mock.patch('local_classifier.NEGATIVES_PATH', cache_dir / 'irrelevant_stories.json'))
+    for patch in _patches:
+        patch.start()
+
+
+def tearDownModule():
+    # The shared singletons were built inside the scratch dir; don't let their exit hooks recreate it.
+    if http_cache._shared_cache is not None:
+        atexit.unregister(http_cache._shared_cache.flush)
+    if model_scheduler._shared_scheduler is not None:
+        atexit.unregister(model_scheduler._shared_scheduler.save)
+    for patch in reversed(_patches):
+        patch.stop()
+    _scratch.cleanup()
+
+
 class TestDailyTokenUnits(unittest.TestCase):
+
+    def setUp(self):
+        scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch.cleanup)
+        self.tmp = Path(scratch.name)
+
+    @staticmethod
+    def _bare_hn_scraper(**attrs):
+        """HackerNewsScraper without its pooled client or on-disk caches; tests attach stubs"""
+        from scraper import HackerNewsScraper
+        hn = HackerNewsScraper.__new__(HackerNewsScraper)
+        hn.hn_api = 'https://hn.example/v0'
+        vars(hn).update(attrs)
+        return hn
     
     def test_router_pick_model(self):
         router = LLMRouter()
@@ -38,6 +102,658 @@ class TestDailyTokenUnits(unittest.TestCase):
         self.assertEqual(len(filtered), 1)
         self.assertIn('LLM', filtered[0]['title'])
 
+    def test_http_cache_revalidation(self):
+        from http_cache import HTTPCache
+
+        def fake_get(url, headers=None, timeout=None):
+            resp = requests.Response()
+            resp.url = url
+            if headers and headers.get('If-None-Match') == '"v1"':
+                resp.status_code = 304
+                resp._content = b''
+            else:
+                resp.status_code = 200
+                resp._content = b'<rss>body</rss>'
+                resp.headers['ETag'] = '"v1"'
+            return resp
+
+        cache = HTTPCache(root=self.tmp, default_ttl=60)
+        with mock.patch('http_cache.requests.get', side_effect=fake_get) as get:
+            first = cache.get('https://example.com/feed.xml')
+            second = cache.get('https://example.com/feed.xml')
+            self.assertEqual(get.call_count, 1)
+            third = cache.get('https://example.com/feed.xml', ttl=0)
+        self.assertFalse(first.from_cache)
+        self.assertTrue(second.from_cache)
+        self.assertTrue(third.revalidated)
+        self.assertEqual(third.content, b'<rss>body</rss>')
+        self.assertEqual(cache.stats['hits'], 1)
+        self.assertEqual(cache.stats['revalidated'], 1)
+
+    def test_http_cache_respects_read_caps_and_batches_index_writes(self):
+        from http_cache import HTTPCache
+        body = b'<html>' + b'x' * 100 + b'</html>'
+
+        def fake_get(url, headers=None, timeout=None, stream=False):
+            resp = requests.Response()
+            resp.url = url
+            resp.status_code = 200
+            resp.raw = io.BytesIO(body)
+            return resp
+
+        cache = HTTPCache(root=self.tmp, default_ttl=60)
+        with mock.patch('http_cache.requests.get', side_effect=fake_get) as get, \
+                mock.patch('http_cache.HTTP_CACHE_FLUSH_EVERY', 3):
+            self.assertEqual(cache.get('https://a.example/', max_bytes=16).content, body[:16])
+            self.assertEqual(cache.get('https://a.example/', max_bytes=16).content, body[:16])  # same cap: hit
+            self.assertEqual(cache.get('https://a.example/').content, body)  # truncated copy is not a full body
+            self.assertEqual(get.call_count, 2)
+            self.assertFalse((self.tmp / 'index.json').exists())  # two changes, not yet flushed
+            self.assertEqual(cache.get('https://a.example/', max_bytes=8).content, body[:8])  # cut from the full body
+            cache.get('https://b.example/')
+            self.assertTrue((self.tmp / 'index.json').exists())
+        self.assertEqual(get.call_count, 3)
+        index = HTTPCache(root=self.tmp)._index
+        # Both copies survive, so neither kind of read refetches on the next run.
+        self.assertEqual(index[HTTPCache._key('https://a.example/')]['size'], len(body))
+        self.assertEqual(index[HTTPCache._key('https://a.example/', 16)]['size'], 16)
+
+    def test_dedupe_merges_cross_source_copies(self):
+        from dedup import canonicalize_url, dedupe_stories
+        self.assertEqual(
+            canonicalize_url('https://www.openai.com/index/gpt-5/?utm_source=hn#top'),
+            canonicalize_url('http://openai.com/index/gpt-5'),
+        )
+        self.assertNotEqual(canonicalize_url('https://github.com/x/y?ref=main'), canonicalize_url('https://github.com/x/y'))
+        self.assertNotEqual(canonicalize_url('https://d.example/feed?output=json'), canonicalize_url('https://d.example/feed'))
+        stories = [
+            {'id': 1, 'title': 'Introducing GPT-5', 'url': 'https://openai.com/index/gpt-5/?utm_source=hn'},
+            {'title': 'Introducing GPT-5', 'url': 'https://openai.com/index/gpt-5', 'source': 'openai', 'summary': 'From the feed'},
+            {'title': 'Introducing GPT-5 | OpenAI', 'url': 'https://news.example.com/gpt-5', 'source': 'verge_ai'},
+            {'title': 'Introducing GPT-6', 'url': 'https://openai.com/index/gpt-6', 'source': 'openai'},
+        ]
+        merged = dedupe_stories(stories)
+        self.assertEqual(len(merged), 2)
+        self.assertEqual(len(merged[0]['sources']), 3)
+        self.assertEqual(merged[0]['summary'], 'From the feed')
+
+    def test_keyword_matcher_reports_terms(self):
+        from keyword_matcher import KeywordMatcher
+        matcher = KeywordMatcher(['machine learning', 'learning', 'ai'])
+        self.assertEqual(matcher.matches('New Machine Learning paper'), ['machine learning', 'learning'])
+        self.assertTrue(matcher.search('she said'))
+        strict = KeywordMatcher(['ai'], word_boundary=True)
+        self.assertFalse(strict.search('she said'))
+        self.assertTrue(strict.search('Open-source AI agents'))
+
+    def test_page_meta_stops_after_head(self):
+        from html_meta import extract_page_meta
+        html = ('<html><head><meta property="og:image" content="/cover.jpg">'
+                '<meta name="date" content="2026-02-05"></head>'
+                '<body><p>Body text</p><time datetime="2026-01-01">Jan 1</time></body></html>')
+        page = extract_page_meta(html, stop_after_head=lambda p: bool(p.meta_values('og:image')))
+        self.assertTrue(page.stopped_early)
+        self.assertEqual(page.meta_values('date'), ['2026-02-05'])
+        self.assertEqual(page.times, [])
+        page = extract_page_meta(html, collect_text=True)
+        self.assertEqual(page.times, [{'datetime': '2026-01-01', 'text': 'Jan 1'}])
+        self.assertIn('Body text', page.text)
+
+    def test_blog_discovery_dedupes_and_uses_cached_dates(self):
+        from scraper import ArticleDateCache, GenericWebScraper
+        html = ('<a href="/news/launch">Introducing our new model family</a>'
+                '<a href="/news/launch">Read more about our new model family</a>'
+                '<a href="/news/safety">Our approach to model safety research</a>')
+        stories = GenericWebScraper._discover_links('lab', 'https://lab.example/news', html, limit=3)
+        self.assertEqual([s['link'] for s in stories],
+                         ['https://lab.example/news/launch', 'https://lab.example/news/safety'])
+        cache = ArticleDateCache()
+        for story in stories:
+            cache.put(story['link'], '2026-02-05T00:00:00')
+        self.assertEqual(GenericWebScraper._resolve_dates(stories, {}, cache), 0)
+        self.assertEqual({s['published'] for s in stories}, {'2026-02-05T00:00:00'})
+
+    def test_host_guard_trips_after_consecutive_failures(self):
+        from host_guard import CircuitOpenError, HostGuard
+        guard = HostGuard(rate=100, burst=100, failure_threshold=2, host_limits={})
+        guard.acquire('https://flaky.example/a')
+        guard.record('https://flaky.example/a', 503)
+        guard.record('https://flaky.example/b', 404)  # a bad URL is not the host's fault
+        guard.record('https://flaky.example/c', error=TimeoutError())
+        guard.acquire('https://flaky.example/d')
+        guard.record('https://flaky.example/d', error=TimeoutError())
+        with self.assertRaises(CircuitOpenError):
+            guard.acquire('https://www.flaky.example/e')
+        guard.acquire('https://other.example/')
+        snapshot = guard.snapshot()
+        self.assertEqual(snapshot['flaky.example']['circuit'], 'open')
+        self.assertEqual(snapshot['flaky.example']['skipped'], 1)
+        self.assertEqual(snapshot['other.example']['circuit'], 'closed')
+
+    def test_host_guard_cools_off_on_429_without_tripping(self):
+        from host_guard import CircuitOpenError, HostGuard
+        guard = HostGuard(rate=100, burst=100, failure_threshold=2, host_limits={})
+        for _ in range(5):
+            guard.record('https://busy.example/a', 429, retry_after=10)
+        self.assertTrue(guard.is_open('https://busy.example/b'))
+        with self.assertRaises(CircuitOpenError):
+            guard.acquire('https://busy.example/b')
+        with mock.patch('host_guard.time.monotonic', return_value=guard._hosts['busy.example'].cooldown_until + 1):
+            self.assertFalse(guard.is_open('https://busy.example/b'))
+            guard.acquire('https://busy.example/b')
+        snapshot = guard.snapshot()['busy.example']
+        self.assertEqual((snapshot['circuit'], snapshot['failures'], snapshot['throttled']), ('closed', 0, 5))
+
+    def test_hn_watermark_prunes_old_ids_and_stops_new_batches(self):
+        from scraper import HackerNewsScraper
+        now = time.time()
+        fresh, stale = {'time': now - 600, 'url': 'https://x.example'}, {'time': now - 2 * 86400, 'url': 'https://y.example'}
+        self.assertEqual(HackerNewsScraper._advance_watermark(0, {5: stale, 7: fresh, 9: None}, now - 86400), 6)
+        self.assertEqual(HackerNewsScraper._advance_watermark(10, {5: stale}, now - 86400), 10)
+
+        items = {10: fresh, 9: fresh, 8: stale, 7: stale, 6: fresh, 5: fresh, 3: fresh}
+        listings = {'topstories': [10, 3], 'beststories': [], 'newstories': [10, 9, 8, 7, 6, 5]}
+        batches = []
+
+        def fake_get(url, timeout=None):
+            return mock.Mock(json=lambda: listings[url.rsplit('/', 1)[1][:-len('.json')]])
+
+        hn = self._bare_hn_scraper(timeout=1, fetcher=mock.Mock(concurrency=4))
+        hn.fetch_items = lambda ids: batches.append(list(ids)) or {i: dict(items[i], id=i) for i in ids}
+        (self.tmp / 'hn_watermark.json').write_text(json.dumps({'watermark': 6}))
+        with mock.patch('scraper.CACHE_DIR', self.tmp), mock.patch('scraper.HN_NEW_STORIES_BATCH', 2), \
+                mock.patch('scraper.guarded_get', side_effect=fake_get):
+            stories = hn.get_top_stories()
+        saved = json.loads((self.tmp / 'hn_watermark.json').read_text())['watermark']
+        self.assertEqual(batches, [[10, 9], [8, 7], []])  # all-stale batch ends the walk; 6 and 5 never fetched
+        self.assertEqual(saved, 9)  # 3 is below it, so it was pruned without a request
+        self.assertEqual([s['id'] for s in stories], [10, 9])
+
+    def test_historical_range_buckets_days_by_query_priority(self):
+        def at(day, hour=12):
+            return int(datetime(2026, 3, day, hour).timestamp())
+
+        hits_by_query = {
+            'ai': [at(1, 9), at(1, 10), at(1, 11)],  # high-points query: day 1 only
+            'llm': [at(1), at(2)],
+            'search_by_date': [at(2), at(9, 23)],
+        }
+        windows = []
+        lock = threading.Lock()
+
+        def fake_search(endpoint, query, numeric_filters, hits_per_page):
+            start, end = map(int, re.findall(r'created_at_i[<>](\d+)', numeric_filters))
+            name = 'search_by_date' if endpoint == 'search_by_date' else query
+            with lock:
+                windows.append((name, start, end))
+            hits = [{'objectID': str(ts), 'title': f'{name} {ts}', 'url': f'https://s.example/{ts}', 'created_at_i': ts}
+                    for ts in hits_by_query[name] if start < ts < end]
+            return {'hits': hits, 'nbHits': overflow.get((start, end), len(hits))}
+
+        hn = self._bare_hn_scraper(_algolia_search=fake_search)
+        overflow = {}
+        with mock.patch('scraper.ALGOLIA_RANGE_CHUNK_DAYS', 7):
+            days = hn.get_historical_stories_range(datetime(2026, 3, 1, 15), datetime(2026, 3, 9, 8), limit=2)
+        self.assertEqual(sorted(windows), [
+            ('ai', at(1, 0), at(8, 0)), ('ai', at(8, 0), at(10, 0)),
+            ('llm', at(2, 0), at(8, 0)), ('llm', at(8, 0), at(10, 0)),  # fallbacks skip the full day 1
+            ('search_by_date', at(2, 0), at(8, 0)), ('search_by_date', at(8, 0), at(10, 0)),
+        ])
+        self.assertEqual(sorted(days), ['2026-03-01', '2026-03-02', '2026-03-09'])
+        self.assertEqual([s['title'] for s in days['2026-03-01']], [f'ai {at(1, 9)}', f'ai {at(1, 10)}'])
+        self.assertEqual(days['2026-03-02'][0]['title'], f'llm {at(2)}')  # beats the date-sorted fallback
+        self.assertEqual(days['2026-03-09'][0]['id'], at(9, 23))
+
+        # A window past Algolia's hit cap is halved instead of paged; filled days need no fallback.
+        windows.clear()
+        overflow[(at(1, 0), at(8, 0))] = 5000
+        days = hn.get_historical_stories_range(datetime(2026, 3, 1), datetime(2026, 3, 1), limit=2)
+        self.assertEqual(windows, [('ai', at(1, 0), at(2, 0))])
+        with mock.patch('scraper.ALGOLIA_RANGE_CHUNK_DAYS', 7):
+            hn.get_historical_stories_range(datetime(2026, 3, 1), datetime(2026, 3, 7), limit=0)
+        self.assertEqual(windows[1:], [('ai', at(1, 0), at(8, 0)), ('ai', at(1, 0), at(4, 0)), ('ai', at(4, 0), at(8, 0))])
+
+    def test_hn_item_cache_keeps_negatives_and_expires(self):
+        from scraper import HNItemCache
+        path = self.tmp / 'hn_items.json'
+        hn = self._bare_hn_scraper(item_cache=HNItemCache(path, ttl=60))
+        requested = []
+
+        def fetch_json(urls, on_error=None):
+            urls = list(urls)
+            requested.extend(urls)
+            on_error(f'{hn.hn_api}/item/4.json', TimeoutError('slow'))
+            return {f'{hn.hn_api}/item/1.json': {'id': 1, 'title': 'live'},
+                    f'{hn.hn_api}/item/3.json': {'id': 3, 'dead': True}}
+
+        hn.fetcher = mock.Mock(fetch_json=fetch_json)
+        hn.fetch_raw_items([1, 2, 3, 4])
+        self.assertEqual(len(requested), 4)
+        requested.clear()
+        again = hn.fetch_raw_items([1, 2, 3, 4])
+        self.assertEqual(requested, [f'{hn.hn_api}/item/4.json'])  # only the transport failure is retried
+        self.assertEqual((again[2], again[3]['dead']), (None, True))
+
+        self.assertFalse(path.exists())  # stores only mark the cache dirty; close() persists it
+        hn.close()
+        self.assertEqual(list(self.tmp.iterdir()), [path])
+        reloaded = HNItemCache(path, ttl=60)
+        found, missing = reloaded.lookup([1, 2, 3, 4])
+        self.assertEqual((sorted(found), missing), ([1, 2, 3], [4]))  # null and dead items persist too
+        with mock.patch('scraper.time.time', return_value=time.time() + 61):
+            self.assertEqual(HNItemCache(path, ttl=60).lookup([1, 2, 3])[1], [1, 2, 3])
+        self.assertIsNone(HNItemCache(ttl=0).path)  # ttl 0: run-scoped, never written
+
+    def test_async_fetcher_reuses_one_client_until_closed(self):
+        from async_fetch import AsyncJSONFetcher
+        clients = []
+        real_client = httpx.AsyncClient
+
+        def make_client(**kwargs):
+            transport = httpx.MockTransport(
+                lambda request: httpx.Response(404 if 'missing' in request.url.path else 200,
+                                               json={'path': request.url.path}))
+            clients.append(real_client(transport=transport, **kwargs))
+            return clients[-1]
+
+        errors = []
+        fetcher = AsyncJSONFetcher(concurrency=4, per_host=2)
+        with mock.patch('async_fetch.httpx.AsyncClient', side_effect=make_client):
+            first = fetcher.fetch_json(['https://api.example/a', 'https://api.example/missing'],
+                                       on_error=lambda url, e: errors.append(url))
+            second = asyncio.run(fetcher.fetch_json_async(['https://api.example/b']))  # from another loop
+            self.assertEqual(len(clients), 1)
+            fetcher.close()
+            self.assertTrue(clients[0].is_closed)
+            self.assertIsNone(fetcher._thread)
+            fetcher.fetch_json(['https://api.example/c'])
+            self.assertEqual(len(clients), 2)
+            fetcher.close()
+        self.assertEqual(first, {'https://api.example/a': {'path': '/a'}, 'https://api.example/missing': None})
+        self.assertEqual(errors, ['https://api.example/missing'])
+        self.assertEqual(second, {'https://api.example/b': {'path': '/b'}})
+
+    def test_comment_tree_walk_respects_budget_and_cache(self):
+        from scraper import CommentTreeCache
+        items = {
+            1: {'kids': [2, 3], 'descendants': 3},
+            2: {'by': 'a', 'text': 'It&#x27;s <i>fast</i><p>really', 'kids': [4]},
+            3: {'dead': True},
+            4: {'by': 'b', 'text': 'reply', 'kids': [5]},
+            5: {'by': 'c', 'text': 'too deep'},
+        }
+        fetched = []
+        hn = self._bare_hn_scraper(comment_trees=CommentTreeCache())
+        hn.fetch_raw_items = lambda ids: fetched.extend(ids) or {i: items.get(i) for i in ids}
+        tree = hn.fetch_comment_tree(1, max_depth=2, max_items=10, max_bytes=1000)
+        self.assertEqual([(c['id'], c['depth']) for c in tree], [(2, 0), (4, 1)])
+        self.assertEqual(tree[0]['text'], "It's fast\nreally")
+        fetched.clear()
+        self.assertEqual(hn.fetch_comment_tree(1, max_depth=2, max_items=10, max_bytes=1000), tree)
+        self.assertEqual(fetched, [1])  # only the root, to compare `descendants`
+
+    def test_image_store_dedupes_by_content(self):
+        from image_store import ImageStore
+
+        def fake_get(url, headers=None, timeout=None, stream=None):
+            resp = requests.Response()
+            resp.status_code = 200
+            resp.raw = io.BytesIO(b'\x89PNG\r\n\x1a\n same bytes' if 'late' not in url else b'\x89PNG\r\n\x1a\n late')
+            resp.headers['Content-Type'] = 'image/png'
+            resp.headers['Content-Length'] = 'bogus'  # malformed, ignored
+            if url.endswith('late.png'):
+                store.close()  # the stage deadline passes mid-download
+            return resp
+
+        store = ImageStore(self.tmp)
+        with mock.patch('image_store.guarded_get', side_effect=fake_get) as get:
+            first = store.fetch('https://a.example/cover.png')
+            second = store.fetch('https://cdn.example/copy.png')
+            again = store.fetch('https://a.example/cover.png')
+        self.assertEqual(first, second)
+        self.assertEqual(first, again)
+        self.assertEqual(get.call_count, 2)
+        self.assertEqual([f for f in os.listdir(self.tmp) if f.endswith('.png')], [first])
+
+        with mock.patch('image_store.guarded_get', side_effect=fake_get):
+            self.assertIsNone(store.fetch('https://b.example/late.png'))
+            self.assertIsNone(store.fetch('https://b.example/after.png'))
+        self.assertEqual(sorted(os.listdir(self.tmp)), sorted([first, 'index.json']))
+        self.assertNotIn('https://b.example/late.png', ImageStore(self.tmp).index)
+        self.assertEqual(store.stats['late'], 1)
+
+    def test_image_variant_widths_and_markup(self):
+        from exporter import NewsExporter
+        from image_variants import _target_widths
+        self.assertEqual(_target_widths(2000, 1000, 'WIDE'), [400, 800, 1200])
+        self.assertEqual(_target_widths(3000, 1000, 'TALL'), [400, 600])
+        self.assertEqual(_target_widths(300, 900, 'TALL'), [300])  # never upscaled
+        story = {'image_width': 800, 'image_height': 400, 'image_variants': [
+            {'file': 'h-400w.webp', 'width': 400, 'height': 200, 'format': 'webp'},
+            {'file': 'h-800w.webp', 'width': 800, 'height': 400, 'format': 'webp'},
+        ]}
+        markup = NewsExporter._render_image(story, 'images/h.png', 'images/')
+        self.assertIn('srcset="images/h-400w.webp 400w, images/h-800w.webp 800w"', markup)
+        self.assertIn('width="800" height="400"', markup)
+        self.assertEqual(NewsExporter._render_image({}, 'images/h.png', 'images/'),
+                         '<img src="images/h.png" class="news-img" alt="">')
+
+    def test_image_sniffing_ignores_content_type(self):
+        from image_store import sniff_image_extension
+        self.assertEqual(sniff_image_extension(b'\xff\xd8\xff\xe0\x00\x10JFIF'), '.jpg')
+        self.assertEqual(sniff_image_extension(b'RIFF\x24\x00\x00\x00WEBPVP8 '), '.webp')
+        self.assertIsNone(sniff_image_extension(b'<!DOCTYPE html>'))
+        self.assertIsNone(sniff_image_extension(b'<svg xmlns="http'))
+
+    def test_image_ranking_prefers_large_og_images(self):
+        from image_rank import choose_image, image_dimensions, rank_candidates
+        png_head = b'\x89PNG\r\n\x1a\n' + b'\x00\x00\x00\rIHDR' + struct.pack('>II', 1200, 630)
+        self.assertEqual(image_dimensions(png_head), (1200, 630))
+        candidates = [
+            {'url': 'https://a.example/thumb-100x100.jpg', 'source': 'og', 'width': None, 'height': None},
+            {'url': 'https://a.example/body.jpg', 'source': 'img', 'width': 900, 'height': 500},
+            {'url': 'https://a.example/card.jpg?w=1200&h=630', 'source': 'twitter', 'width': None, 'height': None},
+        ]
+        ranked = rank_candidates(candidates, probe_top=0)
+        self.assertEqual([c['url'] for c in ranked],
+                         ['https://a.example/card.jpg?w=1200&h=630', 'https://a.example/body.jpg'])
+        with mock.patch('image_rank.probe_dimensions', return_value=None):
+            chosen = choose_image(candidates)
+        self.assertEqual(chosen['image_layout'], 'WIDE')
+        self.assertTrue(chosen['worth_showing_image'])
+
+    def test_image_discovery_skips_filtered_stories(self):
+        processor = NewsProcessorWithRouter()
+        processor.categorize_story = lambda *a, **k: {'category': 'Dev', 'category_id': 0, 'confidence': 1.0, 'model_used': 'm'}
+        with mock.patch.object(NewsProcessorWithRouter, '_discover_image', return_value={}) as discover:
+            self.assertEqual(processor._process_one_story((0, {'title': 't', 'url': 'https://a.example'})), (0, None))
+            discover.assert_not_called()
+            processor.categorize_story = lambda *a, **k: {'category': 'Dev', 'category_id': 2, 'confidence': 1.0, 'model_used': 'm'}
+            processor.summarize_story = lambda *a, **k: {'headline': 'h', 'summary': 's', 'significance_score': 5, 'model_used': 'm'}
+            discover.side_effect = RuntimeError('page unreachable')
+            _, result = processor._process_one_story((1, {'title': 't', 'url': 'https://b.example'}))
+        self.assertIsNone(result['selected_image_url'])
+        self.assertFalse(result['worth_showing_image'])
+
+    def test_llm_limiter_grows_and_backs_off(self):
+        from llm_limiter import AdaptiveLimiter, parse_retry_after, status_from_text
+        limiter = AdaptiveLimiter(start=2, ceiling=4, backoff=0.5, default_retry_after=5, max_wait=0)
+        self.assertTrue(limiter.acquire('hf/m'))
+        self.assertTrue(limiter.acquire('hf/m'))
+        self.assertFalse(limiter.acquire('hf/m'))
+        for _ in range(2):
+            limiter.release('hf/m', 200)
+        self.assertEqual(limiter.limit('hf/m'), 2)  # 2 -> 2.5 -> 2.9
+        for _ in range(2):
+            limiter.acquire('hf/m')
+            limiter.release('hf/m', 200)
+        self.assertEqual(limiter.limit('hf/m'), 3)
+        limiter.acquire('hf/m')
+        limiter.release('hf/m', 429, retry_after=60)
+        self.assertEqual(limiter.limit('hf/m'), 1)
+        started = time.monotonic()
+        self.assertFalse(limiter.acquire('hf/m', max_wait=1))  # cooling down past the wait budget
+        self.assertLess(time.monotonic() - started, 0.5)  # falls through at once instead of sleeping
+        self.assertLessEqual(AdaptiveLimiter().max_wait, 2)
+        self.assertTrue(limiter.acquire('free/gemini'))
+        limiter.release('free/gemini', error=RuntimeError('StreamGenerate failed: HTTP 429'))
+        self.assertEqual(limiter.snapshot()['free/gemini']['throttled'], 1)
+        self.assertEqual(parse_retry_after('7'), 7.0)
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertEqual(status_from_text('Error: HTTP 503'), 503)
+        self.assertEqual(status_from_text('ChatGPT: Failed to get requirements: 403'), 403)
+        self.assertIsNone(status_from_text('Gemini: read timed out after 30s'))
+
+    def test_free_chatbot_clients_are_reused_until_auth_fails(self):
+        from host_guard import HostGuard
+        from llm_limiter import AdaptiveLimiter
+        from llm_router import ChatbotClientPool
+
+        class FakeBot:
+            def chat(self, prompt):
+                if prompt == 'bootstrap':
+                    raise Exception('ChatGPT: Failed to get requirements: 403')
+                return 'Error: HTTP 401' if prompt == 'expired' else '{"ok": 1}'
+
+        sys.modules['fake_bots'] = types.SimpleNamespace(FakeBot=FakeBot)
+        router = LLMRouter()
+        router.chatbots = ChatbotClientPool({'gemini': ('fake_bots', 'FakeBot')})
+        router.limiter = AdaptiveLimiter()
+        call_gemini = next(call for lane, _, call in router._attempts(True, False) if lane == 'free/gemini')
+        with mock.patch('llm_router.get_host_guard', return_value=HostGuard(host_limits={})):
+            for prompt in ('a', 'b', 'expired', 'c', 'bootstrap', 'd'):
+                call_gemini(prompt)
+        del sys.modules['fake_bots']
+        self.assertEqual(router.chatbots.stats, {'created': 3, 'reused': 3, 'refreshed': 2})
+
+    def test_llm_response_cache_hits_expires_and_evicts(self):
+        from llm_cache import LLMResponseCache
+        cache = LLMResponseCache(self.tmp / 'llm.sqlite3', ttl=60, max_entries=2)
+        router = LLMRouter()
+        router.cache = cache
+        answer = {'response': '{"category_id": 3}', 'model': 'Qwen3-235B-A22B', 'provider': 'huggingface',
+                  'cost': 0, 'quality_score': 5}
+        with mock.patch.object(router, '_call_uncached', return_value=answer) as call:
+            router.call_llm('p1')
+            hit = router.call_llm('p1')
+            router.call_llm('p1', use_cache=False)
+            router.call_llm('p1', prefer_cheap=False)  # different tier, different key
+        self.assertEqual(call.call_count, 3)
+        self.assertTrue(hit['cached'])
+        self.assertEqual(hit['model'], 'Qwen3-235B-A22B')
+
+        with mock.patch.object(router, '_call_uncached',
+                               return_value=dict(answer, model='Local-Fallback', provider='local')):
+            router.call_llm('p2')
+        self.assertIsNone(cache.get(cache.key('p2', 'cheap')))
+
+        cache.put(cache.key('p3', 'cheap'), answer)
+        self.assertEqual(cache.stats['evicted'], 1)
+        self.assertIsNone(cache.get(cache.key('p1', 'cheap')))  # least recently used
+        with mock.patch('llm_cache.time.time', return_value=10 ** 12):
+            self.assertIsNone(cache.get(cache.key('p3', 'cheap')))
+        cache._conn.close()
+
+    def test_batch_categorization_requeues_malformed_items(self):
+        processor = NewsProcessorWithRouter()
+        stories = [(i, {'title': f'Story {i}', 'summary': 'About a model', 'url': f'https://s.example/{i}'})
+                   for i in range(5)]
+        prompts = []
+
+        def fake_call(prompt, **kwargs):
+            prompts.append(prompt)
+            if 'STORIES:' in prompt:
+                reply = [{'index': 0, 'category_id': 7, 'confidence': 0.9, 'detected_model': 'Gemma 3'},
+                         {'index': 1, 'category_id': 'n/a'},
+                         {'index': 0, 'category_id': 2, 'confidence': 0.1},
+                         {'index': 3, 'category_id': '5', 'confidence': 0.8},
+                         {'index': 4, 'category_id': 0, 'confidence': 0.9},
+                         {'index': 9, 'category_id': 1, 'confidence': 0.9}]
+                return {'response': 'Here you go: ' + json.dumps(reply), 'model': 'Batch'}
+            return {'response': '{"category_id": 2, "confidence": 0.6}', 'model': 'Single'}
+
+        processor.router.call_llm = fake_call
+        categories = processor.categorize_batch(stories)
+        self.assertEqual(len(prompts), 3)  # one batch + stories 1 and 2 alone
+        self.assertEqual(categories[0]['detected_model'], 'Gemma 3')
+        self.assertEqual(categories[4]['category_id'], 0)
+        self.assertEqual({i for i, c in categories.items() if c['model_used'] == 'Single'}, {1, 2})
+
+    def test_local_preclassifier_calibrates_and_defers(self):
+        from local_classifier import LocalPreClassifier, load_negative_examples, record_negative_examples
+        topics = {
+            3: ['humanoid robot', 'robotics lab', 'world model robot'],
+            11: ['gpu prices', 'cloud inference cost', 'h100 supply'],
+            7: ['releases model weights', 'launches new model', 'model checkpoint release'],
+        }
+        examples = [(f'{phrase} story {n}', f'about {phrase}', category_id)
+                    for category_id, phrases in topics.items() for n in range(15) for phrase in phrases]
+        path = self.tmp / 'irrelevant.json'
+        off_topic = [{'title': f'{phrase} roundup {n}', 'url': f'https://x.example/{phrase}/{n}'}
+                     for phrase in ('ai recipe contest', 'ai horoscope app', 'pet photo ai filter') for n in range(15)]
+        self.assertEqual(record_negative_examples(off_topic + off_topic[:3], path), 45)
+        negatives = load_negative_examples(path)
+        self.assertEqual({c for _, _, c in negatives}, {0})
+        classifier = LocalPreClassifier(examples + negatives, valid_categories=range(1, 14))
+        self.assertTrue(classifier.enabled)
+        self.assertNotIn(0, classifier.allowed)
+        self.assertEqual(classifier.classify('GPU prices climb again')[0], 11)
+        self.assertIsNone(classifier.classify('Lab launches new model with open weights'))  # releases go to the LLM
+        self.assertIsNone(classifier.classify('Completely unrelated words'))
+        self.assertIsNone(classifier.classify('Weekly AI recipe contest results'))  # looks like a past rejection
+        self.assertIsNone(classifier.classify('Humanoid lab story 99'))  # no AI keyword: relevance is the LLM's call
+        self.assertFalse(LocalPreClassifier(examples[:20]).enabled)  # too little history
+
+    def test_hedged_call_takes_first_valid_json(self):
+        from llm_router import LLM_HEDGE_MAX_INFLIGHT, PROCESSING_MAX_WORKERS
+        from model_scheduler import ModelScheduler
+        router = LLMRouter()
+        router.scheduler = ModelScheduler(self.tmp / 'model_stats.json')
+        release = threading.Event()
+        started = []
+
+        def attempt(name, reply, block=False):
+            def call(prompt):
+                started.append(name)
+                if block:
+                    release.wait(5)
+                return reply
+            return (f'test/{name}', {'model': name, 'provider': 'test', 'quality_score': 1}, call)
+
+        attempts = [attempt('slow', '{"category_id": 1}', block=True),
+                    attempt('prose', 'Sure, category one.'),
+                    attempt('json', '[{"index": 0, "category_id": 2}]'),
+                    attempt('unused', '{}')]
+        with mock.patch('llm_router.LLM_HEDGE_DEFAULT_DELAY', 0.05), mock.patch('llm_router.LLM_HEDGE_MIN_DELAY', 0.05):
+            result = router._call_hedged(attempts, 'RESPOND WITH JSON', require_json=True)
+            release.set()
+            self.assertEqual(result['model'], 'json')  # prose failed over at once, slow one was hedged
+            self.assertNotIn('unused', started)
+            self.assertEqual(router.hedge_stats['won_by_hedge'], 1)
+            with mock.patch('llm_router.LLM_HEDGE_MAX_INFLIGHT', 1):
+                started.clear()
+                release.clear()
+                threading.Timer(0.3, release.set).start()
+                self.assertEqual(router._call_hedged(attempts[:2], 'JSON', True)['model'], 'slow')
+                self.assertEqual(started, ['slow'])
+        self.assertEqual(router._hedge_pool._max_workers, PROCESSING_MAX_WORKERS * LLM_HEDGE_MAX_INFLIGHT)
+        router.close()
+        with self.assertRaises(RuntimeError):
+            router._hedge_pool.submit(print)
+
+    def test_model_scheduler_avoids_failing_models_and_persists(self):
+        from model_scheduler import ModelScheduler
+        path = self.tmp / 'model_stats.json'
+        scheduler = ModelScheduler(path, rng=random.Random(7))
+        router = LLMRouter()
+        router.scheduler = scheduler
+        qwen, gpt_oss = (router.model_lane(m) for m in router.MODELS[:2])
+        for _ in range(20):
+            scheduler.record(qwen, False, 30.0, status_code=429)
+            scheduler.record(gpt_oss, True, 2.0)
+        picks = Counter(router.pick_model().name for _ in range(200))
+        self.assertGreater(picks['GPT-OSS-120B'], 150)
+        self.assertLess(picks['Qwen3-235B-A22B'], 5)
+        scheduler.save()
+
+        reloaded = ModelScheduler(path)
+        self.assertEqual(reloaded.snapshot()[qwen]['throttled'], 20)
+        self.assertEqual(reloaded.snapshot()[gpt_oss]['ewma_latency'], 2.0)
+        with mock.patch('model_scheduler.time.time', return_value=reloaded._stats[qwen].updated_at + 72 * 3600):
+            self.assertAlmostEqual(reloaded.snapshot()[qwen]['failures'], 20, places=0)  # snapshot does not decay
+            reloaded.record(qwen, True)
+        self.assertAlmostEqual(reloaded.snapshot()[qwen]['failures'], 10, places=1)
+
+    def test_open_circuit_skips_model_without_penalty(self):
+        from host_guard import HostGuard
+        from llm_limiter import AdaptiveLimiter
+        from model_scheduler import ModelScheduler
+        router = LLMRouter()
+        router.scheduler = ModelScheduler(self.tmp / 'model_stats.json')
+        router.limiter = AdaptiveLimiter(start=4, ceiling=8)
+        model = router.MODELS[0]
+        lane = router.model_lane(model)
+        guard = HostGuard(rate=100, burst=100, failure_threshold=1, host_limits={})
+        guard.record('https://api-inference.huggingface.co/', error=TimeoutError())
+        with mock.patch('llm_router.get_host_guard', return_value=guard), mock.patch('llm_router.httpx.Client') as client:
+            self.assertIsNone(router._run_attempt(lane, lambda p: router._call_inference_endpoint(model, p), 'p', False))
+            with mock.patch.object(guard, 'is_open', return_value=False):  # tripped after the check
+                self.assertIsNone(router._run_attempt(lane, lambda p: router._call_inference_endpoint(model, p), 'p', False))
+        client.assert_not_called()
+        self.assertEqual(router.limiter.limit(lane), 4)
+        self.assertEqual(router.limiter.snapshot()[lane]['calls'], 1)
+        self.assertNotIn(lane, router.scheduler.snapshot())
+
+    def test_release_comment_signals_use_one_shallow_batch(self):
+        from main import _attach_hn_comment_signals
+        calls = []
+
+        def fetch_comment_trees(ids, **budget):
+            calls.append((ids, budget))
+            return {1: [{'text': t} for t in 'abcd'], 3: [], 4: [{'text': 'e'}]}
+
+        aggregator = types.SimpleNamespace(hn_scraper=types.SimpleNamespace(fetch_comment_trees=fetch_comment_trees))
+        stories = [{'id': 1, 'title': 'New model release'},
+                   {'id': 2, 'title': 'A cooking blog'},
+                   {'title': 'Gemini weights', 'hn_url': 'https://news.ycombinator.com/item?id=3'}]
+        _attach_hn_comment_signals(stories, aggregator)
+        self.assertEqual(calls, [([1, 3], {'max_depth': 1, 'max_items': 6})])
+        self.assertEqual(stories[0]['release_signal_text'], 'a b c')
+        self.assertNotIn('release_signal_text', stories[2])
+
+        calls.clear()
+        stories = [{'id': i, 'title': f'model release {i}'} for i in range(1, 41)]
+        _attach_hn_comment_signals(stories, aggregator, max_items=2)
+        self.assertEqual([ids for ids, _ in calls], [[1, 2], [3], [4]])  # stops once two threads had comments
+
+    def test_feed_state_store_tracks_marks_and_seen_guids(self):
+        from state_store import SEEN_RETENTION_SECONDS, FeedStateStore
+        store = FeedStateStore(self.tmp / 'feed_state.sqlite3')
+        feed = 'https://lab.example/feed.xml'
+        self.assertTrue(store.is_new(feed, 'a', 100.0))  # nothing recorded yet
+        store.record(feed, [('a', 100.0), ('b', None), ('c', 90.0)])
+        self.assertEqual(store.get_mark(feed), (100.0, 'a'))
+        self.assertFalse(store.is_new(feed, 'a', 100.0))  # same GUID again
+        self.assertFalse(store.is_new(feed, 'b', None))  # undated, judged by GUID
+        self.assertFalse(store.is_new(feed, 'old', 50.0))  # below the mark
+        self.assertTrue(store.is_new(feed, 'fresh', 150.0))
+        self.assertTrue(store.is_new(feed, 'undated', None))
+        self.assertTrue(store.is_new('https://other.example/rss', 'a', 10.0))  # marks are per feed
+        store.record(feed, [])
+        self.assertEqual(store.get_mark(feed), (100.0, 'a'))
+        with mock.patch('state_store.time.time', return_value=10 ** 10 + SEEN_RETENTION_SECONDS):
+            store.record(feed, [('d', 200.0)])
+        self.assertTrue(store.is_new(feed, 'b', None))  # GUID forgotten after the retention period
+        self.assertFalse(store.is_new(feed, 'c', 90.0))  # ...but the mark still screens dated entries
+        self.assertEqual(store.get_mark(feed), (200.0, 'd'))
+        store._conn.close()
+
+    def test_feed_state_is_recorded_only_on_commit(self):
+        from scraper import RSSFeedScraper
+        from state_store import FeedStateStore
+        scraper = RSSFeedScraper(incremental=False)
+        scraper.state = FeedStateStore(self.tmp / 'feed_state.sqlite3')
+        stuck = threading.Event()
+
+        def fake_fetch(url, limit=None, target_date=None, timeout=None):
+            if url.endswith('slow'):
+                stuck.wait(5)
+            return [{'title': url}], False, [(url + '#1', 1000.0)]
+
+        feeds = {'Fast': 'https://a.example/fast', 'Slow': 'https://b.example/slow'}
+        with mock.patch.object(RSSFeedScraper, 'AI_LAB_FEEDS', feeds), \
+                mock.patch('scraper.RSS_FEED_DEADLINE', 0.3), \
+                mock.patch.object(scraper, '_fetch_feed_entries', side_effect=fake_fetch):
+            results = scraper.fetch_all_feeds()
+        stuck.set()
+        self.assertEqual(scraper.last_report['Slow']['status'], 'timeout')
+        self.assertEqual(len(results['Fast']), 1)
+        self.assertTrue(scraper.state.is_new(feeds['Fast'], feeds['Fast'] + '#1', 1000.0))  # not yet
+        self.assertEqual(scraper.commit_state(), 1)
+        self.assertFalse(scraper.state.is_new(feeds['Fast'], feeds['Fast'] + '#1', 1000.0))
+        self.assertEqual(scraper.state.get_mark(feeds['Slow']), (None, None))  # abandoned feed stays unseen
+        scraper.state._conn.close()
+
 if __name__ == '__main__':
     unittest.main()
 
@@ -281,7 +281,7 @@ OPENROUTER_REASONING_MODELS = [
 GEMINI_MODEL = "gemini-2.5-flash-image"
 
 # Parallel processing: number of concurrent LLM calls (categorize + summarize per story)
-PROCESSING_MAX_WORKERS = 1  # Set to 1 to avoid rate limits (was 5)
+PROCESSING_MAX_WORKERS = 8  # Upper bound only: the LLM router adapts per-provider concurrency to 429s
 
 LLM_TIMEOUT = 30  # Seconds before giving up on LLM response
 